@@ -0,0 +1,302 @@
+# coding: latin1
+'''Benchmarks of the simulation core.
+
+Times the match engine, the weekly and season loops, the start of a game and
+saving and loading a career, always from games started with the same seed.
+season_ai and season_parallel play a season without human teams, as
+lib.simulate --seasons-only does, in the main process and in PROCESSES worker
+processes; on a machine with a single CPU both run in the main process.
+Every benchmark is warmed up, then timed a number of times; the results are
+written as JSON and compared against a stored baseline:
+
+    python -m benchmarks.run --output results.json
+    python -m benchmarks.run --only week season --repeat 10
+    python -m benchmarks.run --update-baseline
+
+A benchmark regresses when its median is slower than the baseline median by
+more than the threshold (a fraction, 0.25 by default). The baseline depends on
+the machine, so refresh it with --update-baseline on the machine that compares.
+'''
+import argparse
+import gc
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+from lib import db, parallel, simulate
+from lib.Game import Game
+from lib.Match import Match
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+PROCESSES = 4
+SEED = 1
+TEAM = 'Benfica'
+THRESHOLD = 0.25
+
+
+def _human_match(game):
+    team = game.human_teams[0]
+    return [match for match in team.division.matches[game.week] if team in match.teams][0]
+
+
+def _fresh(match):
+    return Match(teams = list(match.teams), seed = match.seed)
+
+
+def bench_match_minute(seed):
+    '''One minute of a human match, played minute by minute as in the interfaces'''
+    game = simulate.new_game(TEAM, seed = seed)
+    match = _human_match(game)
+
+    def _setup():
+        return _fresh(match)
+
+    def _run(match):
+        while not match.finished:
+            match.minute()
+
+    return _setup, _run, 90
+
+
+def bench_match_simulate(seed):
+    '''A whole match, for every match of the first week'''
+    game = simulate.new_game(seed = seed)
+    matches = [match for div in game.divisions for match in div.matches[0]]
+
+    def _setup():
+        return [_fresh(match) for match in matches]
+
+    def _run(matches):
+        for match in matches:
+            match.simulate()
+
+    return _setup, _run, len(matches)
+
+
+def bench_week(seed):
+    '''Game.simulate_weekly_matches followed by next_week'''
+    def _setup():
+        return simulate.new_game(TEAM, seed = seed)
+
+    def _run(game):
+        game.simulate_weekly_matches()
+        game.next_week()
+
+    return _setup, _run, 1
+
+
+def bench_season(seed):
+    '''A whole season, with end_of_season and start_of_season'''
+    def _setup():
+        return simulate.new_game(TEAM, seed = seed)
+
+    def _run(game):
+        game.fast_forward(seasons = 1)
+
+    return _setup, _run, 1
+
+
+def bench_season_ai(seed, processes = None):
+    '''A season without human teams, only reported at its end'''
+    def _setup():
+        return simulate.new_game(seed = seed)
+
+    def _run(game):
+        game.fast_forward(seasons = 1, processes = processes)
+
+    return _setup, _run, 1
+
+
+def bench_season_parallel(seed):
+    '''bench_season_ai with the divisions resolved in PROCESSES worker processes'''
+    return bench_season_ai(seed, processes = PROCESSES)
+
+
+def bench_game_start(seed):
+    '''Game.start with a human team'''
+    template = [team for team in db.TEAMS if team['name'] == TEAM][0]
+    human_team = {'name': template['name'], 'color': template['color'], 'country': template['country'], 'prev_div': None, 'prev_pos': None}
+
+    def _setup():
+        return Game(name = 'Benchmark', seed = seed)
+
+    def _run(game):
+        game.start(human_team = dict(human_team), manager = {'name': 'Benchmark'})
+
+    return _setup, _run, 1
+
+
+def _played_game(seed, weeks = 10):
+    game = simulate.new_game(TEAM, seed = seed)
+    game.name = 'Benchmark'
+    game.fast_forward(weeks = weeks)
+    return game
+
+
+def bench_save(seed, folder):
+    '''Game.save of a career ten weeks into its first season'''
+    game = _played_game(seed)
+
+    def _setup():
+        return game
+
+    def _run(game):
+        game.save(folder)
+
+    return _setup, _run, 1
+
+
+def bench_load(seed, folder):
+    '''SimpleFMState.load_game of a career ten weeks into its first season'''
+    from tui.state import SimpleFMState
+
+    _played_game(seed).save(folder)
+    state = SimpleFMState(save_dir = folder, autosave = False)
+
+    def _setup():
+        return state
+
+    def _run(state):
+        state.load_game('Benchmark')
+        state.close()
+
+    return _setup, _run, 1
+
+
+BENCHMARKS = [
+    ('match_minute', bench_match_minute, 5, 50),
+    ('match_simulate', bench_match_simulate, 3, 20),
+    ('week', bench_week, 2, 10),
+    ('season', bench_season, 1, 5),
+    ('season_ai', bench_season_ai, 1, 5),
+    ('season_parallel', bench_season_parallel, 1, 5),
+    ('game_start', bench_game_start, 5, 50),
+    ('save', bench_save, 2, 10),
+    ('load', bench_load, 2, 10),
+]
+
+
+def measure(setup, run, operations, warmup, repeat):
+    '''Times run(setup()) repeat times, after warmup untimed runs
+
+    As with timeit, the garbage collector is off while run is timed.
+
+    Args:
+        setup (callable): returns the state of one run, not timed
+        run (callable): the timed work, given the state returned by setup
+        operations (int): number of operations in one run
+        warmup (int): number of untimed runs
+        repeat (int): number of timed runs
+
+    Returns:
+        dict: seconds per operation of every run, with their min, median and mean
+    '''
+    for i in range(warmup):
+        run(setup())
+    times = []
+    for i in range(repeat):
+        state = setup()
+        gc.collect()
+        gc.disable()
+        try:
+            start = time.perf_counter()
+            run(state)
+            times.append((time.perf_counter() - start) / operations)
+        finally:
+            gc.enable()
+    return {'operations': operations, 'min': min(times), 'median': statistics.median(times), 'mean': statistics.mean(times), 'runs': times}
+
+
+def run_benchmarks(names = None, seed = SEED, warmup = None, repeat = None):
+    '''Runs the benchmarks named names (all of them by default)
+
+    Args:
+        names (list): names of the benchmarks to run
+        seed (int): seed of the games the benchmarks play
+        warmup (int): untimed runs of every benchmark (default: its own)
+        repeat (int): timed runs of every benchmark (default: its own)
+
+    Returns:
+        dict: the machine, the settings and the results of every benchmark
+    '''
+    unknown = set(names or []) - set(name for name, bench, w, r in BENCHMARKS)
+    if unknown:
+        raise ValueError('Unknown benchmarks: {}'.format(', '.join(sorted(unknown))))
+
+    folder = tempfile.mkdtemp()
+    results = {}
+    try:
+        for name, bench, default_warmup, default_repeat in BENCHMARKS:
+            if names and name not in names:
+                continue
+            args = (seed, folder) if name in ('save', 'load') else (seed,)
+            setup, run, operations = bench(*args)
+            results[name] = measure(setup, run, operations, default_warmup if warmup is None else warmup, default_repeat if repeat is None else repeat)
+    finally:
+        shutil.rmtree(folder, ignore_errors = True)
+        parallel.shutdown()
+    return {'python': platform.python_version(), 'machine': platform.machine(), 'cpus': parallel.usable(os.cpu_count() or 1), 'seed': seed, 'benchmarks': results}
+
+
+def compare(results, baseline, threshold = THRESHOLD):
+    '''Compares the medians of results with those of baseline
+
+    Benchmarks missing from either side are left out.
+
+    Returns:
+        list: (name, baseline median, median, ratio, regressed) of every benchmark
+    '''
+    rows = []
+    for name, result in results['benchmarks'].items():
+        if name not in baseline['benchmarks']:
+            continue
+        before = baseline['benchmarks'][name]['median']
+        ratio = result['median'] / before
+        rows.append((name, before, result['median'], ratio, ratio > 1 + threshold))
+    return rows
+
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(prog = 'python -m benchmarks.run', description = 'Time the SimpleFM simulation core and compare it against a baseline.')
+    parser.add_argument('--only', nargs = '+', metavar = 'NAME', help = 'benchmarks to run: {}'.format(', '.join(name for name, bench, w, r in BENCHMARKS)))
+    parser.add_argument('--seed', type = int, default = SEED, help = 'seed of the benchmarked games (default: %(default)s)')
+    parser.add_argument('--warmup', type = int, help = 'untimed runs of every benchmark')
+    parser.add_argument('--repeat', type = int, help = 'timed runs of every benchmark')
+    parser.add_argument('--output', help = 'file to write the results to as JSON')
+    parser.add_argument('--baseline', default = BASELINE, help = 'results to compare against (default: benchmarks/baseline.json)')
+    parser.add_argument('--threshold', type = float, default = THRESHOLD, help = 'slowdown of the median that counts as a regression (default: %(default)s)')
+    parser.add_argument('--update-baseline', action = 'store_true', help = 'write the results to the baseline instead of comparing')
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.only, seed = args.seed, warmup = args.warmup, repeat = args.repeat)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent = 2)
+    if args.update_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(results, f, indent = 2)
+
+    baseline = None
+    if not args.update_baseline and os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    regressions = 0
+    if baseline is None:
+        for name, result in results['benchmarks'].items():
+            print('{:<16}{:>12.3f} ms'.format(name, result['median'] * 1000))
+    else:
+        for name, before, after, ratio, regressed in compare(results, baseline, args.threshold):
+            print('{:<16}{:>12.3f} ms{:>12.3f} ms{:>8.2f}x{}'.format(name, before * 1000, after * 1000, ratio, '  REGRESSION' if regressed else ''))
+            regressions += regressed
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
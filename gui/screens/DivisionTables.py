@@ -19,7 +19,7 @@ class MatchResults(ScrollableList):
             'away_team': "[b]{}[/b]".format(match.teams[1].name) if match.teams[1] == ACTIVE_TEAM else match.teams[1].name,
             'away_goals': "[b]{}[/b]".format(match.score[1]) if match.finished and match.teams[1] == ACTIVE_TEAM else str(match.score[1]) if match.finished else "",
             'extra_info': "" if ACTIVE_TEAM not in match.teams else "[color={}][b]{}[/b][/color]".format(gui.helpers.COLORS["Red"], "L") if match.loser() == ACTIVE_TEAM else "[color={}][b]{}[/b][/color]".format(gui.helpers.COLORS["Green"], "W") if match.winner() == ACTIVE_TEAM else "[color={}][b]{}[/b][/color]".format(gui.helpers.COLORS["Yellow"], "D") if match.finished else ""}
-            for match in self.current_division.matches[self.current_week]]
+            for match in self.current_division.resolved_matches(self.current_week)]
 
         highlight_data = [data for data in self.data if data['home_team'].strip('[b]').strip('[/b]') == ACTIVE_TEAM.name or data['away_team'].strip('[b]').strip('[/b]') == ACTIVE_TEAM.name]
 
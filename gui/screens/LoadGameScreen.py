@@ -5,8 +5,7 @@ from kivy.app import App
 from kivy.uix.screenmanager import Screen
 from gui.widgets.GlobalWidgets import Information, Confirmation
 from lib.Game import Game
-import pickle
-import os
+from lib import savefile
 from kivy.clock import Clock
 
 
@@ -14,8 +13,8 @@ class LoadGameScreen(Screen):
     def delete_game(self):
         def _delete_game():
             folder = App.get_running_app().get_games_folder()
-            os.remove("{}/{}.sfm".format(folder,
-                      self.ids['games'].selected.name))
+            savefile.delete("{}/{}.sfm".format(folder,
+                            self.ids['games'].selected.name))
             popup.dismiss()
             self.ids['games'].selected = None
             self.refresh()
@@ -33,7 +32,10 @@ class LoadGameScreen(Screen):
             popup.information = "You need to select a game."
             popup.open()
 
-    def setup_game(self, game):
+    def setup_game(self, save):
+        game = Game()
+        game.__dict__.update(save.load())
+        game.player_registry()
         App.get_running_app().GAME = game
         App.get_running_app().setup_game_gui()
         self.manager.current = game.last_screen
@@ -54,27 +56,26 @@ class LoadGameScreen(Screen):
     def get_saved_games_data(self):
         data = []
         folder = App.get_running_app().get_games_folder()
-        games_file_names = os.listdir(folder)
 
-        for file_name in games_file_names:
-            file_path = os.path.join(folder, file_name)
-            if os.path.getsize(file_path) > 0:
-                with open(file_path, "rb") as f:
-                    unpickler = pickle.Unpickler(f)
-                    game_dict = unpickler.load()
-                    f.close()
-                    game = Game()
-                    game.__dict__.update(game_dict)
-                    team = game.human_teams[0]
-
-                    data += [{
-                        'object': game,
-                        'name': str(game.name),
-                        'team_name': team.name,
-                        'current_div': team.division.name,
-                        'current_pos': str(team.division.team_position(team)),
-                        'week': str(game.week + 1) if game.week < 30 else "End of ",
-                        'year': str(game.year())}]
+        for save in savefile.list_saves(folder):
+            if save.legacy:
+                data += [{
+                    'object': save,
+                    'name': str(save.name),
+                    'team_name': '',
+                    'current_div': '',
+                    'current_pos': '',
+                    'week': '',
+                    'year': ''}]
+            else:
+                data += [{
+                    'object': save,
+                    'name': str(save.name),
+                    'team_name': save.team,
+                    'current_div': save.division,
+                    'current_pos': str(save.position),
+                    'week': str(save.week + 1) if save.week < 30 else "End of ",
+                    'year': str(save.year())}]
 
         return data
 
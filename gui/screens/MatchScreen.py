@@ -81,6 +81,7 @@ class MainMatchScreen(Screen):
     def end_match(self):
         GAME.simulate_weekly_matches()
         GAME.next_week()
+        App.get_running_app().save_game()
         self.manager.parent.parent.manager.current = "WeeklyInformationScreen"
 
     def substitution(self):
@@ -119,7 +120,7 @@ class MainMatchScreen(Screen):
             MATCH.teams, home=True) if MATCH.goalscorers[-1]['team'] == MATCH.teams[0] else gui.helpers.match_team_color(MATCH.teams, home=False)
         popup = GoalPopup(border_color=border_color, auto_dismiss=False)
         popup.minute = str(MATCH.goalscorers[-1]['minute']) + "'"
-        popup.goalscorer = MATCH.goalscorers[-1]['player'].name
+        popup.goalscorer = MATCH.goalscorer_name(MATCH.goalscorers[-1])
         popup.score = "[b]{}[/b]-{}".format(MATCH.score[0], MATCH.score[1]
                                             ) if MATCH.goalscorers[-1]['team'] == MATCH.teams[0] else "{}-[b]{}[/b]".format(MATCH.score[0], MATCH.score[1])
         popup.open()
@@ -156,27 +157,31 @@ class MainMatchScreen(Screen):
     def refresh(self):
         if MATCH:
             self.ids["home_goalscorers"].data = [{
-                'name': goalscorer['player'].name,
+                'name': MATCH.goalscorer_name(goalscorer),
                 'goal_minute': str(goalscorer['minute']) + "'"}
                 for goalscorer in MATCH.goalscorers if goalscorer["team"] == MATCH.teams[0]]
             self.ids["away_goalscorers"].data = [{
-                'name': goalscorer['player'].name,
+                'name': MATCH.goalscorer_name(goalscorer),
                 'goal_minute': str(goalscorer['minute']) + "'"}
                 for goalscorer in MATCH.goalscorers if goalscorer["team"] == MATCH.teams[1]]
 
             self.ids["home_goalscorers"].color_label_background()
             self.ids["away_goalscorers"].color_label_background()
 
-            ACTIVE_TEAM.order_players_by_playing_status()
+            starters = sorted(ACTIVE_TEAM.lineup().starters, key=lambda p: (p.injury, p.position, -p.skill))
             gui.helpers.generate_player_list_data(
-                self.ids['team_list'], ACTIVE_TEAM.players, [0], MATCH.minutes)
+                self.ids['team_list'], starters, [0], MATCH.minutes)
 
             gui.helpers.recycle_view_adjust_size_hint_y_to_window(
                 self.ids["team_list"], 0.81)
 
-            self.ids["goalscorers"].size_hint_y = 0.87 - \
+            self.ids["goalscorers"].size_hint_y = 0.83 - \
                 (self.ids["team_list"].size_hint_y)
 
+            home, draw, away = MATCH.win_probabilities()
+            self.ids["win_probabilities"].text = "{} {:.0%}   Draw {:.0%}   {} {:.0%}".format(
+                MATCH.teams[0].name, home, draw, MATCH.teams[1].name, away)
+
             self.ids["main_match_player_header"].bcolor = gui.helpers.match_team_color(
                 MATCH.teams, home=True) if MATCH.teams[0].human else gui.helpers.match_team_color(MATCH.teams, home=False)
 
@@ -229,7 +234,7 @@ class SubstitutionScreen(Screen):
                 player_in=player_in, player_out=player_out, in_match=True, match_minutes=MATCH.minutes)
             if MATCH.injured_player_out == player_out:
                 MATCH.injured_player_out = None
-            MATCH.substitution_made_by_team(ACTIVE_TEAM)
+            MATCH.substitution_made_by_team(ACTIVE_TEAM, player_out, player_in)
             self.ids["team_list"].selected = None
             self.ids["subs_list"].selected = None
             self.ids["team_list"].clear_selection()
@@ -302,7 +307,7 @@ class InjuredSubstitutionScreen(SubstitutionScreen):
                 player_in=player_in, player_out=player_out, in_match=True, match_minutes=MATCH.minutes)
             if MATCH.injured_player_out == player_out:
                 MATCH.injured_player_out = None
-            MATCH.substitution_made_by_team(ACTIVE_TEAM)
+            MATCH.substitution_made_by_team(ACTIVE_TEAM, player_out, player_in)
             self.ids["subs_list"].clear_selection()
             ACTIVE_TEAM.order_players_by_playing_status()
             self.refresh()
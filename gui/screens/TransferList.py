@@ -12,7 +12,7 @@ class PlayersTransferList(SwappableList):
     screen = None
 
     def refresh(self):
-        players = sorted(ACTIVE_TEAM.players_to_buy, key=lambda player: (-player.skill, player.current_value(), player.position))
+        players = sorted(ACTIVE_TEAM.transfer_list(), key=lambda player: (-player.skill, player.current_value(), player.position))
         
         gui.helpers.generate_player_list_data(self, players)
             
@@ -2,10 +2,67 @@
 from .Match import Match
 from operator import attrgetter
 from . import constants
+from . import helpers
+from . import batch
 import random
 
 
+class Standings(object):
+    '''League table of a division, kept in order as the results come in
+
+    Teams are ordered by Team.table_key and, when those are equal, by their
+    order in the teams list of the division, like a stable sort of that list.
+    A result moves its team past the teams it overtakes (or that overtake it)
+    instead of sorting the whole table again, and positions are looked up in a
+    dict.
+    '''
+    def _key(self, team):
+        return self.keys[team], -self.tiebreak[team]
+
+    def _swap(self, i, j):
+        table = self.table
+        table[i], table[j] = table[j], table[i]
+        self.positions[table[i]] = i
+        self.positions[table[j]] = j
+
+    def update(self, team):
+        '''Moves team to its place in the table after its league stats changed'''
+        self.keys[team] = team.table_key()
+        key = self._key(team)
+        i = self.positions[team]
+        while i > 0 and self._key(self.table[i - 1]) < key:
+            self._swap(i - 1, i)
+            i -= 1
+        while i < len(self.table) - 1 and self._key(self.table[i + 1]) > key:
+            self._swap(i, i + 1)
+            i += 1
+
+    def position(self, team):
+        return self.positions[team] + 1
+
+    def commit(self):
+        '''Makes the current table the order used between teams with equal stats'''
+        self.tiebreak = dict(self.positions)
+
+    def valid_for(self, teams):
+        return self.teams is teams and self.size == len(teams)
+
+    def __init__(self, teams):
+        self.teams = teams
+        self.size = len(teams)
+        self.keys = dict((team, team.table_key()) for team in teams)
+        self.tiebreak = dict((team, i) for i, team in enumerate(teams))
+        self.table = sorted(teams, key = self._key, reverse = True)
+        self.positions = dict((team, i) for i, team in enumerate(self.table))
+
+
 class Division(object):
+    _standings = None
+    _fixtures = None
+    _fixtures_matches = None
+    # [week, week ended] of the weeks whose matches wait for resolve, see defer_weekly_matches
+    deferred = None
+
     # TEAMS MONEY
     def money_per_result(self):
         '''Amount of money a team gets per result
@@ -102,14 +159,14 @@ class Division(object):
             season.append(weekly_matches)
         self.matches = season
 
-    def start_of_season(self):
+    def start_of_season(self, seed = None):
         def _create_matches():
             """ Create a schedule for the self.teams in the list and return it"""
             s = []
             teams = self.teams
             if len(self.teams) % 2 == 1:
                 teams = self.teams + [None]
-            random.shuffle(teams)
+            rng.shuffle(teams)
 
             # manipulate map (array of indexes for list) instead of list itself
             # this takes advantage of even/odd indexes to determine home vs. away
@@ -141,13 +198,13 @@ class Division(object):
             for week in s:
                 weekly_matches = []
                 for teams_match in week:
-                    weekly_matches.append(Match(teams = teams_match))
+                    weekly_matches.append(Match(teams = teams_match, seed = helpers.derive_seed(seed, 'match', len(season), len(weekly_matches))))
                 season.append(weekly_matches)
 
             for week in s:
                 weekly_matches = []
                 for teams_match in week:
-                    weekly_matches.append(Match(teams = list(reversed(teams_match))))
+                    weekly_matches.append(Match(teams = list(reversed(teams_match)), seed = helpers.derive_seed(seed, 'match', len(season), len(weekly_matches))))
                 season.append(weekly_matches)
             self.matches = season
 
@@ -157,33 +214,100 @@ class Division(object):
             for i, team in enumerate(teams):
                 team.season_points_per_week = constants.TEAM_GOALS['MAX_POINTS_PER_WEEK'] - i * step
 
+        rng = helpers.new_rng(seed)
         _create_matches()
+        self.index_fixtures()
         for team in self.teams:
             if team is not None:
-                team.start_of_season()
+                team.start_of_season(seed = helpers.derive_seed(seed, 'team', team.name))
                 team.division = self
+                if not team.human:
+                    team.set_strength_table()
         _set_season_points_per_week()
+        # The teams were shuffled and their league stats reset
+        self.reset_standings()
 
 
-    def end_of_season(self):
+    def end_of_season(self, seed = None):
+        self.resolve()
         for team in self.teams:
-            team.end_of_season()
+            team.end_of_season(seed = helpers.derive_seed(seed, 'team', team.name))
 
     def team_position(self, team):
-        self.order_table_by_position()
-        for pos, t in enumerate(self.teams):
-            if t == team:
-                return pos + 1
-        return False
+        standings = self.standings()
+        if team not in standings.positions:
+            return False
+        return standings.position(team)
 
-    def team_matches(self, team):
-        matches = []
-        for week in self.matches:
-            for match in week:
-                if team in match.teams:
-                    matches.append(match)
+    def predict_final_table(self, n_runs = 1000, seed = None):
+        '''Chances of every team of winning the division, being promoted or being relegated
+
+        The matches left in the season are simulated n_runs times by the batch
+        engine, starting from the current league stats.
+
+        Args:
+            n_runs (int): number of simulated seasons
+            seed (int): seed of the runs
 
-        return matches
+        Returns:
+            dict: {team: {'Title': float, 'Promotion': float, 'Relegation': float, 'Positions': list}},
+                or None if numpy is not installed
+        '''
+        if not batch.available() or not self.teams:
+            return None
+
+        teams = self.ordered_table_by_position()
+        matches = [match for week in self.matches for match in week if not match.finished and None not in match.teams]
+        positions = batch.predict_positions(teams, matches, n_runs, batch.new_rng(seed))
+
+        promoted_and_demoted = constants.COMPETITION['PROMOTED AND DEMOTED']
+        chances = {}
+        for team, probabilities in zip(teams, positions):
+            chances[team] = {
+                'Title': probabilities[0],
+                'Promotion': sum(probabilities[:promoted_and_demoted]) if self.level > 0 else 0.0,
+                'Relegation': sum(probabilities[-promoted_and_demoted:]),
+                'Positions': probabilities,
+            }
+        return chances
+
+    # FIXTURES
+    def index_fixtures(self):
+        '''Indexes the matches of the season by team and week'''
+        fixtures = {}
+        for week, matches in enumerate(self.matches):
+            for match in matches:
+                for side, team in enumerate(match.teams):
+                    if team not in fixtures:
+                        fixtures[team] = [None] * len(self.matches)
+                    fixtures[team][week] = (match, side == 0)
+        self._fixtures = fixtures
+        self._fixtures_matches = self.matches
+
+    def fixtures(self, team):
+        '''Fixtures of a team in the season
+
+        Returns:
+            list: (Match, bool: True if the team plays at home) for each week, None in weeks without a match
+        '''
+        if self._fixtures_matches is not self.matches:
+            # Built again after loading a save
+            self.index_fixtures()
+        return self._fixtures.get(team, [None] * len(self.matches))
+
+    def fixture(self, team, week):
+        fixtures = self.fixtures(team)
+        if week < len(fixtures):
+            return fixtures[week]
+        return None
+
+    def resolved_matches(self, week):
+        '''Matches of a week, with the deferred weeks played'''
+        self.resolve()
+        return self.matches[week]
+
+    def team_matches(self, team):
+        return [fixture[0] for fixture in self.fixtures(team) if fixture]
 
     def average_skill(self):
         total_skill = 0
@@ -191,31 +315,46 @@ class Division(object):
             total_skill += team.average_skill()
         return total_skill / float(len(self.teams))
 
-    def next_week(self, week):
+    def weekly_results(self, week, current = True):
+        '''Gives the teams the prize money and fan happiness of the results of a week
+
+        Args:
+            current (bool): False for a week whose weekly finances and news were
+                already replaced by the next_week of a later week, so only the
+                money, the yearly finances and the fan happiness change
+        '''
         def _weekly_give_money_to_teams(week):
             money_per_result = self.money_per_result()
             for match in self.matches[week]:
                 if match.winner() is not None:
-                    match.winner().change_finances('Prize Money', money_per_result['Win'])
+                    match.winner().change_finances('Prize Money', money_per_result['Win'], weekly = current)
                 else:
                     for team in match.teams:
-                        team.change_finances('Prize Money', money_per_result['Draw'])
+                        team.change_finances('Prize Money', money_per_result['Draw'], weekly = current)
 
         def _weekly_change_fan_happiness(week):
             for match in self.matches[week]:
                 if match.winner() is not None:
-                    match.winner().fan_happiness_change_with_result(3)
-                    match.loser().fan_happiness_change_with_result(0)
+                    match.winner().fan_happiness_change_with_result(3, news = current)
+                    match.loser().fan_happiness_change_with_result(0, news = current)
                 else:
                     for team in match.teams:
-                        team.fan_happiness_change_with_result(1)
+                        team.fan_happiness_change_with_result(1, news = current)
+
+        _weekly_give_money_to_teams(week)
+        _weekly_change_fan_happiness(week)
 
+    def next_week(self, week, seed = None):
         if self.playable:
             for team in self.teams:
-                team.next_week()
+                team.next_week(seed = helpers.derive_seed(seed, 'team', team.name))
 
-            _weekly_give_money_to_teams(week)
-            _weekly_change_fan_happiness(week)
+            deferred = [entry for entry in self.deferred or [] if entry[0] == week]
+            if deferred:
+                # The results are given when the week is resolved
+                deferred[0][1] = True
+            else:
+                self.weekly_results(week)
 
     def print_weekly_matches(self, week):
         for match in self.matches[week]:
@@ -228,22 +367,85 @@ class Division(object):
         for pos, team in enumerate(self.teams):
             print(str(pos + 1) + '. ' + str(team.name) + '\t' + str(team.league_points()) + '\t' + str(team.league_stats['Wins']) + '\t' + str(team.league_stats['Draws']) + '\t' + str(team.league_stats['Losses']) + '\t' + str(team.league_stats['Goals For']) + '\t' + str(team.league_stats['Goals Against']) + '\t' + str(team.league_stats['Goals For'] - team.league_stats['Goals Against']) + '\t' + str(team.avg_skill))
 
+    # STANDINGS
+    def standings(self):
+        '''Standings of the teams, built again when the teams list was replaced'''
+        self.resolve()
+        if self._standings is None or not self._standings.valid_for(self.teams):
+            self._standings = Standings(self.teams)
+        return self._standings
+
+    def update_standings(self, team):
+        standings = self._standings
+        if standings is not None and standings.valid_for(self.teams) and team in standings.positions:
+            standings.update(team)
+
+    def reset_standings(self):
+        '''Needed when the teams list is reordered in place, or league stats are replaced'''
+        self._standings = None
+
     def order_table_by_position(self):
-        self.teams.sort(key=lambda x: (x.league_points(), x.goal_difference(), x.league_stats['Wins'], x.league_stats['Goals For'], -x.league_stats['Losses']), reverse = True)
+        standings = self.standings()
+        self.teams[:] = standings.table
+        standings.commit()
 
     def ordered_table_by_position(self):
-        return sorted(self.teams, key=lambda x: (x.league_points(), x.goal_difference(), x.league_stats['Wins'], x.league_stats['Goals For'], -x.league_stats['Losses']), reverse = True)
+        return list(self.standings().table)
 
     def order_table_by_name(self):
         self.teams.sort(key=attrgetter('name'))
+        self.reset_standings()
+
+    def weekly_ai_matches(self, week):
+        '''Matches of the week that can be simulated by the batch engine'''
+        return [match for match in self.matches[week] if batch.can_batch(match)]
+
+    def simulate_weekly_human_matches(self, week, ai_matches):
+        for match in self.matches[week]:
+            if not match.finished and match not in ai_matches:
+                match.simulate()
 
     def simulate_weekly_matches(self, week):
         if self.playable:
-            for match in self.matches[week]:
-                if not match.finished:
-                    match.simulate()
+            ai_matches = self.weekly_ai_matches(week)
+            self.simulate_weekly_human_matches(week, ai_matches)
+            batch.simulate_matches(ai_matches)
+
+    def defer_weekly_matches(self, week):
+        '''Leaves the matches of a week to be played when the division is looked at
+
+        Used for divisions without human teams, whose results are only needed
+        for their table and at the end of the season. resolve gives the results
+        simulate_weekly_matches would have given (see Match.rng).
+        '''
+        if self.playable:
+            self.deferred = (self.deferred or []) + [[week, False]]
+
+    def resolve(self):
+        '''Plays the deferred weeks, in order, and gives the teams the results of the ended ones
 
-    def __init__(self, name, level, teams = None, matches = None, playable = True):
+        Called before the table of the division is looked at. The AI matches of
+        every deferred week are simulated at once by the batch engine.
+        '''
+        if not self.deferred:
+            return
+        deferred, self.deferred = self.deferred, None
+
+        ai_matches = []
+        for week, ended in deferred:
+            weekly = self.weekly_ai_matches(week)
+            self.simulate_weekly_human_matches(week, weekly)
+            ai_matches.extend(weekly)
+        batch.simulate_matches(ai_matches)
+
+        # Weeks that have not ended yet get their results from next_week. The
+        # weekly finances and news of the teams are those of the last ended week,
+        # as if every week had been played on time
+        ended = [week for week, week_ended in deferred if week_ended]
+        for week in ended:
+            self.weekly_results(week, current = week == ended[-1])
+
+    def __init__(self, name, level, teams = None, matches = None, playable = True, deferred = None):
         self.name = name
 
         self.level = level
@@ -257,3 +459,5 @@ class Division(object):
         self.matches = matches
 
         self.playable = playable
+
+        self.deferred = deferred
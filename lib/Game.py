@@ -2,12 +2,14 @@
 from . import constants
 from . import helpers
 import random
-import pickle
 from .Player import Player
-from .Team import Team
+from .PlayerRegistry import PlayerRegistry
+from .Team import Team, random_tactic
 from .Division import Division
 from operator import attrgetter
 from . import db
+from . import parallel
+from . import savefile
 from .Manager import Manager
 
 class Game(object):
@@ -19,7 +21,8 @@ class Game(object):
 
     # START OF GAME
     def start(self, human_team = None, manager = None):
-        all_teams = db.TEAMS
+        rng = helpers.new_rng(self.seed_for('start'))
+        all_teams = list(db.TEAMS)
         if human_team:
             if human_team['prev_div'] and human_team['prev_pos']:
                 human_team_index = (human_team['prev_div'] - 1) * constants.COMPETITION['TEAMS PER DIVISION'] + human_team['prev_pos'] - 1
@@ -37,9 +40,9 @@ class Game(object):
             teams = []
             for team_id in range(teams_in_division):
                 name = all_teams[division_id * constants.COMPETITION['TEAMS PER DIVISION'] + team_id]['name']
-                country = db.TEAMS[division_id * constants.COMPETITION['TEAMS PER DIVISION'] + team_id]['country']
-                color = db.TEAMS[division_id * constants.COMPETITION['TEAMS PER DIVISION'] + team_id]['color']
-                team = Team(name = name, country = country, color = color, avg_skill = self.team_skill_per_division(division_id + 1, team_id + 1), division = new_division)
+                country = all_teams[division_id * constants.COMPETITION['TEAMS PER DIVISION'] + team_id]['country']
+                color = all_teams[division_id * constants.COMPETITION['TEAMS PER DIVISION'] + team_id]['color']
+                team = Team(name = name, country = country, color = color, avg_skill = self.team_skill_per_division(division_id + 1, team_id + 1), division = new_division, tactic = random_tactic(rng))
                 teams.append(team)
 
                 if human_team:
@@ -53,18 +56,18 @@ class Game(object):
             self.divisions.append(new_division)
 
         if human_team:
-            self.create_human_team(h_team, prev_div, prev_pos, manager)
+            self.create_human_team(h_team, prev_div, prev_pos, manager, rng)
+
+        self.player_registry()
 
     def save(self, folder):
-        f = open('{}/{}.sfm'.format(folder, self.name), 'wb')
-        pickle.dump(self.__dict__, f)
-        f.close()
+        savefile.save('{}/{}.sfm'.format(folder, self.name), self.__dict__)
 
     # HUMAN TEAM
-    def create_human_team(self, human_team, prev_div, prev_pos, manager):
+    def create_human_team(self, human_team, prev_div, prev_pos, manager, rng = random):
         human_team.human = True
-        positions = constants.TEAM["STARTING_AMOUNT_OF_PLAYERS_PER_POS"]
-        positions[random.randint(1, 2)] -= 1
+        positions = list(constants.TEAM["STARTING_AMOUNT_OF_PLAYERS_PER_POS"])
+        positions[rng.randint(1, 2)] -= 1
 
         # Create players for human team
         for position, amount in enumerate(positions):
@@ -75,20 +78,20 @@ class Game(object):
                 else:
                     min_skill = int(helpers.min_max(human_team.avg_skill - 3, 1, 20))
                     max_skill = int(helpers.min_max(human_team.avg_skill - 1, 1, 20))
-                skill = random.randint(min_skill, max_skill)
+                skill = rng.randint(min_skill, max_skill)
 
                 same_country = 0.55 + 0.125 * prev_div
                 country = None
-                if random.random() <= same_country:
+                if rng.random() <= same_country:
                     country = human_team.country
 
-                human_team.players.append(Player(skill = skill, position = position, country = country, team = human_team))
+                human_team.players.append(Player(skill = skill, position = position, country = country, team = human_team, rng = rng))
 
         human_team.weekly_sponsorship = human_team.division.sponsorship_per_end_of_season_position(pos = min(max(prev_pos, 4), 13)) #min(max) to prevent small money in beginning
         human_team.change_finances("Sponsors", human_team.weekly_sponsorship)
         human_team.change_finances("Prize Money", human_team.division.money_per_end_of_season_position(pos = min(max(prev_pos, 4), 13))) #min(max) to prevent small money in beginning
         human_team.set_playing_tactic()
-        human_team.set_transfer_list()
+        human_team.expire_transfer_list()
         human_team.order_players_by_playing_status()
         human_manager = Manager(name = manager['name'], team = human_team, human = True)
         human_manager.update_stats()
@@ -96,8 +99,8 @@ class Game(object):
         self.human_teams.append(human_team)
         self.managers.append(human_manager)
 
-    def _create_ai_team(self, team, prev_div, prev_pos):
-        positions = constants.TEAM["STARTING_AMOUNT_OF_PLAYERS_PER_POS"]
+    def _create_ai_team(self, team, prev_div, prev_pos, rng = random):
+        positions = list(constants.TEAM["STARTING_AMOUNT_OF_PLAYERS_PER_POS"])
         team.players = []
 
         # Create players for human team
@@ -106,15 +109,14 @@ class Game(object):
                 min_skill = int(helpers.min_max(team.avg_skill - 1, 1, 20))
                 max_skill = int(helpers.min_max(team.avg_skill + 1, 1, 20))
 
-                skill = random.randint(min_skill, max_skill)
+                skill = rng.randint(min_skill, max_skill)
 
-                team.players.append(Player(skill = skill, position = position, country = team.country, team = team))
+                team.players.append(Player(skill = skill, position = position, country = team.country, team = team, rng = rng))
 
         team.weekly_sponsorship = team.division.sponsorship_per_end_of_season_position(pos = prev_pos)
         team.change_finances("Sponsors", team.weekly_sponsorship)
         team.change_finances("Prize Money", team.division.money_per_end_of_season_position(pos = prev_pos))
         team.set_playing_tactic()
-        team.set_transfer_list()
         team.order_players_by_playing_status()
 
     # START OF SEASON
@@ -122,7 +124,7 @@ class Game(object):
         self.season += 1
         self.week = 0
         for div in self.divisions:
-            div.start_of_season()
+            div.start_of_season(seed = self.seed_for('season', self.season, div.level))
 
         for man in self.managers:
             man.new_season()
@@ -183,7 +185,7 @@ class Game(object):
                 return True
 
         for div in self.divisions:
-            div.end_of_season()
+            div.end_of_season(seed = self.seed_for('end of season', self.season, div.level))
         self.order_divisions_by_level()
         _update_team_skills()
         _promotions_and_demotions()
@@ -200,12 +202,12 @@ class Game(object):
         def _is_game_over():
             if human_team.fan_happiness < constants.TEAM_GOALS['MIN_FAN_HAPPINESS_FOR_FIRING']:
                 prob = 1 - helpers.value01(constants.TEAM_GOALS['MIN_FAN_HAPPINESS_FOR_FIRING'], constants.TEAM_GOALS["MIN_FAN_HAPPINESS"], constants.TEAM_GOALS["MAX_FAN_HAPPINESS"])
-                if random.uniform(0, 1) <= prob:
+                if helpers.new_rng(self.seed_for('week', self.season, self.week, 'firing')).uniform(0, 1) <= prob:
                     return True
                 return False
 
         for division in self.divisions:
-            division.next_week(week = self.week)
+            division.next_week(week = self.week, seed = self.seed_for('week', self.season, self.week, division.level))
         self.week += 1
 
         if len(self.human_teams) > 0:
@@ -217,9 +219,120 @@ class Game(object):
         for manager in self.managers:
             manager.update_stats()
 
+    def viewed_divisions(self):
+        '''Divisions of the human teams, whose matches are played every week'''
+        return [div for div in self.divisions if any(team.human for team in div.teams)]
+
     def simulate_weekly_matches(self):
+        '''Simulates the matches of the week in the divisions of the human teams
+
+        The matches of the other divisions are deferred (see
+        Division.defer_weekly_matches) and played in bulk when their table is
+        looked at or at the end of the season, with the same seeds and results.
+        '''
+        viewed = self.viewed_divisions()
         for division in self.divisions:
-            division.simulate_weekly_matches(week = self.week)
+            if division in viewed:
+                division.simulate_weekly_matches(week = self.week)
+            else:
+                division.defer_weekly_matches(week = self.week)
+
+    def resolve_divisions(self, processes = None):
+        '''Plays the deferred weeks of every division, see Division.resolve
+
+        Args:
+            processes (int): if given, divisions with at least parallel.MIN_WEEKS
+                deferred weeks are resolved in that many worker processes
+        '''
+        if processes:
+            parallel.resolve(self.divisions, processes)
+        for division in self.divisions:
+            division.resolve()
+
+    def fast_forward(self, weeks = None, seasons = None, processes = None, report = None, report_weeks = True):
+        '''Plays the game without any interface until a number of weeks or seasons have passed
+
+        Without weeks or seasons the current season is played until its end. A
+        season ends with end_of_season followed by start_of_season. The human
+        team, if any, plays with the lineup chosen by set_playing_tactic.
+
+        Args:
+            weeks (int): number of weeks to play
+            seasons (int): number of seasons to finish
+            processes (int): worker processes for resolve_divisions. A weekly
+                report resolves every division each week, so the workers only
+                get divisions to play when the weeks are not reported
+            report (callable): called with a compact dict after every week and every season
+            report_weeks (bool): False to only report the seasons
+
+        Returns:
+            int: number of weeks played
+        '''
+        def _week_report():
+            self.resolve_divisions(processes)
+            return {
+                'season': self.season,
+                'week': self.week + 1,
+                'results': {div.name: [[m.teams[0].name, m.score[0], m.score[1], m.teams[1].name] for m in div.resolved_matches(self.week)] for div in self.divisions if div.playable},
+            }
+
+        def _season_report():
+            return {
+                'season': self.season,
+                'tables': {div.name: [[t.name, t.league_points(), t.goal_difference()] for t in div.ordered_table_by_position()] for div in self.divisions if div.playable},
+            }
+
+        if weeks is None and seasons is None:
+            seasons = 1
+
+        weeks_played = 0
+        seasons_played = 0
+        while not self.ended:
+            if weeks is not None and weeks_played >= weeks:
+                break
+            if seasons is not None and seasons_played >= seasons:
+                break
+
+            if self.is_season_over():
+                self.resolve_divisions(processes)
+                if report:
+                    report(_season_report())
+                self.end_of_season()
+                if not self.ended:
+                    self.start_of_season()
+                seasons_played += 1
+            else:
+                self.simulate_weekly_matches()
+                if report and report_weeks:
+                    report(_week_report())
+                self.next_week()
+                weeks_played += 1
+
+        return weeks_played
+
+    # RANDOMNESS
+    def seed_for(self, *keys):
+        '''Seed of a part of the career, derived from the seed of the career
+
+        Every random draw of the career comes from a stream seeded this way:
+        divisions and teams get a stream per season and per week, and matches
+        get one when their season is scheduled. Games with the same seed play
+        the same career, whatever the order, the process or the engine.
+
+        Args:
+            keys: names and numbers of the part, e.g. ('week', season, week, division level)
+        '''
+        return helpers.derive_seed(self.seed, *keys)
+
+    # PLAYERS
+    def player_registry(self):
+        '''Index of the players of the career by id, built again after loading a save'''
+        if self.registry is None:
+            self.registry = PlayerRegistry([team for div in self.divisions for team in div.teams], last_id = self.last_player_id)
+        return self.registry
+
+    def player(self, player_id):
+        return self.player_registry().get(player_id)
 
     # DIVISIONS
     def order_divisions_by_level(self):
@@ -229,7 +342,7 @@ class Game(object):
     def year(self):
         return constants.GAME['STARTING YEAR'] + self.season - 1
 
-    def __init__(self, name = None, week = None, season = None, divisions = None, human_teams = None, managers = None, career = None, last_screen = None, ended = False):
+    def __init__(self, name = None, week = None, season = None, divisions = None, human_teams = None, managers = None, career = None, last_screen = None, ended = False, seed = None):
         self.name = name
 
         if week is None:
@@ -257,3 +370,12 @@ class Game(object):
         self.last_screen = last_screen
 
         self.ended = ended
+
+        if seed is None:
+            seed = helpers.new_seed()
+        self.seed = seed
+
+        # Last player id given when the career was saved, see savefile._Writer.encode
+        self.last_player_id = 0
+
+        self.registry = None
@@ -1,12 +1,28 @@
 # coding: latin1
 from . import constants
 from . import helpers
-import random
+from . import match_model
 import operator
-from .Player import Player
+
+
+# Minutes of possession_log kept in each of its numbers
+_LOG_BITS = 30
 
 
 class Match(object):
+    # Matches of saves older than seeds draw from the random module
+    seed = None
+    _rng = None
+    _event_rng = None
+    # Matches of saves older than possession logs cannot be replayed
+    possession_log = None
+    # Nor the injuries and substitutions of saves older than their logs
+    injury_log = None
+    substitution_log = None
+    injured_player_id = None
+    # OutcomeTable of win_probabilities and the lineups and tactics it is for
+    _outcomes = None
+    _outcomes_key = None
 
     def __str__(self):
         minutes = str(self.minutes) + "'" + '\t' + self.teams[0].name + '\t ' + str(self.score[0]) + ' x ' + str(self.score[1]) + '\t' + self.teams[1].name
@@ -23,12 +39,52 @@ class Match(object):
             spacing = '\t'
             if goalscorer['team'] == self.teams[1]:
                 spacing = '\t\t\t   '
-            goalscorers += spacing + goalscorer['player'].name + '\t' + str(goalscorer['minute']) + "'\n"
+            goalscorers += spacing + self.goalscorer_name(goalscorer) + '\t' + str(goalscorer['minute']) + "'\n"
 
         end = '----------'
 
         return minutes + '\n' + possession + '\n' + last_5 + '\n' + goalscorers + '\n' + end
 
+    def rng(self):
+        '''Random stream of the minutes of the match, the same whoever plays the match
+
+        Every match draws from its own streams, this one and event_rng, seeded
+        when its season is scheduled. Its result does not depend on when or
+        where it is played: Match.minute, the batch engine with or without numpy,
+        a deferred division resolved later or in a worker process all give the
+        same result. Every minute draws two numbers from this stream, one for
+        the ball and one for the goal, so the batch engine can draw all the
+        minutes of a match at once (see batch.draw_minutes). A match saved while
+        it is played keeps the state of its streams in the save.
+        '''
+        if self._rng is None:
+            self._rng = helpers.new_rng(self.seed)
+        return self._rng
+
+    def event_rng(self):
+        '''Random stream of the scorers and injuries of the match'''
+        if self._event_rng is None:
+            self._event_rng = helpers.new_rng(helpers.derive_seed(self.seed, 'events'))
+        return self._event_rng
+
+    def win_probabilities(self):
+        '''Probabilities of (home win, draw, away win) from the current minute, score and lineups
+
+        The table of the match is only built again when a lineup, a tactic or
+        the skill of a team changes, so a minute of the match looks it up.
+        '''
+        if self.finished:
+            difference = self.score[0] - self.score[1]
+            return [float(difference > 0), float(difference == 0), float(difference < 0)]
+        if self.teams[0] is None or self.teams[1] is None:
+            return None
+
+        key = tuple(team.lineup() if team.human else (team.avg_skill, tuple(team.tactic)) for team in self.teams)
+        if self._outcomes is None or self._outcomes_key != key or self._outcomes.start > self.minutes:
+            self._outcomes = match_model.OutcomeTable(match_model.minute_probabilities(self), self.minutes)
+            self._outcomes_key = key
+        return self._outcomes.probabilities(self.minutes, self.score[0] - self.score[1])
+
     def allow_substitution(self, team):
         if team == self.teams[0]:
             if self.substitutions[0] < 3 and self.minutes > 0:
@@ -38,11 +94,20 @@ class Match(object):
                 return True
         return False
 
-    def substitution_made_by_team(self, team):
+    def substitution_made_by_team(self, team, player_out = None, player_in = None):
+        '''Counts a substitution of team and records it in substitution_log
+
+        Args:
+            team (Team): team that made the substitution
+            player_out (Player): player who left the pitch
+            player_in (Player): player who came on
+        '''
         if team == self.teams[0]:
             self.substitutions[0] += 1
         else:
             self.substitutions[1] += 1
+        if self.substitution_log is not None:
+            self.substitution_log.extend((self.minutes, player_out.id if player_out is not None else None, player_in.id if player_in is not None else None))
 
     def print_result(self):
         if self.finished:
@@ -78,37 +143,120 @@ class Match(object):
         return False
 
     def choose_goal_scorer(self, team_id):
-        choices = []
-
-        if self.teams[team_id].human:
-            tits = [p for p in self.teams[team_id].players if p.playing_status == 0]
-            for player in tits:
-                probability = constants.MATCH['GOAL PROB PER POSITION'][player.position]
-                choices.append((player, probability))
-
-            return helpers.weighted_choice(choices)
+        '''Player who scored a goal of a human team, or index of the phantom scorer of an AI team'''
+        team = self.teams[team_id]
+        if team.human:
+            return team.lineup().scorers.choice(self.event_rng())
         else:
-            players = [p['player'] for p in self.goalscorers if p['team'] == self.teams[team_id]]
-            if players is None:
-                players = []
-
-            for player in players:
-                probability = 0.25
-                choices.append((player, probability))
-
-            for i in range(len(players) + 1):
-                new_player = Player(country = self.teams[team_id].country, skill = 0)
-                choices.append((new_player, 0.25))
-
-            return helpers.weighted_choice(choices)
+            scorers = [g['scorer'] for g in self.goalscorers if g['team'] == team and g.get('scorer') is not None]
+            # Each goal of the match makes its scorer as likely to score again as a new scorer
+            rng = self.event_rng()
+            if rng.uniform(0, 2 * len(scorers) + 1) < len(scorers):
+                return rng.choice(scorers)
+            return team.phantom_scorers().choice(rng)
 
     def goal(self, team_id):
+        '''Scores a goal for a team
+
+        The scorer of a goal is the id of a player of a human team, or the index
+        of a phantom scorer of an AI team (see Team.phantom_scorers). Goals of
+        human teams also keep the Player until the match is compacted.
+        '''
         self.score[team_id] += 1
         goalscorer = self.choose_goal_scorer(team_id)
-        self.goalscorers.append({'player' : goalscorer, 'team' : self.teams[team_id], 'minute' : self.minutes})
+        if self.teams[team_id].human:
+            scorer = goalscorer.id if goalscorer is not None else None
+            self.goalscorers.append({'player' : goalscorer, 'scorer' : scorer, 'team' : self.teams[team_id], 'minute' : self.minutes})
+        else:
+            self.goalscorers.append({'player' : None, 'scorer' : goalscorer, 'team' : self.teams[team_id], 'minute' : self.minutes})
+
+    def goalscorer_name(self, goal):
+        '''Name of the player who scored a goal of self.goalscorers'''
+        if goal.get('player') is not None:
+            return goal['player'].name
+        if goal.get('name') is not None:
+            return goal['name']
+        return goal['team'].scorer_name(goal['scorer'])
+
+    # RECORD
+    def log_possession(self, minute, possession):
+        '''Records the team that had the ball on a minute, one bit per minute'''
+        if possession and self.possession_log is not None:
+            self.possession_log[(minute - 1) // _LOG_BITS] |= 1 << ((minute - 1) % _LOG_BITS)
+
+    def logged_possession(self, minute):
+        return (self.possession_log[(minute - 1) // _LOG_BITS] >> ((minute - 1) % _LOG_BITS)) & 1
+
+    def logged_injuries(self):
+        '''(minute, player id) of every injury of the match'''
+        log = self.injury_log or []
+        return list(zip(log[0::2], log[1::2]))
+
+    def logged_substitutions(self):
+        '''(minute, player out id, player in id) of every substitution of the match'''
+        log = self.substitution_log or []
+        return list(zip(log[0::3], log[1::3], log[2::3]))
+
+    def compact(self):
+        '''Drops what only a match that is being played needs
+
+        A finished match keeps its seed, its score, its possession log, its goals
+        and the logs of its injuries and substitutions, with the ids of the
+        players instead of the Player, so sold and retired players are not kept
+        alive by the matches of the season. replay rebuilds the minute by minute
+        view from that record, and playing the teams again with the seed and the
+        logged substitutions gives the same match.
+
+        An injury can end a match on its minute, and the interfaces report it
+        after the match has ended, so injured_player_id is kept.
+        '''
+        for goal in self.goalscorers:
+            if goal.get('player') is not None:
+                goal['name'] = goal['player'].name
+                goal['player'] = None
+        self.injured_player_out = None
+        # The random streams are drawn again from the seed
+        self._rng = None
+        self._event_rng = None
+        self._outcomes = None
+        self._outcomes_key = None
+        if self.possession_log is not None:
+            self.possession_last_5_minutes = []
+
+    def replay(self):
+        '''Minute by minute view of a finished match, rebuilt from its record
+
+        Returns:
+            list: for each minute, a dict with the 'minute', the team that had the
+                ball ('possession', 0 or 1), the 'score' after the minute, the
+                'goals' scored on the minute, the ids of the players 'injured' on
+                the minute and its 'substitutions' as (player out id, player in
+                id), or None for matches of older saves
+        '''
+        if self.possession_log is None:
+            return None
+        goals = {}
+        for goal in self.goalscorers:
+            goals.setdefault(goal['minute'], []).append(goal)
+        injuries = {}
+        for minute, player_id in self.logged_injuries():
+            injuries.setdefault(minute, []).append(player_id)
+        substitutions = {}
+        for minute, player_out, player_in in self.logged_substitutions():
+            substitutions.setdefault(minute, []).append((player_out, player_in))
+
+        minutes = []
+        score = [0, 0]
+        for minute in range(1, self.minutes + 1):
+            scored = goals.get(minute, [])
+            for goal in scored:
+                score[self.teams.index(goal['team'])] += 1
+            minutes.append({'minute': minute, 'possession': self.logged_possession(minute), 'score': list(score), 'goals': scored, 'injured': injuries.get(minute, []), 'substitutions': substitutions.get(minute, [])})
+        return minutes
 
     def minute(self):
         self.injured_player_out = None
+        self.injured_player_id = None
 
         if self.teams[0] is None:
             self.end()
@@ -122,12 +270,14 @@ class Match(object):
             self.end()
             return False
 
+        if self.minutes == 0:
+            for team in self.teams:
+                team.invalidate_lineup()
+
         self.minutes += 1
-        
+
         for team in self.teams:
-            for player in team.players:
-                if player.playing_status == 0:
-                    player.match_minutes += 1
+            team.lineup().tick(self.minutes)
         team_0_skills = self.teams[0].tactical_skill(match = True, minutes = self.minutes)
         team_1_skills = self.teams[1].tactical_skill(match = True, minutes = self.minutes)
 
@@ -140,7 +290,8 @@ class Match(object):
         # Probability of team 0 having possession
         team_0_attack_prob = helpers.min_max(helpers.balance(team_0_possession, team_1_possession), 1 - constants.MATCH['MAX_POSS'], constants.MATCH['MAX_POSS'])
 
-        if random.random() <= team_0_attack_prob:
+        rng = self.rng()
+        if rng.random() <= team_0_attack_prob:
             # attack team 0
             possession = 0
             SKILL_BAL = helpers.balance(team_0_skills[2], team_1_skills[0])
@@ -151,33 +302,36 @@ class Match(object):
         
         goal_prob = helpers.min_max(SKILL_BAL, constants.MATCH['MIN_SKILL_BALANCE'], 1) * constants.MATCH['MAX_GOAL_PROB_PER_POSS']
 
-        if random.random() <= goal_prob:
+        if rng.random() <= goal_prob:
             self.goal(team_id = possession)
         else:
             for team in self.teams:
                 if team.human:
-                    if random.random() <= constants.MATCH['INJURY_PROBABILITY_PER_MINUTE'] * (self.minutes / 90):
+                    if self.event_rng().random() <= constants.MATCH['INJURY_PROBABILITY_PER_MINUTE'] * (self.minutes / 90):
                         self.injured_player_out = self.player_injured(team)
                         if self.injured_player_out is not None:
-                            self.injured_player_out.set_injury()                        
+                            self.injured_player_id = self.injured_player_out.id
+                            if self.injury_log is not None:
+                                self.injury_log.extend((self.minutes, self.injured_player_id))
+                            self.injured_player_out.set_injury(self.event_rng())
+                            team.invalidate_lineup()
 
         if self.teams[0].human:
-            tits = [p for p in self.teams[0].players if p.playing_status == 0]
-            if len(tits) < constants.MATCH['MINIMUM_PLAYERS']:
+            if len(self.teams[0].lineup().starters) < constants.MATCH['MINIMUM_PLAYERS']:
                 self.score[0] = 0
                 self.score[1] = max(3, self.score[1])
                 self.end()
                 return False
 
         if self.teams[1].human:
-            tits = [p for p in self.teams[1].players if p.playing_status == 0]
-            if len(tits) < constants.MATCH['MINIMUM_PLAYERS']:
+            if len(self.teams[1].lineup().starters) < constants.MATCH['MINIMUM_PLAYERS']:
                 self.score[1] = 0
                 self.score[0] = max(3, self.score[1])
                 self.end()
                 return False
 
         self.possession[possession] += 1
+        self.log_possession(self.minutes, possession)
         self.possession_last_5_minutes.append(possession)
         if len(self.possession_last_5_minutes) > 5:
             self.possession_last_5_minutes.pop(0)
@@ -198,8 +352,11 @@ class Match(object):
             return [50, 50]
 
     def ball_possession_last_5_minutes(self):
-        if len(self.possession_last_5_minutes) > 0:
-            poss1 = int(sum(self.possession_last_5_minutes) * (100 / float(len(self.possession_last_5_minutes))))
+        last_5_minutes = self.possession_last_5_minutes
+        if not last_5_minutes and self.finished and self.possession_log is not None:
+            last_5_minutes = [self.logged_possession(minute) for minute in range(max(self.minutes - 4, 1), self.minutes + 1)]
+        if len(last_5_minutes) > 0:
+            poss1 = int(sum(last_5_minutes) * (100 / float(len(last_5_minutes))))
             poss0 = 100 - poss1
             if poss0 >= 80:
                 poss0 = 80
@@ -215,21 +372,15 @@ class Match(object):
         if not self.finished:
             self.teams[0].update_stats_post_match(self.score[0], self.score[1])
             self.teams[1].update_stats_post_match(self.score[1], self.score[0])
+            for team in self.teams:
+                team.invalidate_lineup()
             self.minutes = 90
             self.finished = True
+            self.compact()
 
     def player_injured(self, team):
-        choices = []
-
         if team.human:
-            tits = [p for p in team.players if p.playing_status == 0]
-            for player in tits:
-                if player.position == 0:
-                    probability = constants.PLAYER['INJURY_PROB_GK']
-                else:
-                    probability = constants.PLAYER['INJURY_PROB_NOT_GK']
-                choices.append((player, probability))
-            return helpers.weighted_choice(choices)
+            return team.lineup().injuries.choice(self.event_rng())
         else:
             return None
 
@@ -249,7 +400,7 @@ class Match(object):
         else:
             return None
 
-    def __init__(self, teams, minutes = None, score = None, possession = None, possession_last_5_minutes = None, tactical_changes = None, finished = False, substitutions = None, goalscorers = None, injured_player_out = None, is_neutral_field = False):
+    def __init__(self, teams, minutes = None, score = None, possession = None, possession_last_5_minutes = None, tactical_changes = None, finished = False, substitutions = None, goalscorers = None, injured_player_out = None, is_neutral_field = False, seed = None, possession_log = None, injury_log = None, substitution_log = None, injured_player_id = None):
         self.teams = teams
 
         if minutes is None:
@@ -284,4 +435,24 @@ class Match(object):
 
         self.injured_player_out = injured_player_out
 
+        if injured_player_id is None and injured_player_out is not None:
+            injured_player_id = injured_player_out.id
+        self.injured_player_id = injured_player_id
+
         self.is_neutral_field = is_neutral_field
+
+        self.seed = seed
+
+        if possession_log is None:
+            possession_log = [0] * ((90 + _LOG_BITS - 1) // _LOG_BITS)
+        self.possession_log = possession_log
+
+        # Minute and player id of every injury, one after the other (see logged_injuries)
+        if injury_log is None:
+            injury_log = []
+        self.injury_log = injury_log
+
+        # Minute, player out id and player in id of every substitution (see logged_substitutions)
+        if substitution_log is None:
+            substitution_log = []
+        self.substitution_log = substitution_log
@@ -7,7 +7,84 @@ from . import db
 from .db import names as db_names
 from .News import News
 
+
+# Countries of players without one, the first countries of the database being the most common
+_COUNTRIES = helpers.WeightedSampler([(country['id'], int(pow(len(db.COUNTRIES) - i, 1.3))) for i, country in enumerate(db.COUNTRIES)])
+
+
+def random_name(country = None, rng = random):
+    '''Initial and last name of a player of the country, or of a random country'''
+    if not country:
+        country = _COUNTRIES.choice(rng)
+    return rng.choice(string.ascii_uppercase) + "." + rng.choice(db.names.LAST_NAMES[country])
+
+
+def _player_value(skill, age):
+    age01 = helpers.normalize(age, constants.PLAYER['MIN AGE'], constants.PLAYER['MAX AGE'])
+    skill01 = helpers.normalize(skill, 0, constants.PLAYER['MAX_SKILL'])
+
+    stop_potential_age01 = helpers.normalize(constants.PLAYER['RETIREMENT AGE'], constants.PLAYER['MIN AGE'], constants.PLAYER['MAX AGE'])
+    max_skill_increase01 = constants.PLAYER_TRAINING['MAXIMUM_SKILL_INCREASE']
+    potential_skill01 = (max_skill_increase01 * ((stop_potential_age01) - age01) / stop_potential_age01) * 2
+
+    base = max(skill01 * constants.PLAYER_VALUE['CURRENT_SKILL_INFLUENCE'] + potential_skill01 * constants.PLAYER_VALUE['POTENTIAL_SKILL_INFLUENCE'], 0)
+
+    power = constants.PLAYER_VALUE['DIFFERENCE_BETWEEN_SKILLS']
+    value_small = pow(base, power)
+    return helpers.int_to_money(value_small * 1000000)
+
+
+def _salary_for_skill(skill):
+    skill01 = helpers.normalize(skill, constants.PLAYER['MIN_SKILL'], constants.PLAYER['MAX_SKILL'])
+    return int(pow(2, skill01 * constants.PLAYER['SALARY_SKILL_EXPONENT']) * constants.PLAYER['MIN_SALARY'])
+
+
+# Values and salaries of every whole skill and age, computed once. Skills with
+# a homegrown bonus are not whole and are computed on every call.
+_VALUES = dict(((skill, age), _player_value(skill, age)) for skill in range(constants.PLAYER['MAX_SKILL'] + 1) for age in range(constants.PLAYER['MIN AGE'], constants.PLAYER['MAX AGE'] + 1))
+_SALARIES = dict((skill, _salary_for_skill(skill)) for skill in range(constants.PLAYER['MAX_SKILL'] + 1))
+
+
+def player_value(skill, age):
+    '''Transfer value of a player who is not injured'''
+    value = _VALUES.get((skill, age))
+    if value is None:
+        value = _player_value(skill, age)
+    return value
+
+
 class Player(object):
+    # A career has thousands of players (squads and transfer lists),
+    # so they have slots instead of a __dict__
+    __slots__ = (
+        'id', 'name', 'country', 'team', 'skill', 'training', 'weekly_training', 'age', 'position', 'playing_status', 'is_homegrown',
+        'league_stats', 'retired', 'salary', 'contract', 'wants_new_contract', 'wanted_salary', 'injury', 'match_minutes', 'sub_minutes',
+        'skill_change_last_week',
+    )
+
+    # Ids are given in creation order and saved with the career
+    last_id = 0
+
+    @classmethod
+    def new_id(cls):
+        Player.last_id += 1
+        return Player.last_id
+
+    @classmethod
+    def reserve_ids(cls, last_id):
+        '''Makes new players get ids greater than last_id'''
+        Player.last_id = max(Player.last_id, last_id)
+
+    def __getstate__(self):
+        return dict((field, getattr(self, field)) for field in self.__slots__ if hasattr(self, field))
+
+    def __setstate__(self, state):
+        '''Sets the attributes of a loaded player, ignoring attributes that players do not have anymore'''
+        self.id = None
+        for field, value in state.items():
+            if field in _FIELDS:
+                setattr(self, field, value)
+
     def __str__(self):
         pos = self.pos_to_str()
         return pos + ' ' + self.name
@@ -18,13 +95,13 @@ class Player(object):
         return ''
 
     # INJURY
-    def set_injury(self):
+    def set_injury(self, rng = random):
         ''' Sets how much time a player is injured, and its effect on training and playing status.
         '''
         def _injury_time(age):
             age_factor = helpers.normalize(age, constants.PLAYER['MIN AGE'], constants.PLAYER['MAX AGE'])
             average_injury_time_factor = 1 - (age_factor * 0.7)
-            return int(round(random.expovariate(average_injury_time_factor), 0) + 1)
+            return int(round(rng.expovariate(average_injury_time_factor), 0) + 1)
 
         def _injury_effect_on_training(injury):
             return -injury * constants.PLAYER['INJURY_TIME_EFFECT_ON_TRAINING']
@@ -98,12 +175,14 @@ class Player(object):
 
     def salary_for_skill(self):
         '''Returns the salary that corresponds with the skill the player has'''
-        skill01 = helpers.normalize(self.skill, constants.PLAYER['MIN_SKILL'], constants.PLAYER['MAX_SKILL'])
-        return int(pow(2, skill01 * constants.PLAYER['SALARY_SKILL_EXPONENT']) * constants.PLAYER['MIN_SALARY'])
+        salary = _SALARIES.get(self.skill)
+        if salary is None:
+            salary = _salary_for_skill(self.skill)
+        return salary
 
     # CONTRACT
 
-    def set_renew_contract_wanted_salary(self, asking = False):
+    def set_renew_contract_wanted_salary(self, asking = False, rng = random):
         if not self.wanted_salary:
             wanted_salary = max(self.salary, self.salary_for_skill())
             min_increase = constants.PLAYER['MIN_SALARY_INCREASE_NOT_ASKING']
@@ -111,20 +190,20 @@ class Player(object):
             if asking:
                 min_increase = constants.PLAYER['MIN_SALARY_INCREASE']
                 max_increase = constants.PLAYER['MAX_SALARY_INCREASE']
-            self.wanted_salary = helpers.int_to_money(wanted_salary * random.uniform(min_increase, max_increase))
+            self.wanted_salary = helpers.int_to_money(wanted_salary * rng.uniform(min_increase, max_increase))
 
     def renew_contract(self):
         self.salary = self.wanted_salary
         self.contract = constants.COMPETITION['TOTAL GAMES'] 
         self.wants_new_contract = False
 
-    def calculate_salary(self):
+    def calculate_salary(self, rng = random):
         increase = (0.85, 1.15)
-        salary = self.salary_for_skill() * random.uniform(increase[0], increase[1])
+        salary = self.salary_for_skill() * rng.uniform(increase[0], increase[1])
         return helpers.int_to_money(salary)
 
-    def set_weekly_training(self):
-        randomness = random.uniform(0.6, 1.5)
+    def set_weekly_training(self, rng = random):
+        randomness = rng.uniform(0.6, 1.5)
         playing_status_influence = min(constants.PLAYER_TRAINING['TRAINING_0_MINUTES_PLAYING'] + (1 - constants.PLAYER_TRAINING['TRAINING_0_MINUTES_PLAYING']) * helpers.normalize(min(self.match_minutes, constants.PLAYER_TRAINING['MIN_PLAYING_TIME_FOR_FULL_TRAINING']), 0, constants.PLAYER_TRAINING['MIN_PLAYING_TIME_FOR_FULL_TRAINING']), 1)
 
         if self.injury <= 0:
@@ -149,12 +228,12 @@ class Player(object):
     def yearly_age_increase(self):
         self.age = self.age + 1
 
-    def yearly_check_if_will_retire(self):
+    def yearly_check_if_will_retire(self, rng = random):
         if self.age >= constants.PLAYER['MAX AGE']:
             self.retired = True
             return True
         elif self.age >= constants.PLAYER['RETIREMENT AGE']:
-            if random.random() <= 0.5:
+            if rng.random() <= 0.5:
                 self.retired = True
                 return True
         return False
@@ -163,9 +242,9 @@ class Player(object):
         if self.salary_for_skill() > self.salary:
             self.salary = self.salary_for_skill()
 
-    def end_of_season(self):
+    def end_of_season(self, rng = random):
         self.yearly_age_increase()
-        self.yearly_check_if_will_retire()
+        self.yearly_check_if_will_retire(rng)
 
     def start_of_season(self):
         self.league_stats = {'Games' : 0, 'Goals' : 0}
@@ -185,45 +264,54 @@ class Player(object):
 
     def current_value(self):
         if self.injury <= 0:
-            age01 = helpers.normalize(self.age, constants.PLAYER['MIN AGE'], constants.PLAYER['MAX AGE'])
-            skill01 = helpers.normalize(self.skill, 0, constants.PLAYER['MAX_SKILL'])
-
-            stop_potential_age01 = helpers.normalize(constants.PLAYER['RETIREMENT AGE'], constants.PLAYER['MIN AGE'], constants.PLAYER['MAX AGE'])
-            max_skill_increase01 = constants.PLAYER_TRAINING['MAXIMUM_SKILL_INCREASE']
-            potential_skill01 = (max_skill_increase01 * ((stop_potential_age01) - age01) / stop_potential_age01) * 2
-
-            base = max(skill01 * constants.PLAYER_VALUE['CURRENT_SKILL_INFLUENCE'] + potential_skill01 * constants.PLAYER_VALUE['POTENTIAL_SKILL_INFLUENCE'], 0)
-
-            power = constants.PLAYER_VALUE['DIFFERENCE_BETWEEN_SKILLS']
-            value_small = pow(base, power)
-            value = helpers.int_to_money(value_small * 1000000)
+            value = player_value(self.skill, self.age)
         else:
             value = 0
         return value
 
+    def affordable_skill(self, money):
+        '''Highest skill, up to the skill of the player, at which the player is worth at most money
+
+        The value of a player grows with the skill, so the skill is found with a
+        binary search instead of lowering it one point at a time.
+
+        Returns:
+            int: the skill, or None if the player is worth more than money even with the minimum skill
+        '''
+        low, high = constants.PLAYER['MIN_SKILL'], int(self.skill)
+        if high < low or player_value(low, self.age) > money:
+            return None
+        while low < high:
+            middle = (low + high + 1) // 2
+            if player_value(middle, self.age) <= money:
+                low = middle
+            else:
+                high = middle - 1
+        return low
+
     def match_skill(self):
         if self.injury == 0:
             stamina_drop = self.match_minutes * max(constants.PLAYER['AVG AGE'], self.age) * constants.PLAYER["SKILL_DROP_PER_AGE_PER_MINUTE"] * (1 + 0.025 * (not self.team.human))
             return max(self.skill - stamina_drop, 0)
         return 0
 
-    def __init__(self, skill, country = None, team = None, training = None, weekly_training = None, name = None, age = None, salary = None, position = None, playing_status = None, league_stats = None, retired = False, contract = 0, wants_new_contract = False, weekly_stats = None, wanted_salary = None, injury = None, match_minutes = None, sub_minutes = None, is_homegrown = False, skill_change_last_week = 0):
-        def random_name(country = None):
-            if not country:
-                countries = [(country['id'], int(pow(len(db.COUNTRIES) - i, 1.3))) for i, country in enumerate(db.COUNTRIES)]
-                country = helpers.weighted_choice(countries)
-            return random.choice(string.ascii_uppercase) + "." + random.choice(db.names.LAST_NAMES[country])
-
+    def __init__(self, skill, country = None, team = None, training = None, weekly_training = None, name = None, age = None, salary = None, position = None, playing_status = None, league_stats = None, retired = False, contract = 0, wants_new_contract = False, weekly_stats = None, wanted_salary = None, injury = None, match_minutes = None, sub_minutes = None, is_homegrown = False, skill_change_last_week = 0, id = None, rng = random):
         def random_position():
-            if random.random() <= 0.09:
+            if rng.random() <= 0.09:
                 return 0
             else:
-                return random.randint(1, 3)
+                return rng.randint(1, 3)
 
         def random_age():
-            age = int(helpers.min_max(random.gauss(constants.PLAYER['AVG AGE'], constants.PLAYER['AGE STD DEV']), constants.PLAYER['MIN AGE'], constants.PLAYER['MAX AGE']))
+            age = int(helpers.min_max(rng.gauss(constants.PLAYER['AVG AGE'], constants.PLAYER['AGE STD DEV']), constants.PLAYER['MIN AGE'], constants.PLAYER['MAX AGE']))
             return age
 
+        if id is None:
+            id = Player.new_id()
+        else:
+            Player.reserve_ids(id)
+        self.id = id
+
         self.skill = skill + skill * constants.PLAYER['HOMEGROWN_BONUS'] * is_homegrown
 
         self.team = team
@@ -239,7 +327,7 @@ class Player(object):
         self.weekly_training = weekly_training
 
         if name is None:
-            name = random_name(country)
+            name = random_name(country, rng)
         self.name = name
 
         if age is None:
@@ -261,7 +349,7 @@ class Player(object):
         self.retired = retired
 
         if salary is None:
-            salary = self.calculate_salary()
+            salary = self.calculate_salary(rng)
         self.salary = salary
 
         self.contract = contract
@@ -283,3 +371,6 @@ class Player(object):
         self.sub_minutes = sub_minutes
 
         self.skill_change_last_week = skill_change_last_week
+
+
+_FIELDS = frozenset(Player.__slots__)
@@ -0,0 +1,74 @@
+# coding: latin1
+from .Player import Player
+
+
+class PlayerRegistry(object):
+    '''Index of the players of a career by their id
+
+    Every player of a squad or of a transfer list is mapped to the team whose
+    squad or transfer list has the player. Teams keep the index up to date when
+    they buy, sell, promote, retire or list players.
+    '''
+    def get(self, player_id):
+        entry = self.entries.get(int(player_id))
+        if entry is None:
+            return None
+        return entry[0]
+
+    def team(self, player_id):
+        '''Team whose squad or transfer list has the player, or None'''
+        entry = self.entries.get(int(player_id))
+        if entry is None:
+            return None
+        return entry[1]
+
+    def on_transfer_list(self, player_id):
+        entry = self.entries.get(int(player_id))
+        return entry is not None and entry[2]
+
+    def add(self, player, team, transfer_list = False):
+        self.entries[player.id] = (player, team, transfer_list)
+
+    def remove(self, player):
+        self.entries.pop(player.id, None)
+
+    def replace_transfer_list(self, team, old_players, new_players):
+        for player in old_players:
+            entry = self.entries.get(player.id)
+            if entry is not None and entry[2]:
+                del self.entries[player.id]
+        for player in new_players:
+            self.add(player, team, transfer_list = True)
+
+    def rebuild(self, teams, last_id = 0):
+        '''Indexes the players of teams, giving an id to players of saves older than ids
+
+        Args:
+            teams (list): every team of the career
+            last_id (int): last id given in the career, which sold and retired
+                players may have had (see Game.last_player_id)
+        '''
+        self.entries = {}
+        without_id = []
+        for team in teams:
+            team.registry = self
+            for transfer_list, players in ((False, team.players), (True, team.players_to_buy)):
+                for player in players:
+                    if player.id is None:
+                        without_id.append((player, team, transfer_list))
+                    else:
+                        self.add(player, team, transfer_list)
+
+        # Players created from now on get ids after the ids of this career
+        Player.reserve_ids(max([last_id] + list(self.entries)))
+        for player, team, transfer_list in without_id:
+            player.id = Player.new_id()
+            self.add(player, team, transfer_list)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __init__(self, teams = None, last_id = 0):
+        self.entries = {}
+        if teams is not None:
+            self.rebuild(teams, last_id)
@@ -2,7 +2,7 @@
 from . import constants
 from . import helpers
 import random
-from .Player import Player
+from .Player import Player, random_name
 import operator
 from .News import News, NewsList
 
@@ -33,12 +33,137 @@ class TeamFinances(object):
             sponsors = 0
         self.sponsors = sponsors
 
+class TeamLineup(object):
+    '''Starting players of a team with the parts of their skill that stay the same during a match
+
+    A player loses skill linearly with the minutes he has played, so the skill of
+    a line at a later minute is its base skill minus an analytic stamina term.
+    The lineup is only valid until a starter changes (substitutions, injuries or
+    a new tactic), and the team throws it away when that happens.
+    '''
+    def tick(self, minutes):
+        '''Adds one match minute to the starters'''
+        for player in self.starters:
+            player.match_minutes += 1
+        self.ticks += 1
+        self.minutes = minutes
+
+    def anchor(self, minutes):
+        '''Counts the elapsed minutes from match minute "minutes" on, before the first tick
+
+        Lets the skill of a lineup that has not played yet be looked up for the
+        later minutes of a match, e.g. to predict it.
+        '''
+        if self.minutes is None:
+            self.minutes = minutes
+
+    def elapsed(self, minutes):
+        '''Match minutes played by the starters since the lineup was built, at match minute "minutes"'''
+        if self.minutes is None:
+            return self.ticks
+        return self.ticks + minutes - self.minutes
+
+    def position_skill(self, pos, match, minutes):
+        if not match:
+            return self.skill[pos]
+        elapsed = self.elapsed(minutes)
+        if 0 <= elapsed <= self.exact_until:
+            return self.available_skill[pos] - self.stamina[pos] - self.stamina_per_minute[pos] * elapsed
+        return sum(max(skill - rate * (match_minutes + elapsed), 0) for skill, rate, match_minutes in self.available[pos])
+
+    def __init__(self, team):
+        self.ticks = 0
+        self.minutes = None
+
+        self.starters = [p for p in team.players if p.playing_status == 0]
+        self.bench = [p for p in team.players if p.playing_status == 1]
+
+        # Goals and injuries of human teams are drawn among the starters
+        self.scorers = helpers.WeightedSampler([(p, constants.MATCH['GOAL PROB PER POSITION'][p.position]) for p in self.starters])
+        self.injuries = helpers.WeightedSampler([(p, constants.PLAYER['INJURY_PROB_GK'] if p.position == 0 else constants.PLAYER['INJURY_PROB_NOT_GK']) for p in self.starters])
+
+        self.tactic = [0, 0, 0]
+        self.has_goalkeeper = False
+        self.skill = [0, 0, 0, 0]
+        self.experienced = [False, False, False, False]
+        self.available = [[], [], [], []]
+
+        for player in self.starters:
+            if player.position == 0:
+                self.has_goalkeeper = True
+            else:
+                self.tactic[player.position - 1] += 1
+            self.skill[player.position] += player.skill
+            if player.age >= constants.PLAYER["RETIREMENT AGE"] - 2:
+                self.experienced[player.position] = True
+            if player.injury == 0:
+                rate = max(constants.PLAYER['AVG AGE'], player.age) * constants.PLAYER["SKILL_DROP_PER_AGE_PER_MINUTE"] * (1 + 0.025 * (not team.human))
+                self.available[player.position].append((player.skill, rate, player.match_minutes))
+
+        self.available_skill = [sum(skill for skill, rate, match_minutes in players) for players in self.available]
+        self.stamina = [sum(rate * match_minutes for skill, rate, match_minutes in players) for players in self.available]
+        self.stamina_per_minute = [sum(rate for skill, rate, match_minutes in players) for players in self.available]
+
+        # Minutes until the skill of a starter reaches 0 and Player.match_skill starts clamping it
+        self.exact_until = float('inf')
+        for players in self.available:
+            for skill, rate, match_minutes in players:
+                self.exact_until = min(self.exact_until, skill / rate - match_minutes)
+
+
+# Positions of the phantom scorers of AI teams (see Team.phantom_scorers)
+_SCORER_POSITIONS = [pos for pos, amount in enumerate(constants.TEAM['STARTING_AMOUNT_OF_PLAYERS_PER_POS']) for i in range(amount) if pos != 0]
+_SCORERS = helpers.WeightedSampler([(i, constants.MATCH['GOAL PROB PER POSITION'][pos]) for i, pos in enumerate(_SCORER_POSITIONS)])
+
+
+def random_tactic(rng = random):
+    return rng.choice(2 * constants.TEAM['BASE TACTICS'] + constants.TEAM['DEF TACTICS'] + constants.TEAM['ATK TACTICS'])
+
+
 class Team(object):
+    _strength_key = None
+    _strength_table = None
+    _lineup = None
+    # PlayerRegistry of the career, set by Game
+    registry = None
+    # Names of the players who score for the team when it is not human
+    scorers = None
+    # Only human teams have transfer lists, drawn when they are first looked at
+    transfer_list_outdated = False
+    transfer_list_seed = None
+    transfer_list_budget = None
+
     def id_to_player(self, player_id):
+        if self.registry is not None:
+            if self.registry.team(player_id) is self and not self.registry.on_transfer_list(player_id):
+                return self.registry.get(player_id)
+            return None
         for player in self.players:
-            if id(player) == int(player_id):
+            if player.id == int(player_id):
                 return player
 
+    def draw_phantom_scorers(self, rng = random):
+        self.scorers = [random_name(self.country, rng) for pos in _SCORER_POSITIONS]
+
+    def phantom_scorers(self):
+        '''Goalscorer choices of a team that is not human
+
+        The squads of AI teams are not simulated player by player, so their goals
+        are scored by a pool of outfield players drawn once per season, as many per
+        position as a starting squad has.
+
+        Returns:
+            helpers.WeightedSampler: draws the index in self.scorers of a scorer
+        '''
+        if not self.scorers:
+            self.draw_phantom_scorers()
+        return _SCORERS
+
+    def scorer_name(self, scorer):
+        if not self.scorers:
+            self.draw_phantom_scorers()
+        return self.scorers[scorer]
+
     # SQUAD INFORMATION
     def are_available_players_outside_of_bench(self):
         if len([p for p in self.players if p.playing_status == 2 and p.match_available()]) > 0 and len([p for p in self.players if p.playing_status == 1]) < constants.TEAM['BENCH_PLAYERS']:
@@ -68,20 +193,24 @@ class Team(object):
 
         return skill
 
+    def lineup(self):
+        if self._lineup is None:
+            self._lineup = TeamLineup(self)
+        return self._lineup
+
+    def invalidate_lineup(self):
+        self._lineup = None
+
     def tits_total_skill(self, match = False, minutes = 0):
         total_skill = [0, 0, 0, 0]
 
         for pos in range(4):
             if self.human:
-                if match:
-                    players_in_position = [p.match_skill() for p in self.players if p.playing_status == 0 and p.position == pos]
-                else:
-                    players_in_position = [p.skill for p in self.players if p.playing_status == 0 and p.position == pos]
-                
-                total_skill[pos] += sum(players_in_position)
+                lineup = self.lineup()
+                total_skill[pos] = lineup.position_skill(pos, match, minutes)
 
-                if sum([p.age >= (constants.PLAYER["RETIREMENT AGE"] - 2) for p in self.players if p.playing_status == 0 and p.position == pos]) > 0:
-                    total_skill[pos] *= constants.TEAM["EXPERIENCED_PLAYER_BONUS"] 
+                if lineup.experienced[pos]:
+                    total_skill[pos] *= constants.TEAM["EXPERIENCED_PLAYER_BONUS"]
 
             else:
                 if pos == 0:
@@ -100,7 +229,26 @@ class Team(object):
 
         return [_tactical_skill_balance(skill[i + 1]) for i in range(3)]
 
+    def set_strength_table(self):
+        '''Precomputes the tactical skill of an AI team for every minute of a match
+
+        The skill of an AI team only depends on its average skill, its tactic and
+        the minute, so it is calculated once and read by Match.minute.
+        '''
+        self._strength_key = (self.avg_skill, tuple(self.tactic))
+        self._strength_table = [tuple(self._tactical_skill(True, minutes)) for minutes in range(91)]
+
+    def strength_table(self):
+        if self._strength_key != (self.avg_skill, tuple(self.tactic)):
+            self.set_strength_table()
+        return self._strength_table
+
     def tactical_skill(self, match, minutes = 0):
+        if not self.human:
+            return self.strength_table()[minutes]
+        return self._tactical_skill(match, minutes)
+
+    def _tactical_skill(self, match, minutes = 0):
         def _tactical_skill_balance(skill):
             return pow(2, skill * 0.625)
 
@@ -115,7 +263,7 @@ class Team(object):
 
         has_goalkeeper = True
         if self.human:
-            has_goalkeeper = True if len([p for p in self.players if p.position == 0 and p.playing_status == 0]) else False
+            has_goalkeeper = self.lineup().has_goalkeeper
 
         if has_goalkeeper:
             skill[1] += skill[0] * constants.TEAM['GOALKEEPER BONUS']
@@ -125,26 +273,32 @@ class Team(object):
         return [_tactical_skill_balance(skill[i + 1]) for i in range(3)]
 
     # MATCH INFORMATION
-    def next_match(self, week):
+    def next_fixture(self, week):
+        '''Match of the team in a week
+
+        Returns:
+            tuple: (Match, bool: True if the team plays at home), or None
+        '''
         if week < constants.COMPETITION['TOTAL GAMES']:
-            for match in self.division.matches[week]:
-                for team in match.teams:
-                    if team == self:
-                        return match
-        else:
-            return None
+            return self.division.fixture(self, week)
+        return None
+
+    def next_match(self, week):
+        fixture = self.next_fixture(week)
+        if fixture:
+            return fixture[0]
+        return None
 
     def next_opponent(self, week):
-        match = self.next_match(week)
-        if match:
-            if match.teams[0] == self:
-                return match.teams[1]
-            else:
-                return match.teams[0]
+        fixture = self.next_fixture(week)
+        if fixture:
+            match, home = fixture
+            return match.teams[1] if home else match.teams[0]
         return None
 
     def fixture_list(self, week = None):
-        pass
+        '''Matches of the team in the season, from week on if given'''
+        return [fixture[0] for fixture in self.division.fixtures(self)[week or 0:] if fixture]
 
     # SQUAD
     def can_substitute_player(self, player_in, player_out):
@@ -176,12 +330,14 @@ class Team(object):
         if not in_match:
             if self.can_replace_player(player_in, player_out):
                 player_out.playing_status, player_in.playing_status = player_in.playing_status, player_out.playing_status
+                self.invalidate_lineup()
                 return True
         else:
             if self.can_substitute_player(player_in, player_out):
                 player_in.playing_status = 0
                 player_in.sub_minutes = match_minutes
                 player_out.playing_status = 2
+                self.invalidate_lineup()
                 return True
         return False
 
@@ -209,6 +365,8 @@ class Team(object):
         if player.can_be_sold() and self.has_place_to_sell_player():
             self.change_finances('Sold Players', player.current_value())
             self.players.remove(player)
+            if self.registry is not None:
+                self.registry.remove(player)
             self.set_playing_tactic()
             return True
 
@@ -223,6 +381,8 @@ class Team(object):
                 player.team = self
                 self.change_finances('Bought Players', -player.current_value())
                 self.players_to_buy.remove(player)
+                if self.registry is not None:
+                    self.registry.add(player, self)
                 return True
         return False
 
@@ -253,8 +413,8 @@ class Team(object):
 
     # STRINGS
     def next_match_to_str(self, week):
-        match = self.next_match(week)
-        if match.teams[0] == self:
+        match, home = self.next_fixture(week)
+        if home:
             return match.teams[1].name + ' (Home)'
         else:
             return match.teams[0].name + ' (Away)'
@@ -272,7 +432,18 @@ class Team(object):
     def finances_yearly_income(self):
         return sum(value for key, value in self.yearly_finances.items() if (key == "Sold Players" or key == "Prize Money" or key == "Sponsors"))
 
-    def set_transfer_list(self):
+    def transfer_budget(self):
+        '''What the transfer list is drawn from: [money available, team skill, division skill]'''
+        money_available = self.money + sum([p.current_value() for p in self.players if p.contract <= 0])
+        return [money_available, self.average_skill(), self.division.average_skill()]
+
+    def set_transfer_list(self, seed = None, budget = None):
+        '''Draws the players of the transfer list
+
+        Args:
+            seed (int): seed of the draws
+            budget (list): transfer_budget of the week of the list, the current one by default
+        '''
         def _player_skill(team_avg_skill, division_avg_skill):
             max_skill_choices = {
                 constants.PLAYER['MAX_SKILL'] - 4: 5, 
@@ -281,12 +452,12 @@ class Team(object):
                 constants.PLAYER['MAX_SKILL'] - 1: 2, 
                 constants.PLAYER['MAX_SKILL']: 1
             }
-            max_skill_limit = random.choice([x for x in max_skill_choices for y in range(max_skill_choices[x])])
+            max_skill_limit = rng.choice([x for x in max_skill_choices for y in range(max_skill_choices[x])])
 
             min_skill = min(max_skill_limit - constants.TRANSFERS["SKILL VARIATION ON TRANSFER LIST"], (team_avg_skill + division_avg_skill) * 0.5 - constants.TRANSFERS["SKILL VARIATION ON TRANSFER LIST"])
             max_skill = min(max_skill_limit, (team_avg_skill + division_avg_skill) * 0.5 + constants.TRANSFERS["SKILL VARIATION ON TRANSFER LIST"])
 
-            skill_temp = random.uniform(min_skill, max_skill)
+            skill_temp = rng.uniform(min_skill, max_skill)
             skill = int(round(helpers.min_max(skill_temp, constants.PLAYER['MIN_SKILL'], constants.PLAYER['MAX_SKILL']), 0))
 
             return skill
@@ -294,44 +465,73 @@ class Team(object):
         def _player_country():
             same_country = 0.35 + 0.2 * self.division.level
             country = None
-            if random.random() <= same_country:
+            if rng.random() <= same_country:
                 country = self.country
             return country
 
-        money_available = self.money + sum([p.current_value() for p in self.players if p.contract <= 0])
+        rng = helpers.new_rng(seed)
+        money_available, team_skill, division_skill = budget or self.transfer_budget()
         if money_available < 0:
-            self.players_to_buy = []
+            self.replace_transfer_list([])
             return True
 
         player_list = []
 
-        amount_of_players_in_transfer_list = constants.TRANSFERS['AVERAGE PLAYERS PER TURN'] + random.randint(-constants.TRANSFERS['VARIATION OF AMOUNT OF PLAYERS PER TURN'], constants.TRANSFERS['VARIATION OF AMOUNT OF PLAYERS PER TURN'])
+        amount_of_players_in_transfer_list = constants.TRANSFERS['AVERAGE PLAYERS PER TURN'] + rng.randint(-constants.TRANSFERS['VARIATION OF AMOUNT OF PLAYERS PER TURN'], constants.TRANSFERS['VARIATION OF AMOUNT OF PLAYERS PER TURN'])
 
         for p in range(amount_of_players_in_transfer_list):
-            player = Player(country = _player_country(), skill = _player_skill(self.average_skill(), self.division.average_skill()))
+            player = Player(country = _player_country(), skill = _player_skill(team_skill, division_skill), rng = rng)
             player.salary *= constants.PLAYER['TRANSFER_LIST_SALARY_INCREASE']
 
-            while player.skill >= constants.PLAYER["MIN_SKILL"]:
-                if player.current_value() <= money_available:
-                    player_list.append(player)
-                    break
-                else:
-                    player.skill -= 1
+            skill = player.affordable_skill(money_available)
+            if skill is not None:
+                player.skill = skill
+                player_list.append(player)
 
-        self.players_to_buy = player_list
+        self.replace_transfer_list(player_list)
         return True
 
-    def change_finances(self, key, value):
+    def transfer_list(self):
+        '''Players the team can buy this week, drawn the first time the list is asked for'''
+        if self.transfer_list_outdated:
+            self.transfer_list_outdated = False
+            self.set_transfer_list(seed = self.transfer_list_seed, budget = self.transfer_list_budget)
+        return self.players_to_buy
+
+    def expire_transfer_list(self, seed = None):
+        '''Drops the players of the transfer list, so transfer_list draws new ones with seed
+
+        The budget is taken now, so buying and selling players before the list
+        is looked at does not change which players it offers.
+        '''
+        self.replace_transfer_list([])
+        self.transfer_list_outdated = True
+        self.transfer_list_seed = seed
+        self.transfer_list_budget = self.transfer_budget()
+
+    def replace_transfer_list(self, players):
+        if self.registry is not None:
+            self.registry.replace_transfer_list(self, self.players_to_buy, players)
+        self.players_to_buy = players
+
+    def change_finances(self, key, value, weekly = True):
+        '''Adds value to the money of the team, booked under key
+
+        Args:
+            weekly (bool): False for a week whose weekly finances were already replaced by a later week
+        '''
         if value > 0:
-            self.weekly_finances[key] += value
+            if weekly:
+                self.weekly_finances[key] += value
             self.yearly_finances[key] += value
         else:
-            self.weekly_finances[key] -= value
+            if weekly:
+                self.weekly_finances[key] -= value
             self.yearly_finances[key] -= value
 
         self.money += value
 
-    def next_week(self):
+    def next_week(self, seed = None):
         def _reduce_injury():
             injured_players = [p for p in self.players if p.injured()]
             for player in injured_players:
@@ -343,27 +543,27 @@ class Team(object):
                 player.contract -= 1
 
         def _player_asking_for_new_contract():
-            if random.random() <= constants.PLAYER['WEEKLY_PROBABILITY_OF_ASKING_FOR_NEW_CONTRACT']:
+            if rng.random() <= constants.PLAYER['WEEKLY_PROBABILITY_OF_ASKING_FOR_NEW_CONTRACT']:
                 player_list = [p for p in self.players if p.contract <= 0 and not p.injured()]
                 if len(player_list):
-                    player = random.choice(player_list)
-                    player.set_renew_contract_wanted_salary(asking = True)
+                    player = rng.choice(player_list)
+                    player.set_renew_contract_wanted_salary(asking = True, rng = rng)
                     player.wants_new_contract = True
                     player.playing_status = 2
                     self.weekly_news.news.append(News('New contract', player.name))
 
         def _player_tired():
-            if random.random() <= constants.PLAYER['WEEKLY_PROBABILITY_OF_TIREDNESS']:
+            if rng.random() <= constants.PLAYER['WEEKLY_PROBABILITY_OF_TIREDNESS']:
                 player_list = [p for p in self.players if not p.injured() and not p.wants_new_contract and p.match_minutes >= 75]
                 if len(player_list):
-                    player = random.choice(player_list)
+                    player = rng.choice(player_list)
                     player.injury = 1
                     player.playing_status = 2
                     self.weekly_news.news.append(News('Tired', player.name))
 
         def _set_training():
             for player in self.players:
-                player.set_weekly_training()
+                player.set_weekly_training(rng)
                 player.match_minutes = 0
                 player.sub_minutes = 0
 
@@ -393,6 +593,7 @@ class Team(object):
 
                 return False
 
+        rng = helpers.new_rng(seed)
         self.weekly_news.news = []
         _set_finances()
         _reduce_injury()
@@ -401,7 +602,10 @@ class Team(object):
         _set_training()
         _player_asking_for_new_contract()
         _player_tired()
-        self.set_transfer_list()
+        if self.human:
+            self.expire_transfer_list(seed = helpers.derive_seed(seed, 'transfer list'))
+        elif self.players_to_buy:
+            self.replace_transfer_list([])
         self.set_playing_tactic()
 
     def min_pos_per_season_points_per_week(self):
@@ -423,34 +627,40 @@ class Team(object):
         self.league_stats = {'Wins' : 0, 'Draws' : 0, 'Losses' : 0, 'Goals For' : 0, 'Goals Against' : 0}
 
 
-    def start_of_season(self):
+    def start_of_season(self, seed = None):
         def _promote_player_from_youth_team():
             min_skill = self.average_skill() - int(self.average_skill() / 5.0) - constants.PLAYER['SKILL_DROP_FROM_BEING_YOUTH_PLAYER']
             max_skill = self.average_skill() - int(self.average_skill() / 5.0)
-            skill = helpers.min_max(random.uniform(min_skill, max_skill), constants.PLAYER['MIN_SKILL'], constants.PLAYER['MAX_YOUTH_PLAYER_SKILL'])
+            skill = helpers.min_max(rng.uniform(min_skill, max_skill), constants.PLAYER['MIN_SKILL'], constants.PLAYER['MAX_YOUTH_PLAYER_SKILL'])
             skill = int(round(skill, 0))
-            player = Player(country = self.country, skill = skill, age = random.choice([18, 19]), team = self, is_homegrown=True, contract=constants.COMPETITION['TOTAL GAMES'])
+            player = Player(country = self.country, skill = skill, age = rng.choice([18, 19]), team = self, is_homegrown=True, contract=constants.COMPETITION['TOTAL GAMES'], rng = rng)
             self.weekly_news.news.append(News('Juniors', player.name))
             self.players.append(player)
+            if self.registry is not None:
+                self.registry.add(player, self)
 
         def _remove_retired_players():
             retired = [player for player in self.players if player.retired]
             for player in retired:
                 player.team = None
                 self.players.remove(player)
+                if self.registry is not None:
+                    self.registry.remove(player)
                 self.weekly_news.news.append(News('Retired', player.name))
 
+        rng = helpers.new_rng(seed)
         self.weekly_news.news = []
         self.reset_league_stats()
         _remove_retired_players()
 
         if not self.human:
-            self.tactic = random.choice(2 * constants.TEAM['BASE TACTICS'] + constants.TEAM['DEF TACTICS'] + constants.TEAM['ATK TACTICS'])
+            self.tactic = random_tactic(rng)
+            self.draw_phantom_scorers(rng)
         else:
             for player in self.players:
                 player.start_of_season()
 
-            amount = int(round(random.uniform(
+            amount = int(round(rng.uniform(
                 constants.TEAM['AVG_YOUTH_PLAYERS_PROMOTED_PER_YEAR'] - 1, constants.TEAM['AVG_YOUTH_PLAYERS_PROMOTED_PER_YEAR'] + 1
             ), 0))
 
@@ -459,7 +669,7 @@ class Team(object):
             for juniors in range(min(places_left_in_team, amount)):
                 _promote_player_from_youth_team()
 
-            self.set_transfer_list()
+            self.expire_transfer_list(seed = helpers.derive_seed(seed, 'transfer list'))
             self.set_playing_tactic()
 
     # END OF SEASON
@@ -467,10 +677,11 @@ class Team(object):
         self.weekly_finances = {'Salaries' : 0, 'Bought Players' : 0, 'Sold Players' : 0, 'Prize Money' : 0, 'Sponsors' : 0}
         self.yearly_finances = {'Salaries' : 0, 'Bought Players' : 0, 'Sold Players' : 0, 'Prize Money' : 0, 'Sponsors' : 0}
 
-    def end_of_season(self):
+    def end_of_season(self, seed = None):
+        rng = helpers.new_rng(seed)
         self.reset_finances()
         for player in self.players:
-            player.end_of_season()
+            player.end_of_season(rng)
 
         pos = self.division.team_position(self)
         self.weekly_sponsorship = self.division.sponsorship_per_end_of_season_position(pos)
@@ -500,6 +711,9 @@ class Team(object):
         self.league_stats['Goals For'] += goals_for
         self.league_stats['Goals Against'] += goals_against
 
+        if self.division:
+            self.division.update_standings(self)
+
         if self.manager:
             self.manager.update_stats()
 
@@ -512,7 +726,11 @@ class Team(object):
         return self.league_stats['Wins'] * 3 + self.league_stats['Draws'] * 1
 
     def league_position(self):
-        return self.division.ordered_table_by_position().index(self) + 1
+        return self.division.team_position(self)
+
+    def table_key(self):
+        '''Tiebreakers of the league table, greater for the better team'''
+        return (self.league_points(), self.goal_difference(), self.league_stats['Wins'], self.league_stats['Goals For'], -self.league_stats['Losses'])
 
     # PLAYER ORDERING
     def order_players_by_skill(self, only_allowed = True):
@@ -559,11 +777,7 @@ class Team(object):
 
     def current_tactic(self):
         if self.human:
-            tits = [p for p in self.players if p.playing_status == 0]
-            tactic = [0, 0, 0]
-            for player in tits:
-                if player.position != 0:
-                    tactic[player.position - 1] += 1
+            tactic = list(self.lineup().tactic)
         else:
             tactic = self.tactic
         return tactic
@@ -616,15 +830,17 @@ class Team(object):
         for player in bench_players:
             player.playing_status = 1
 
+        self.invalidate_lineup()
         return True
 
-    def fan_happiness_change_with_result(self, points):
+    def fan_happiness_change_with_result(self, points, news = True):
         multi = constants.TEAM_GOALS['POINT_PER_WEEK_DIFF_HAPPINESS_MULTI']
         change = multi * (points - self.season_points_per_week)
         self.fan_happiness = helpers.min_max(self.fan_happiness + change, constants.TEAM_GOALS["MIN_FAN_HAPPINESS"], constants.TEAM_GOALS["MAX_FAN_HAPPINESS"])
-        self.weekly_news.news.append(News('Fans', change))
+        if news:
+            self.weekly_news.news.append(News('Fans', change))
 
-    def __init__(self, name, country, color, manager = None, division = None, tactic = None, avg_skill = None, players = None, human = False, league_stats = None, players_to_buy = None, weekly_finances = None, yearly_finances = None, money = None, weekly_sponsorship = 0, fan_happiness = None, season_points_per_week = None, weekly_news = None):
+    def __init__(self, name, country, color, manager = None, division = None, tactic = None, avg_skill = None, players = None, human = False, league_stats = None, players_to_buy = None, weekly_finances = None, yearly_finances = None, money = None, weekly_sponsorship = 0, fan_happiness = None, season_points_per_week = None, weekly_news = None, scorers = None, transfer_list_outdated = False, transfer_list_seed = None, transfer_list_budget = None):
 
         self.name = name
 
@@ -635,7 +851,7 @@ class Team(object):
         self.manager = manager
 
         if tactic is None:
-            tactic = random.choice(2 * constants.TEAM['BASE TACTICS'] + constants.TEAM['DEF TACTICS'] + constants.TEAM['ATK TACTICS'])
+            tactic = random_tactic()
         self.tactic = tactic
 
         self.avg_skill = avg_skill
@@ -685,3 +901,11 @@ class Team(object):
         if color is None:
             color = (72/255.0, 92/255.0, 150/255.0, 1)
         self.color = color
+
+        self.scorers = scorers
+
+        self.transfer_list_outdated = transfer_list_outdated
+
+        self.transfer_list_seed = transfer_list_seed
+
+        self.transfer_list_budget = transfer_list_budget
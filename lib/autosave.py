@@ -0,0 +1,122 @@
+# coding: latin1
+'''Saving careers on a worker thread.
+
+The interfaces save the career at safe points, when the game does not change
+(after Game.next_week, when the app is paused or closed). Only the capture of
+the career, which encodes it as arrays, runs on the interface thread: the
+compression and the disk writes run on a worker thread, so the Textual event
+loop and the Kivy Clock do not wait for the disk. When the app is paused or
+closed the process may be killed right after, so those saves wait for the write.
+'''
+import threading
+import time
+from . import savefile
+
+SAVING = 'saving'
+SAVED = 'saved'
+FAILED = 'failed'
+
+
+class Autosave(object):
+    '''Writes the saves of one career on a worker thread
+
+    save returns as soon as the career is captured. Saves requested while the
+    worker is still writing are merged, so only the most recent one is written.
+
+    report is called on the worker thread with an event (SAVING, SAVED or
+    FAILED) and, for FAILED, the exception of the save. Interfaces must hand
+    the report over to their own thread before touching any widget.
+    '''
+    def save(self, game_dict, snapshot = False):
+        '''Captures the career and writes it in the background
+
+        Args:
+            game_dict (dict): attributes of the game
+            snapshot (bool): write the whole career instead of its changes
+        '''
+        capture = self.journal.capture(game_dict, snapshot = snapshot)
+        with self.condition:
+            if self.pending is not None and self.pending['snapshot']:
+                # The merged capture has the row numbers of the newer snapshot
+                capture['snapshot'] = True
+            self.pending = capture
+            self.condition.notify_all()
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target = self._run, name = 'autosave')
+                self.thread.daemon = True
+                self.thread.start()
+
+    def busy(self):
+        with self.condition:
+            return self.pending is not None or self.writing
+
+    def wait(self, timeout = None):
+        '''Waits until every requested save is written
+
+        Returns:
+            bool: False if the saves were still being written after timeout seconds
+        '''
+        end = None if timeout is None else time.time() + timeout
+        with self.condition:
+            while self.pending is not None or self.writing:
+                remaining = None if end is None else end - time.time()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self.condition.wait(remaining)
+        return True
+
+    def close(self, timeout = None):
+        '''Writes the pending save and stops the worker thread'''
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+        if self.thread is not None:
+            self.thread.join(timeout)
+            return not self.thread.is_alive()
+        return True
+
+    def _report(self, event, error = None):
+        if self.report is not None:
+            self.report(event, error)
+
+    def _run(self):
+        while True:
+            with self.condition:
+                while self.pending is None and not self.closed:
+                    self.condition.wait()
+                if self.pending is None:
+                    return
+                capture, self.pending = self.pending, None
+                self.writing = True
+
+            try:
+                self._report(SAVING)
+                try:
+                    self.journal.write(capture)
+                except Exception as error:
+                    self.error = error
+                    self._report(FAILED, error)
+                else:
+                    self.error = None
+                    self.saves += 1
+                    self.last_saved = time.time()
+                    self._report(SAVED)
+            finally:
+                with self.condition:
+                    self.writing = False
+                    self.condition.notify_all()
+
+    def __init__(self, path, report = None, snapshot_every = 10):
+        self.path = path
+        self.journal = savefile.Journal(path, snapshot_every = snapshot_every)
+        self.report = report
+
+        self.condition = threading.Condition()
+        self.thread = None
+        self.pending = None
+        self.writing = False
+        self.closed = False
+
+        self.error = None
+        self.saves = 0
+        self.last_saved = None
@@ -0,0 +1,266 @@
+# coding: latin1
+'''Array based match engine for fixtures played between two AI teams.
+
+AI teams do not have injuries, substitutions or a minimum number of players,
+so their matches only depend on the tactical skill of both teams on every
+minute. This module works out the possession and goal chances of many of
+those matches at once, using arrays with a fixed (matches, minutes) layout, and
+then writes the results back into the Match objects. Without numpy the same
+minutes are played in plain Python from the strength tables of the teams, which
+skips the lineups and the per-minute bookkeeping of Match.minute.
+
+The minutes and the scorers are drawn from the streams of each match, as
+Match.minute draws them (see Match.rng).
+'''
+from . import constants
+from . import match_model
+import random
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+MINUTES = 90
+
+
+def available():
+    return numpy is not None
+
+
+def new_seed():
+    '''Seed taken from the random module, so seeding random also seeds the batch engine'''
+    return random.getrandbits(64)
+
+
+def new_rng(seed = None):
+    if seed is None:
+        seed = new_seed()
+    return numpy.random.default_rng(seed)
+
+
+def can_batch(match):
+    if match.finished or match.minutes > 0:
+        return False
+    for team in match.teams:
+        if team is None or team.human:
+            return False
+    return True
+
+
+def team_skills(team):
+    '''Tactical skill of a team for every minute of a match
+
+    Returns:
+        list: MINUTES rows of (defense, midfield, attack)
+    '''
+    if not team.human:
+        return team.strength_table()[1:]
+    return [team.tactical_skill(match = True, minutes = minute) for minute in range(1, MINUTES + 1)]
+
+
+def _balance(a, b):
+    return ((a - b) / (a + b) + 1) * 0.5
+
+
+def sample_scores(score_model, runs, rng):
+    '''Draws the final score of a match on many independent runs
+
+    Args:
+        score_model (match_model.ScoreModel): distribution of the final score
+        runs (int): number of runs
+        rng (numpy.random.Generator): source of the random draws
+
+    Returns:
+        tuple: (home, away), two arrays of runs goals
+    '''
+    cumulative = numpy.cumsum(score_model.distribution)
+    cells = numpy.minimum(numpy.searchsorted(cumulative, rng.random(runs) * cumulative[-1], side = 'right'), cumulative.size - 1)
+    home, away = numpy.divmod(cells, len(score_model.distribution))
+    return home + score_model.score[0], away + score_model.score[1]
+
+
+def table_positions(points, goal_difference, wins, goals_for, losses):
+    '''Position of every team on every run, 0 being the first
+
+    Uses the tiebreakers of Division.order_table_by_position. Teams that are
+    still tied keep the order of the columns, like the stable sort does.
+
+    Args:
+        points, goal_difference, wins, goals_for, losses (array): (runs, teams) league stats
+
+    Returns:
+        array: (runs, teams) positions
+    '''
+    runs, teams = points.shape
+    column = numpy.broadcast_to(numpy.arange(teams), (runs, teams))
+    order = numpy.lexsort((column, losses, -goals_for, -wins, -goal_difference, -points), axis = -1)
+    positions = numpy.empty_like(order)
+    numpy.put_along_axis(positions, order, numpy.broadcast_to(numpy.arange(teams), (runs, teams)), axis = -1)
+    return positions
+
+
+def predict_positions(teams, matches, runs, rng):
+    '''Simulates the remaining matches of a division many times
+
+    The final score of each fixture is drawn from its exact distribution (see
+    match_model). Only the goals are kept, in arrays, so the teams, their
+    players and the matches are never changed. A match that is being played
+    goes on from its current minute and score.
+
+    Args:
+        teams (list): teams of the division, in the current table order
+        matches (list): matches that are not finished
+        runs (int): number of runs
+        rng (numpy.random.Generator): source of the random draws
+
+    Returns:
+        list: for each team, the probability of finishing on each position
+    '''
+    column = dict((id(team), i) for i, team in enumerate(teams))
+    stats = numpy.array([[team.league_stats[key] for key in ('Wins', 'Draws', 'Losses', 'Goals For', 'Goals Against')] for team in teams], dtype = int)
+    wins, draws, losses, goals_for, goals_against = [numpy.repeat(stats[None, :, i], runs, axis = 0) for i in range(5)]
+
+    # The score distributions of fixtures between AI teams come back every
+    # time the chances are asked for, and are kept by match_model.cache
+    for match, score_model in zip(matches, match_model.cache.models(matches)):
+        home, away = sample_scores(score_model, runs, rng)
+        for team, scored, conceded in ((match.teams[0], home, away), (match.teams[1], away, home)):
+            c = column[id(team)]
+            wins[:, c] += scored > conceded
+            draws[:, c] += scored == conceded
+            losses[:, c] += scored < conceded
+            goals_for[:, c] += scored
+            goals_against[:, c] += conceded
+
+    positions = table_positions(wins * 3 + draws, goals_for - goals_against, wins, goals_for, losses)
+    return (positions[:, :, None] == numpy.arange(len(teams))).mean(axis = 0).tolist()
+
+
+def draw_minutes(matches):
+    '''Random numbers of every minute of the matches, as (matches, MINUTES, 2)
+
+    The number for the ball comes before the number for the goal on every
+    minute (see Match.rng).
+    '''
+    streams = [match.rng().random for match in matches]
+    return numpy.array([draw() for draw in streams for i in range(2 * MINUTES)], dtype = float).reshape(len(matches), MINUTES, 2)
+
+
+def simulate_fixtures(home_skills, away_skills, draws):
+    '''Simulates every minute of several matches at once
+
+    Args:
+        home_skills (array): (matches, MINUTES, 3) tactical skill of the home teams
+        away_skills (array): (matches, MINUTES, 3) tactical skill of the away teams
+        draws (array): random numbers of the minutes, see draw_minutes
+
+    Returns:
+        tuple: (possession, goals), two (matches, MINUTES) arrays with the team
+            that had the ball on each minute (0 or 1) and whether it scored
+    '''
+    home_skills = numpy.asarray(home_skills, dtype = float)
+    away_skills = numpy.asarray(away_skills, dtype = float)
+
+    home_attack_prob = numpy.clip(_balance(home_skills[:, :, 1], away_skills[:, :, 1]), 1 - constants.MATCH['MAX_POSS'], constants.MATCH['MAX_POSS'])
+    possession = (draws[:, :, 0] > home_attack_prob).astype(numpy.int8)
+
+    skill_balance = numpy.where(possession == 0, _balance(home_skills[:, :, 2], away_skills[:, :, 0]), _balance(away_skills[:, :, 2], home_skills[:, :, 0]))
+    goal_prob = numpy.clip(skill_balance, constants.MATCH['MIN_SKILL_BALANCE'], 1) * constants.MATCH['MAX_GOAL_PROB_PER_POSS']
+    goals = draws[:, :, 1] <= goal_prob
+
+    return possession, goals
+
+
+def play_fixtures(matches):
+    '''Plain Python version of simulate_fixtures, used without numpy
+
+    Returns:
+        tuple: (possession, goals), for each match a list with the team that had
+            the ball on each minute (0 or 1) and a list of whether it scored
+    '''
+    max_possession = constants.MATCH['MAX_POSS']
+    min_skill_balance = constants.MATCH['MIN_SKILL_BALANCE']
+    max_goal_prob = constants.MATCH['MAX_GOAL_PROB_PER_POSS']
+
+    possession = []
+    goals = []
+    for match in matches:
+        draw = match.rng().random
+        match_possession = []
+        match_goals = []
+        for home, away in zip(team_skills(match.teams[0]), team_skills(match.teams[1])):
+            home_attack_prob = min(max(_balance(home[1], away[1]), 1 - max_possession), max_possession)
+            if draw() > home_attack_prob:
+                team_id = 1
+                skill_balance = _balance(away[2], home[0])
+            else:
+                team_id = 0
+                skill_balance = _balance(home[2], away[0])
+            match_possession.append(team_id)
+            match_goals.append(draw() <= min(max(skill_balance, min_skill_balance), 1) * max_goal_prob)
+        possession.append(match_possession)
+        goals.append(match_goals)
+    return possession, goals
+
+
+def apply_results(matches, possession, goals):
+    '''Writes the simulated minutes into the matches and ends them
+
+    Args:
+        possession (list): for each match, the team that had the ball on each minute
+        goals (list): for each match, whether that team scored on each minute
+    '''
+    for match, match_possession, match_goals in zip(matches, possession, goals):
+        for minute, scored in enumerate(match_goals, 1):
+            if scored:
+                match.minutes = minute
+                match.goal(team_id = match_possession[minute - 1])
+
+        away_possession = sum(match_possession)
+        match.possession = [MINUTES - away_possession, away_possession]
+        if match.possession_log is not None:
+            for minute, team_id in enumerate(match_possession, 1):
+                if team_id:
+                    match.log_possession(minute, 1)
+        else:
+            match.possession_last_5_minutes = list(match_possession[-5:])
+
+        for team in match.teams:
+            for player in team.players:
+                if player.playing_status == 0:
+                    player.match_minutes += MINUTES
+
+        match.minutes = MINUTES
+        match.end()
+
+
+def fixture_skills(matches):
+    '''Tactical skills of the home and away teams of the matches as (matches, MINUTES, 3) arrays'''
+    skills = {}
+    for match in matches:
+        for team in match.teams:
+            if id(team) not in skills:
+                skills[id(team)] = team_skills(team)
+
+    home_skills = numpy.array([skills[id(match.teams[0])] for match in matches], dtype = float)
+    away_skills = numpy.array([skills[id(match.teams[1])] for match in matches], dtype = float)
+    return home_skills, away_skills
+
+
+def simulate_matches(matches):
+    '''Simulates a list of AI only matches, for example one week or a whole season of a division
+
+    Matches are ended in the order they are given, so the league stats of the
+    teams are updated exactly as if they were simulated one by one.
+    '''
+    if not matches:
+        return
+
+    if numpy is None:
+        possession, goals = play_fixtures(matches)
+    else:
+        home_skills, away_skills = fixture_skills(matches)
+        possession, goals = simulate_fixtures(home_skills, away_skills, draw_minutes(matches))
+        possession, goals = possession.tolist(), goals.tolist()
+    apply_results(matches, possession, goals)
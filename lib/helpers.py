@@ -1,5 +1,8 @@
 # coding: latin1
+import bisect
+import hashlib
 import random
+import struct
 
 def median(lst):
     sortedLst = sorted(lst)
@@ -29,15 +32,68 @@ def balance(a, b):
 def min_max(value, min_v, max_v):
     return min(max(value, min_v), max_v)
 
-def weighted_choice(choices):
+def weighted_choice(choices, rng = random):
     total = sum(w for c, w in choices)
-    r = random.uniform(0, total)
+    r = rng.uniform(0, total)
     upto = 0
     for c, w in choices:
         if upto + w >= r:
             return c
         upto += w
 
+class WeightedSampler(object):
+    '''weighted_choice for weights that do not change between draws
+
+    The cumulative weights are summed once, so each draw is a binary search
+    instead of a sum and a scan of every choice. Draws use the same random
+    number as weighted_choice and pick the same choice.
+    '''
+    def choice(self, rng = random):
+        if not self.values:
+            return None
+        return self.values[bisect.bisect_left(self.cumulative, rng.uniform(0, self.total))]
+
+    def __len__(self):
+        return len(self.values)
+
+    def __init__(self, choices):
+        self.values = []
+        self.cumulative = []
+        self.total = 0
+        for c, w in choices:
+            self.total += w
+            self.values.append(c)
+            self.cumulative.append(self.total)
+
+def new_seed():
+    '''Seed taken from the random module, small enough to be saved as a number'''
+    return random.getrandbits(52)
+
+def derive_seed(seed, *keys):
+    '''Seed of a substream of the random stream of seed
+
+    The seed only depends on seed and keys, so each part of a career (a season
+    of a division, a week of a team, a match) draws the same numbers whatever
+    the order, process or engine that plays it.
+
+    Args:
+        seed (int): seed of the parent stream, or None
+        keys: names and numbers of the substream, e.g. ('week', season, week)
+
+    Returns:
+        int: the seed, or None without a parent seed
+    '''
+    if seed is None:
+        return None
+    digest = hashlib.sha256(repr((seed,) + keys).encode('utf-8')).digest()
+    return struct.unpack('<Q', digest[:8])[0] >> 12
+
+def new_rng(seed = None):
+    '''random.Random of seed, or the random module itself without a seed'''
+    if seed is None:
+        return random
+    return random.Random(seed)
+
 def normalize(value, minimum, maximum):
     value = min(max(value, minimum), maximum)
     return (value - minimum) / float(maximum - minimum)
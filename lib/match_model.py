@@ -0,0 +1,317 @@
+# coding: latin1
+'''Exact distribution of the final score of a match.
+
+Match.minute is a Markov chain over the score: on every minute one team gets
+the ball and scores with a probability that only depends on the tactical skill
+of both teams on that minute. This module walks that chain with dynamic
+programming, so the probability of every final score is known without playing
+the match. Season predictions draw final scores from it, and live matches show
+their win probabilities with it.
+
+Matches themselves are still played by Match.minute or the batch engine. The
+distribution costs 90 steps over a grid of scores for every pairing, which is
+more than the two random numbers per minute of playing the match itself.
+
+The model follows the lineups the teams have when it is built: injuries and
+substitutions of human teams are not part of it.
+'''
+from . import constants
+from . import helpers
+import collections
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+MINUTES = 90
+# Goals of a team from the current minute on that the distribution tells apart,
+# more goals are counted as MAX_GOALS
+MAX_GOALS = 15
+# avg_skill difference that ScoreCache tells apart, and most models it keeps
+STRENGTH_STEP = 0.25
+CACHE_SIZE = 1024
+
+
+def minute_probabilities(match, skills = None):
+    '''Probabilities of each minute left of a match
+
+    Uses the same skills and balances as Match.minute.
+
+    Args:
+        match (Match): match that is not finished
+        skills (dict): tactical skills of the teams on the minutes left, kept
+            between calls for matches that share teams
+
+    Returns:
+        list: for each minute from match.minutes + 1 to MINUTES, a tuple of
+            (home attack, home goal, away goal) where home attack is the
+            probability of the home team having the ball and home/away goal the
+            probability of a goal of each team on the minute
+    '''
+    for team in match.teams:
+        if team.human:
+            team.lineup().anchor(match.minutes)
+
+    if skills is None:
+        skills = {}
+    for team in match.teams:
+        if (team, match.minutes) not in skills:
+            skills[(team, match.minutes)] = [team.tactical_skill(match = True, minutes = minute) for minute in range(match.minutes + 1, MINUTES + 1)]
+
+    probabilities = []
+    for home, away in zip(skills[(match.teams[0], match.minutes)], skills[(match.teams[1], match.minutes)]):
+        if not match.is_neutral_field and match.teams[0].human:
+            home = [x * constants.MATCH['HOME_ADVANTAGE'] for x in home]
+
+        attack = helpers.min_max(helpers.balance(home[1], away[1]), 1 - constants.MATCH['MAX_POSS'], constants.MATCH['MAX_POSS'])
+        home_goal = helpers.min_max(helpers.balance(home[2], away[0]), constants.MATCH['MIN_SKILL_BALANCE'], 1) * constants.MATCH['MAX_GOAL_PROB_PER_POSS']
+        away_goal = helpers.min_max(helpers.balance(away[2], home[0]), constants.MATCH['MIN_SKILL_BALANCE'], 1) * constants.MATCH['MAX_GOAL_PROB_PER_POSS']
+        probabilities.append((attack, attack * home_goal, (1 - attack) * away_goal))
+    return probabilities
+
+
+def _distributions(goals):
+    '''Probability of each number of (home, away) goals at the end of several matches
+
+    Args:
+        goals (list): for each match, the (home goal, away goal) probabilities
+            of each minute left, the same number of minutes for every match
+
+    Returns:
+        list: for each match, MAX_GOALS + 1 rows of MAX_GOALS + 1 probabilities
+    '''
+    size = MAX_GOALS + 1
+    if numpy is not None:
+        # Every match is walked at once, with the matches on the first axis
+        probabilities = numpy.asarray(goals, dtype = float).reshape(len(goals), -1, 2)
+        distribution = numpy.zeros((len(goals), size, size))
+        distribution[:, 0, 0] = 1
+        for minute in range(probabilities.shape[1]):
+            home_goal = probabilities[:, minute, 0, None, None]
+            away_goal = probabilities[:, minute, 1, None, None]
+            new = distribution * (1 - home_goal - away_goal)
+            new[:, 1:, :] += distribution[:, :-1, :] * home_goal
+            new[:, -1:, :] += distribution[:, -1:, :] * home_goal
+            new[:, :, 1:] += distribution[:, :, :-1] * away_goal
+            new[:, :, -1:] += distribution[:, :, -1:] * away_goal
+            distribution = new
+        return distribution.tolist()
+
+    distributions = []
+    for match_goals in goals:
+        distribution = [[0.0] * size for i in range(size)]
+        distribution[0][0] = 1.0
+        for minute, (home_goal, away_goal) in enumerate(match_goals):
+            # Only scores with at most one goal per minute played can be reached
+            reach = min(minute, MAX_GOALS) + 1
+            no_goal = 1 - home_goal - away_goal
+            new = [[p * no_goal for p in row] for row in distribution]
+            for i in range(reach):
+                row = distribution[i]
+                home_row = new[min(i + 1, MAX_GOALS)]
+                new_row = new[i]
+                for j in range(reach):
+                    p = row[j]
+                    if p:
+                        home_row[j] += p * home_goal
+                        new_row[min(j + 1, MAX_GOALS)] += p * away_goal
+            distribution = new
+        distributions.append(distribution)
+    return distributions
+
+
+class ScoreModel(object):
+    '''Distribution of the final score of a match, from its current minute and score
+
+    Args:
+        minutes (list): probabilities of each minute left, see minute_probabilities
+        score (list): score of the match so far
+        start (int): minutes played so far
+        distribution (list): distribution of the goals still to score, computed from minutes if not given
+    '''
+    def probability(self, home, away):
+        '''Probability of the match ending with this score'''
+        i, j = home - self.score[0], away - self.score[1]
+        if not (0 <= i <= MAX_GOALS and 0 <= j <= MAX_GOALS):
+            return 0.0
+        return self.distribution[i][j]
+
+    def outcome_probabilities(self):
+        '''Probabilities of (home win, draw, away win)'''
+        difference = self.score[0] - self.score[1]
+        outcomes = [0.0, 0.0, 0.0]
+        for i, row in enumerate(self.distribution):
+            for j, p in enumerate(row):
+                final = difference + i - j
+                if final > 0:
+                    outcomes[0] += p
+                elif final == 0:
+                    outcomes[1] += p
+                else:
+                    outcomes[2] += p
+        return outcomes
+
+    def expected_goals(self):
+        '''Expected final (home, away) goals'''
+        home = sum(i * p for i, row in enumerate(self.distribution) for p in row)
+        away = sum(j * p for row in self.distribution for j, p in enumerate(row))
+        return self.score[0] + home, self.score[1] + away
+
+    def __init__(self, minutes, score = None, start = 0, distribution = None):
+        if score is None:
+            score = [0, 0]
+        self.score = list(score)
+        self.start = start
+        self.minutes = minutes
+        if distribution is None:
+            distribution = _distributions([[(home_goal, away_goal) for attack, home_goal, away_goal in minutes]])[0]
+        self.distribution = distribution
+
+
+class ScoreCache(object):
+    '''ScoreModels of kickoffs between AI teams, by quantized strength and tactics
+
+    The strength of an AI team only depends on its avg_skill, which is on a grid
+    of STRENGTH_STEP (see Game.team_skill_per_division), and on its tactic. The
+    fixtures left in a division are the same pairings every time its chances are
+    asked for, and pairings also come back in later seasons. The least recently
+    used models are dropped when the cache is full.
+
+    Only season predictions read the cache (see batch.predict_positions). Weekly
+    AI matches are played by the batch engine instead: every ordered pairing
+    plays once a season and tactics are drawn again every season, so a weekly
+    lookup hits for a few percent of the matches and builds a distribution on
+    every miss.
+
+    Args:
+        size (int): most models kept
+    '''
+    def key(self, match):
+        '''Key of the kickoff of a match, or None if the match cannot be cached'''
+        if match.minutes != 0 or match.finished:
+            return None
+        key = []
+        for team in match.teams:
+            if team is None or team.human:
+                return None
+            key.append((int(round(team.avg_skill / STRENGTH_STEP)), tuple(team.tactic)))
+        return tuple(key) + (bool(match.is_neutral_field),)
+
+    def model(self, match):
+        '''ScoreModel of a match, from the cache when the match can be cached
+
+        A model that is not in the cache is built from the teams of the match,
+        so teams whose skill is not on the grid share the model of the first
+        match of their pairing.
+        '''
+        key = self.key(match)
+        if key is None:
+            return model(match)
+        score_model = self.entries.get(key)
+        if score_model is not None:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return score_model
+
+        score_model = model(match)
+        self.add(key, score_model)
+        return score_model
+
+    def models(self, matches):
+        '''ScoreModel of each match, like model
+
+        The distributions of the matches missing from the cache are computed
+        together, which is much faster with numpy than one by one.
+        '''
+        models = [None] * len(matches)
+        # (key, minute probabilities, indexes of the matches) still to compute, by minutes played
+        missing = {}
+        pending = {}
+        skills = {}
+        for i, match in enumerate(matches):
+            key = self.key(match)
+            if key in self.entries:
+                models[i] = self.model(match)
+            elif key in pending:
+                self.hits += 1
+                pending[key][2].append(i)
+            else:
+                entry = (key, minute_probabilities(match, skills), [i])
+                missing.setdefault(match.minutes, []).append(entry)
+                if key is not None:
+                    pending[key] = entry
+
+        for minutes, matches_missing in missing.items():
+            distributions = _distributions([[(home_goal, away_goal) for attack, home_goal, away_goal in probabilities] for key, probabilities, indexes in matches_missing])
+            for (key, probabilities, indexes), distribution in zip(matches_missing, distributions):
+                score_model = ScoreModel(probabilities, matches[indexes[0]].score, minutes, distribution)
+                if key is not None:
+                    self.add(key, score_model)
+                for i in indexes:
+                    models[i] = score_model
+        return models
+
+    def add(self, key, score_model):
+        self.misses += 1
+        self.entries[key] = score_model
+        if len(self.entries) > self.size:
+            self.entries.popitem(last = False)
+            self.evictions += 1
+
+    def clear(self):
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __init__(self, size = CACHE_SIZE):
+        self.size = size
+        self.entries = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+
+# Kept for the whole process, across seasons and games, for season predictions
+cache = ScoreCache()
+
+
+class OutcomeTable(object):
+    '''Probabilities of (home win, draw, away win) from every minute and goal difference
+
+    The chain is walked backwards from the end of the match, where the outcome
+    is known, so the table has a row for each minute and a match that goes on
+    only moves to the next row. It stays valid while the probabilities of the
+    minutes left stay the same.
+
+    Args:
+        minutes (list): probabilities of each minute left, see minute_probabilities
+        start (int): minutes played so far
+    '''
+    def probabilities(self, minute, difference):
+        '''Probabilities of (home win, draw, away win) after a minute, with a home minus away goal difference'''
+        k = helpers.min_max(difference, -MAX_GOALS, MAX_GOALS) + MAX_GOALS
+        wins, draws = self.rows[minute - self.start]
+        return [wins[k], draws[k], 1 - wins[k] - draws[k]]
+
+    def __init__(self, minutes, start = 0):
+        self.start = start
+        differences = range(-MAX_GOALS, MAX_GOALS + 1)
+        row = ([float(d > 0) for d in differences], [float(d == 0) for d in differences])
+        self.rows = [row]
+        for attack, home_goal, away_goal in reversed(minutes):
+            no_goal = 1 - home_goal - away_goal
+            # After a home goal the difference is one higher, after an away goal one lower
+            row = tuple([no_goal * p + home_goal * up + away_goal * down for p, up, down in zip(values, values[1:] + values[-1:], values[:1] + values[:-1])] for values in row)
+            self.rows.append(row)
+        self.rows.reverse()
+
+
+def model(match):
+    '''ScoreModel of a match from its current minute and score'''
+    return ScoreModel(minute_probabilities(match), match.score, match.minutes)
+
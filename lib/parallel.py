@@ -0,0 +1,129 @@
+# coding: latin1
+'''Resolution of deferred divisions in worker processes.
+
+Divisions without human teams defer their weekly matches and play them in bulk
+when their table is needed (see Division.resolve). Until then they do not
+interact with the rest of the game, so the deferred weeks of each division are
+sent to a worker process as one job: the teams, with their strength, league
+stats, finances, fans and news, and the seeds of the matches. The worker builds
+a Division from them and resolves it with the same code as the main process.
+It sends back the record of every match and the new league stats, finances,
+fan happiness and news of every team, which are merged into the division of the
+main process, with the results the main process would have got (see
+Match.rng).
+
+Sending a division costs about as much as playing a few of its weeks, so
+divisions with fewer than MIN_WEEKS deferred weeks are left to the main process,
+and so is everything on a machine with a single CPU, where workers only add
+that cost (see the season_ai benchmarks).
+'''
+from concurrent.futures import ProcessPoolExecutor
+import os
+from .Division import Division
+from .Match import Match
+from .Team import Team
+
+# Fewest deferred weeks of a division that are worth a worker
+MIN_WEEKS = 4
+
+# Attributes of a team that a worker needs, and those it sends back
+_TEAM_FIELDS = ('name', 'country', 'color', 'avg_skill', 'tactic', 'league_stats', 'weekly_finances', 'yearly_finances', 'money', 'weekly_sponsorship', 'fan_happiness', 'season_points_per_week', 'weekly_news', 'scorers')
+_RESOLVED_TEAM_FIELDS = ('league_stats', 'weekly_finances', 'yearly_finances', 'money', 'fan_happiness', 'weekly_news')
+# Attributes of a finished match, apart from its goals
+_MATCH_FIELDS = ('minutes', 'score', 'possession', 'possession_last_5_minutes', 'possession_log', 'finished')
+
+_executors = {}
+
+
+def executor(processes):
+    if processes not in _executors:
+        _executors[processes] = ProcessPoolExecutor(max_workers = processes)
+    return _executors[processes]
+
+
+def usable(processes):
+    '''Number of worker processes worth starting, at most one per CPU the program can use'''
+    if hasattr(os, 'sched_getaffinity'):
+        cpus = len(os.sched_getaffinity(0))
+    else:
+        cpus = os.cpu_count() or 1
+    return min(processes, cpus)
+
+
+def shutdown():
+    '''Stops the worker processes, called when the program exits'''
+    for pool in _executors.values():
+        pool.shutdown()
+    _executors.clear()
+
+
+def _job(division):
+    '''Everything a worker needs to resolve the deferred weeks of a division'''
+    index = dict((team, i) for i, team in enumerate(division.teams))
+    teams = [dict((field, getattr(team, field)) for field in _TEAM_FIELDS) for team in division.teams]
+    weeks = [(week, [(index[match.teams[0]], index[match.teams[1]], match.seed, match.is_neutral_field) for match in division.matches[week]]) for week, ended in division.deferred]
+    return {'name': division.name, 'level': division.level, 'weeks': len(division.matches), 'deferred': division.deferred, 'teams': teams, 'matches': weeks}
+
+
+def _resolve(job):
+    '''Resolves a division sent by _job, in a worker process
+
+    Returns:
+        dict: the resolved fields of every team, and of every deferred match
+            with its goals as (minute, team index, scorer)
+    '''
+    teams = [Team(**fields) for fields in job['teams']]
+    division = Division(name = job['name'], level = job['level'], teams = teams, matches = [[] for week in range(job['weeks'])], deferred = job['deferred'])
+    for team in teams:
+        team.division = division
+    for week, fixtures in job['matches']:
+        division.matches[week] = [Match(teams = [teams[home], teams[away]], seed = seed, is_neutral_field = neutral) for home, away, seed, neutral in fixtures]
+
+    division.resolve()
+
+    index = dict((team, i) for i, team in enumerate(teams))
+    matches = []
+    for week, fixtures in job['matches']:
+        for match in division.matches[week]:
+            goals = [(goal['minute'], index[goal['team']], goal['scorer']) for goal in match.goalscorers]
+            matches.append((dict((field, getattr(match, field)) for field in _MATCH_FIELDS), goals))
+    return {'teams': [dict((field, getattr(team, field)) for field in _RESOLVED_TEAM_FIELDS) for team in teams], 'matches': matches}
+
+
+def _merge(division, teams, result):
+    '''Writes the result of _resolve into the division it was sent from'''
+    matches = [match for week, ended in division.deferred for match in division.matches[week]]
+    for match, (fields, goals) in zip(matches, result['matches']):
+        for field, value in fields.items():
+            setattr(match, field, value)
+        # Goals of AI teams, as Match.goal records them
+        match.goalscorers = [{'player': None, 'scorer': scorer, 'team': teams[team], 'minute': minute} for minute, team, scorer in goals]
+        match.compact()
+
+    for team, fields in zip(teams, result['teams']):
+        for field, value in fields.items():
+            setattr(team, field, value)
+
+    division.deferred = None
+    division.reset_standings()
+
+
+def resolve(divisions, processes):
+    '''Resolves the divisions with at least MIN_WEEKS deferred weeks in worker processes
+
+    Divisions with fewer deferred weeks are left for Division.resolve.
+
+    Args:
+        divisions (list): divisions of the game
+        processes (int): number of worker processes
+    '''
+    processes = usable(processes)
+    if processes < 2:
+        return
+    jobs = []
+    for division in divisions:
+        if division.deferred and len(division.deferred) >= MIN_WEEKS:
+            jobs.append((division, list(division.teams), executor(processes).submit(_resolve, _job(division))))
+
+    for division, teams, future in jobs:
+        _merge(division, teams, future.result())
@@ -0,0 +1,916 @@
+# coding: latin1
+'''Versioned, columnar save files for SimpleFM careers.
+
+A save file starts with a small uncompressed header and is followed by a
+compressed body. In the body every kind of object (players, teams, matches,
+...) is a table, and every attribute of those objects is a column stored as a
+typed array. Strings are interned once in a string table and references
+between objects are row numbers of the referenced table. Loading builds the
+objects again from the columns without unpickling any class, so moving or
+renaming classes does not break saves.
+
+The header also describes the career (manager, team, season, week, division
+...), so list_saves can show every save of a folder by reading a few hundred
+bytes of each file.
+
+A Journal saves a career every week without rewriting it: the snapshot is
+followed by a journal file (.sfj) where each save appends only the array
+elements that changed since the previous one. load replays the journal on top
+of the snapshot, and the journal is compacted into a new snapshot every few
+saves.
+
+Saves written by older versions with pickle can still be loaded, and convert
+rewrites them in this format:
+
+    python -m lib.savefile ~/.simplefm/games/*.sfm
+'''
+import array
+import json
+import os
+import pickle
+import random
+import struct
+import sys
+import time
+import uuid
+import zlib
+
+from . import constants
+from .Division import Division
+from .Manager import Manager
+from .Match import Match
+from .News import News, NewsList
+from .Player import Player
+from .Team import Team
+
+MAGIC = b'SFMSAVE'
+JOURNAL_MAGIC = b'SFMJRNL'
+VERSION = 2
+
+_PREAMBLE = struct.Struct('<7sHI')
+_INDEX_SIZE = struct.Struct('<I')
+_JOURNAL_PREAMBLE = struct.Struct('<7sH16s')
+_RECORD = struct.Struct('<III')
+
+# Column kinds
+NUMBER = 'number'      # int, float, bool or None
+NUMBERS = 'numbers'    # list of numbers or None
+BOOL = 'bool'
+STRING = 'string'
+JSON = 'json'          # small nested values (dicts of stats, colors, news data)
+REF = 'ref'            # object of another table or None
+REFS = 'refs'          # list of objects of another table
+WEEKS = 'weeks'        # list of lists of objects of another table
+RNG = 'rng'            # random.Random, saved with its state, or None
+
+# Kinds of the numbers of a column. Columns without floats are int64 arrays and
+# the others float64 arrays; ints that the array cannot hold exactly are _BIG,
+# written in the string table.
+_INT, _FLOAT, _NONE, _BOOL, _BIG = 0, 1, 2, 3, 4
+_INT64 = (-2 ** 63, 2 ** 63 - 1)
+_EXACT_FLOAT = (-2 ** 53, 2 ** 53)
+
+# Tables of the save. Rows of tables with class None are dicts.
+SCHEMA = (
+    ('game', None, (
+        ('name', STRING),
+        ('week', NUMBER),
+        ('season', NUMBER),
+        ('divisions', REFS, 'divisions'),
+        ('human_teams', REFS, 'teams'),
+        ('managers', REFS, 'managers'),
+        ('last_screen', STRING),
+        ('ended', BOOL),
+        ('seed', NUMBER),
+        ('last_player_id', NUMBER),
+    )),
+    ('divisions', Division, (
+        ('name', STRING),
+        ('level', NUMBER),
+        ('teams', REFS, 'teams'),
+        ('matches', WEEKS, 'matches'),
+        ('playable', BOOL),
+        ('deferred', JSON),
+    )),
+    ('teams', Team, (
+        ('name', STRING),
+        ('country', STRING),
+        ('color', JSON),
+        ('manager', REF, 'managers'),
+        ('division', REF, 'divisions'),
+        ('tactic', NUMBERS),
+        ('avg_skill', NUMBER),
+        ('players', REFS, 'players'),
+        ('human', BOOL),
+        ('league_stats', JSON),
+        ('players_to_buy', REFS, 'players'),
+        ('weekly_finances', JSON),
+        ('yearly_finances', JSON),
+        ('money', NUMBER),
+        ('weekly_sponsorship', NUMBER),
+        ('fan_happiness', NUMBER),
+        ('season_points_per_week', NUMBER),
+        ('weekly_news', REF, 'news_lists'),
+        ('scorers', JSON),
+        ('transfer_list_outdated', BOOL),
+        ('transfer_list_seed', NUMBER),
+        ('transfer_list_budget', JSON),
+    )),
+    ('managers', Manager, (
+        ('name', STRING),
+        ('team', REF, 'teams'),
+        ('human', BOOL),
+        ('yearly_stats', JSON),
+    )),
+    ('matches', Match, (
+        ('teams', REFS, 'teams'),
+        ('minutes', NUMBER),
+        ('score', NUMBERS),
+        ('possession', NUMBERS),
+        ('possession_last_5_minutes', NUMBERS),
+        ('tactical_changes', NUMBERS),
+        ('finished', BOOL),
+        ('substitutions', NUMBERS),
+        ('goalscorers', REFS, 'goals'),
+        ('injured_player_out', REF, 'players'),
+        ('is_neutral_field', BOOL),
+        ('seed', NUMBER),
+        ('possession_log', NUMBERS),
+        ('injury_log', NUMBERS),
+        ('substitution_log', NUMBERS),
+        ('injured_player_id', NUMBER),
+        # Streams of a match saved while it is played, which it goes on drawing from
+        ('_rng', RNG),
+        ('_event_rng', RNG),
+    )),
+    ('goals', None, (
+        ('player', REF, 'players'),
+        ('scorer', NUMBER),
+        ('name', STRING),
+        ('team', REF, 'teams'),
+        ('minute', NUMBER),
+    )),
+    ('players', Player, (
+        ('id', NUMBER),
+        ('name', STRING),
+        ('country', STRING),
+        ('team', REF, 'teams'),
+        ('skill', NUMBER),
+        ('training', NUMBER),
+        ('weekly_training', NUMBER),
+        ('age', NUMBER),
+        ('position', NUMBER),
+        ('playing_status', NUMBER),
+        ('is_homegrown', BOOL),
+        ('league_stats', JSON),
+        ('retired', BOOL),
+        ('salary', NUMBER),
+        ('contract', NUMBER),
+        ('wants_new_contract', BOOL),
+        ('wanted_salary', NUMBER),
+        ('injury', NUMBER),
+        ('match_minutes', NUMBER),
+        ('sub_minutes', NUMBER),
+        ('skill_change_last_week', NUMBER),
+    )),
+    ('news_lists', NewsList, (
+        ('news', REFS, 'news'),
+    )),
+    ('news', News, (
+        ('category', STRING),
+        ('data', JSON),
+    )),
+)
+
+
+class SaveFileError(Exception):
+    pass
+
+
+def _values(rows, field):
+    if rows and isinstance(rows[0], dict):
+        return [row.get(field) for row in rows]
+    return [getattr(row, field, None) for row in rows]
+
+
+def _little_endian(arr):
+    if sys.byteorder == 'big':
+        arr = array.array(arr.typecode, arr)
+        arr.byteswap()
+    return arr
+
+
+class _Writer(object):
+    '''Collects the objects reachable from the game and encodes them as columns'''
+    def intern(self, string):
+        if string is None:
+            return -1
+        if string not in self.string_index:
+            self.string_index[string] = len(self.strings)
+            self.strings.append(string)
+        return self.string_index[string]
+
+    def ref(self, table, obj):
+        if obj is None:
+            return -1
+        rows, index = self.rows[table], self.row_index[table]
+        if id(obj) not in index:
+            index[id(obj)] = len(rows)
+            rows.append(obj)
+        return index[id(obj)]
+
+    def add_array(self, typecode, values):
+        return array.array(typecode, values)
+
+    def numbers(self, values):
+        '''Encodes numbers as an array of values and an array of their kinds'''
+        if all(type(value) is int for value in values):
+            try:
+                return [self.add_array('q', values), self.add_array('b', [_INT] * len(values))]
+            except OverflowError:
+                pass
+        floats = any(isinstance(value, float) for value in values)
+        low, high = _EXACT_FLOAT if floats else _INT64
+        kinds = []
+        numbers = []
+        for value in values:
+            if value is None:
+                kinds.append(_NONE)
+                numbers.append(0)
+            elif isinstance(value, bool):
+                kinds.append(_BOOL)
+                numbers.append(int(value))
+            elif isinstance(value, float):
+                kinds.append(_FLOAT)
+                numbers.append(value)
+            elif low <= int(value) <= high:
+                kinds.append(_INT)
+                numbers.append(int(value))
+            else:
+                kinds.append(_BIG)
+                numbers.append(self.intern(str(int(value))))
+        return [self.add_array('d' if floats else 'q', numbers), self.add_array('b', kinds)]
+
+    def column(self, rows, field, kind, target = None):
+        values = _values(rows, field)
+        if kind == NUMBER:
+            return self.numbers(values)
+        if kind == NUMBERS:
+            return [self.add_array('i', [-1 if v is None else len(v) for v in values])] + self.numbers([x for v in values if v for x in v])
+        if kind == BOOL:
+            return [self.add_array('b', [-1 if v is None else int(bool(v)) for v in values])]
+        if kind == STRING:
+            return [self.add_array('i', [self.intern(v) for v in values])]
+        if kind == JSON:
+            return [self.add_array('i', [-1 if v is None else self.intern(json.dumps(v, separators = (',', ':'))) for v in values])]
+        if kind == REF:
+            return [self.add_array('i', [self.ref(target, v) for v in values])]
+        if kind == REFS:
+            values = [v or [] for v in values]
+            return [self.add_array('i', [len(v) for v in values]), self.add_array('i', [self.ref(target, x) for v in values for x in v])]
+        if kind == RNG:
+            return [self.add_array('i', [self.intern(json.dumps(v.getstate(), separators = (',', ':'))) if isinstance(v, random.Random) else -1 for v in values])]
+        if kind == WEEKS:
+            values = [v or [] for v in values]
+            weeks = [week for v in values for week in v]
+            return [self.add_array('i', [len(v) for v in values]), self.add_array('i', [len(week) for week in weeks]), self.add_array('i', [self.ref(target, x) for week in weeks for x in week])]
+        raise SaveFileError('Unknown column kind: {}'.format(kind))
+
+    def discover(self, game_dict):
+        '''Adds every object reachable from the game to the rows of its table'''
+        self.ref('game', game_dict)
+        done = dict((name, 0) for name, cls, columns in SCHEMA)
+        while any(done[name] < len(self.rows[name]) for name in done):
+            for name, cls, columns in SCHEMA:
+                rows = self.rows[name][done[name]:]
+                done[name] += len(rows)
+                for column in columns:
+                    if column[1] == REF:
+                        for value in _values(rows, column[0]):
+                            self.ref(column[2], value)
+                    elif column[1] == REFS:
+                        for value in _values(rows, column[0]):
+                            for x in value or []:
+                                self.ref(column[2], x)
+                    elif column[1] == WEEKS:
+                        for value in _values(rows, column[0]):
+                            for week in value or []:
+                                for x in week:
+                                    self.ref(column[2], x)
+
+    def encode(self, game_dict):
+        '''Encodes the game as tables of columns
+
+        Returns:
+            tuple: (tables, strings), tables map each table name to its number
+                of rows and its columns of arrays
+        '''
+        # Goals and match logs keep the ids of sold and retired players, so a
+        # loaded career must not give them to new players (see Game.player_registry)
+        game_dict['last_player_id'] = max(Player.last_id, game_dict.get('last_player_id') or 0)
+        self.discover(game_dict)
+        tables = {}
+        for name, cls, columns in SCHEMA:
+            rows = self.rows[name]
+            tables[name] = {
+                'rows': len(rows),
+                'columns': [[column[0], column[1], self.column(rows, *column)] for column in columns],
+            }
+        return tables, self.strings
+
+    def __init__(self, rows = None, strings = None):
+        # Rows and strings of an earlier encoding keep their row numbers and indices
+        self.strings = list(strings or [])
+        self.string_index = dict((string, i) for i, string in enumerate(self.strings))
+        self.rows = dict((name, list(rows[name]) if rows else []) for name, cls, columns in SCHEMA)
+        self.row_index = dict((name, dict((id(obj), i) for i, obj in enumerate(self.rows[name]))) for name, cls, columns in SCHEMA)
+
+
+def _pack(tables, strings):
+    '''Lays out the arrays of the tables in one blob, after a JSON index'''
+    blob = []
+    size = 0
+    index = {'tables': {}}
+    for name, table in tables.items():
+        columns = []
+        for field, kind, arrays in table['columns']:
+            specs = []
+            for arr in arrays:
+                data = _little_endian(arr).tobytes()
+                specs.append([arr.typecode, size, len(arr)])
+                blob.append(data)
+                size += len(data)
+            columns.append([field, kind, specs])
+        index['tables'][name] = {'rows': table['rows'], 'columns': columns}
+
+    strings_data = json.dumps(strings, separators = (',', ':')).encode('utf-8')
+    index['strings'] = [size, len(strings_data)]
+    blob.append(strings_data)
+
+    index_data = json.dumps(index, separators = (',', ':')).encode('utf-8')
+    return _INDEX_SIZE.pack(len(index_data)) + index_data + b''.join(blob)
+
+
+def _blob_array(blob, spec):
+    typecode, offset, length = spec
+    arr = array.array(typecode)
+    arr.frombytes(blob[offset:offset + length * arr.itemsize])
+    return _little_endian(arr)
+
+
+def _unpack(body):
+    '''Reads back the tables and strings laid out by _pack'''
+    size = _INDEX_SIZE.unpack_from(body)[0]
+    index = json.loads(body[_INDEX_SIZE.size:_INDEX_SIZE.size + size].decode('utf-8'))
+    blob = body[_INDEX_SIZE.size + size:]
+
+    tables = {}
+    for name, table in index['tables'].items():
+        tables[name] = {
+            'rows': table['rows'],
+            'columns': [[field, kind, [_blob_array(blob, spec) for spec in specs]] for field, kind, specs in table['columns']],
+        }
+    offset, length = index['strings']
+    strings = json.loads(blob[offset:offset + length].decode('utf-8'))
+    return tables, strings
+
+
+def _random_stream(state):
+    '''random.Random with a state saved as JSON'''
+    version, internal, gauss = state
+    stream = random.Random()
+    stream.setstate((version, tuple(internal), gauss))
+    return stream
+
+
+class _Reader(object):
+    '''Builds the objects of a save back from its columns'''
+    def numbers(self, values, kinds):
+        if kinds.count(_INT) == len(kinds):
+            # Saves of version 1 wrote every number as a float
+            return values.tolist() if values.typecode == 'q' else [int(value) for value in values]
+        if kinds.count(_FLOAT) == len(kinds):
+            return values.tolist()
+        return [value if kind == _FLOAT else int(value) if kind == _INT else None if kind == _NONE else self.number(value, kind) for value, kind in zip(values, kinds)]
+
+    def number(self, value, kind):
+        '''Number of the rarer kinds, see _Writer.numbers'''
+        if kind == _BOOL:
+            return bool(value)
+        if kind == _BIG:
+            return int(self.strings[int(value)])
+        raise SaveFileError('Unknown number kind: {}'.format(kind))
+
+    def _split(self, counts, flat):
+        '''Splits flat into lists of counts elements, None for a count of -1'''
+        values = []
+        start = 0
+        for count in counts:
+            if count < 0:
+                values.append(None)
+                continue
+            values.append(flat[start:start + count])
+            start += count
+        return values
+
+    def column(self, kind, arrays, target):
+        if kind == NUMBER:
+            return self.numbers(*arrays)
+        if kind == NUMBERS:
+            return self._split(arrays[0], self.numbers(*arrays[1:]))
+        if kind == BOOL:
+            return [None if v < 0 else bool(v) for v in arrays[0]]
+        if kind == STRING:
+            return [None if i < 0 else self.strings[i] for i in arrays[0]]
+        if kind == JSON:
+            return [None if i < 0 else json.loads(self.strings[i]) for i in arrays[0]]
+        if kind == RNG:
+            return [None if i < 0 else _random_stream(json.loads(self.strings[i])) for i in arrays[0]]
+        rows = self.rows[target]
+        if kind == REF:
+            return [None if i < 0 else rows[i] for i in arrays[0]]
+        if kind == REFS:
+            refs = [None if i < 0 else rows[i] for i in arrays[1]]
+            return self._split(arrays[0], refs)
+        if kind == WEEKS:
+            refs = [None if i < 0 else rows[i] for i in arrays[2]]
+            weeks = self._split(arrays[1], refs)
+            return self._split(arrays[0], weeks)
+        raise SaveFileError('Unknown column kind: {}'.format(kind))
+
+    def decode(self):
+        tables = self.tables
+        for name, cls, columns in SCHEMA:
+            rows = tables.get(name, {}).get('rows', 0)
+            if cls is None:
+                self.rows[name] = [{} for i in range(rows)]
+            else:
+                self.rows[name] = [cls.__new__(cls) for i in range(rows)]
+
+        for name, cls, columns in SCHEMA:
+            targets = dict((column[0], column[2] if len(column) > 2 else None) for column in columns)
+            # Columns of a newer version that this version does not know are skipped
+            known = [(field, kind, arrays) for field, kind, arrays in tables.get(name, {}).get('columns', []) if field in targets]
+            fields = [field for field, kind, arrays in known]
+            values = [self.column(kind, arrays, targets[field]) for field, kind, arrays in known]
+            if cls is not None and '__slots__' in cls.__dict__:
+                # Slotted objects are filled column by column with the slot descriptors
+                for field in cls.__slots__:
+                    setter = cls.__dict__[field].__set__
+                    if field in fields:
+                        list(map(setter, self.rows[name], values[fields.index(field)]))
+                    elif field == 'id':
+                        list(map(setter, self.rows[name], [None] * len(self.rows[name])))
+                continue
+            for row, row_values in zip(self.rows[name], zip(*values)):
+                if cls is None:
+                    row.update(zip(fields, row_values))
+                else:
+                    row.__dict__.update(zip(fields, row_values))
+
+        if not self.rows['game']:
+            raise SaveFileError('Save file has no game')
+        return self.rows['game'][0]
+
+    def __init__(self, tables, strings):
+        self.tables = tables
+        self.strings = strings
+        self.rows = {}
+
+
+class SaveInfo(object):
+    '''Description of a save file, read from its header'''
+    def year(self):
+        if self.season is None:
+            return None
+        return constants.GAME['STARTING YEAR'] + self.season - 1
+
+    def load(self):
+        return load(self.path)
+
+    def __init__(self, path, header = None, modified = None):
+        if header is None:
+            header = {}
+
+        self.path = path
+
+        self.name = header.get('name') or os.path.splitext(os.path.basename(path))[0]
+
+        self.manager = header.get('manager')
+
+        self.team = header.get('team')
+
+        self.division = header.get('division')
+
+        self.position = header.get('position')
+
+        self.season = header.get('season')
+
+        self.week = header.get('week')
+
+        self.money = header.get('money')
+
+        if modified is None:
+            modified = header.get('saved_at')
+        self.modified = modified
+
+        # Saves written with pickle have no header
+        self.legacy = 'version' not in header
+
+
+def metadata(game_dict):
+    '''Header fields that describe a career'''
+    header = {
+        'name': game_dict.get('name'),
+        'season': game_dict.get('season'),
+        'week': game_dict.get('week'),
+        'ended': game_dict.get('ended'),
+        'saved_at': time.time(),
+    }
+    if game_dict.get('human_teams'):
+        team = game_dict['human_teams'][0]
+        header['team'] = team.name
+        header['manager'] = team.manager.name if team.manager else None
+        header['money'] = team.money
+        if team.division is not None:
+            header['division'] = team.division.name
+            header['position'] = team.division.team_position(team) or None
+    return header
+
+
+def _file_bytes(header, tables, strings):
+    header = dict(header, version = VERSION)
+    header = json.dumps(header, separators = (',', ':')).encode('utf-8')
+    body = zlib.compress(_pack(tables, strings), 6)
+    return _PREAMBLE.pack(MAGIC, VERSION, len(header)) + header + body
+
+
+def _read(data):
+    '''Splits the bytes of a save file into its header and its decompressed tables'''
+    magic, version, header_size = _PREAMBLE.unpack_from(data)
+    if version > VERSION:
+        raise SaveFileError('Save file version {} is newer than this game (version {})'.format(version, VERSION))
+    header = json.loads(data[_PREAMBLE.size:_PREAMBLE.size + header_size].decode('utf-8'))
+    tables, strings = _unpack(zlib.decompress(data[_PREAMBLE.size + header_size:]))
+    return header, tables, strings
+
+
+def dumps(game_dict):
+    '''Encodes the attributes of a game (Game.__dict__) as the bytes of a save file'''
+    tables, strings = _Writer().encode(game_dict)
+    return _file_bytes(metadata(game_dict), tables, strings)
+
+
+def loads(data):
+    '''Decodes the bytes of a save file into the attributes of a game
+
+    Returns:
+        dict: attributes to update a Game with, like the old pickled saves
+    '''
+    if not is_save_file(data):
+        return pickle.loads(data)
+    header, tables, strings = _read(data)
+    return _Reader(tables, strings).decode()
+
+
+def is_save_file(data):
+    '''Whether data starts like a save file of this format, instead of a pickle'''
+    return data[:len(MAGIC)] == MAGIC
+
+
+def journal_path(path):
+    return os.path.splitext(path)[0] + '.sfj'
+
+
+# JOURNAL
+def _diff(old, new):
+    '''Elements of the array new that differ from the array old, which it extends
+
+    Returns:
+        tuple: (positions, values, tail), with the changed elements among the
+            first len(old) elements and the elements appended after them, or
+            None if it is smaller to store all of new
+    '''
+    positions = array.array('i', [i for i, (a, b) in enumerate(zip(old, new)) if a != b])
+    if len(positions) * (positions.itemsize + new.itemsize) >= len(old) * new.itemsize:
+        return None
+    return positions, array.array(new.typecode, [new[i] for i in positions]), new[len(old):]
+
+
+def _patch(old_tables, old_strings, tables, strings):
+    '''Changes that turn the encoding old_tables into tables
+
+    Both encodings must come from writers that share row numbers and string
+    indices, so rows and strings are only ever appended.
+
+    Returns:
+        tuple: (index, arrays) of the patch
+    '''
+    arrays = []
+    changes = []
+    for name, table in tables.items():
+        old_columns = dict((field, old_arrays) for field, kind, old_arrays in old_tables[name]['columns'])
+        for field, kind, new_arrays in table['columns']:
+            for n, (old, new) in enumerate(zip(old_columns[field], new_arrays)):
+                if old.typecode == new.typecode and old == new:
+                    continue
+                # A column whose numbers changed between ints and floats changed its typecode
+                diff = _diff(old, new) if len(new) >= len(old) and new.typecode == old.typecode else None
+                if diff is None:
+                    changes.append([name, field, n, new.typecode, 'full', [len(new)]])
+                    arrays.append(new)
+                else:
+                    changes.append([name, field, n, new.typecode, 'sparse', [len(arr) for arr in diff]])
+                    arrays.extend(diff)
+
+    index = {
+        'rows': dict((name, table['rows']) for name, table in tables.items()),
+        'strings': strings[len(old_strings):],
+        'changes': changes,
+    }
+    return index, arrays
+
+
+def _apply_patch(tables, strings, index, arrays):
+    strings.extend(index['strings'])
+    for name, rows in index['rows'].items():
+        tables[name]['rows'] = rows
+
+    arrays = iter(arrays)
+    for name, field, n, typecode, mode, counts in index['changes']:
+        column_arrays = [column[2] for column in tables[name]['columns'] if column[0] == field][0]
+        if mode == 'full':
+            column_arrays[n] = next(arrays)
+        else:
+            positions, values, tail = next(arrays), next(arrays), next(arrays)
+            arr = column_arrays[n]
+            for position, value in zip(positions, values):
+                arr[position] = value
+            arr.extend(tail)
+
+
+def _journal_records(path, snapshot):
+    '''Reads the journal records of a snapshot, up to the first incomplete or damaged one
+
+    Yields:
+        tuple: (header, body) of each record, body still compressed
+    '''
+    path = journal_path(path)
+    if snapshot is None or not os.path.exists(path):
+        return
+    with open(path, 'rb') as f:
+        preamble = f.read(_JOURNAL_PREAMBLE.size)
+        if len(preamble) < _JOURNAL_PREAMBLE.size:
+            return
+        magic, version, snapshot_id = _JOURNAL_PREAMBLE.unpack(preamble)
+        if magic != JOURNAL_MAGIC or uuid.UUID(bytes = snapshot_id).hex != snapshot:
+            # Journal of an older snapshot
+            return
+        while True:
+            record = f.read(_RECORD.size)
+            if len(record) < _RECORD.size:
+                return
+            header_size, body_size, checksum = _RECORD.unpack(record)
+            data = f.read(header_size + body_size)
+            if len(data) < header_size + body_size or zlib.crc32(data) & 0xffffffff != checksum:
+                return
+            yield json.loads(data[:header_size].decode('utf-8')), data[header_size:]
+
+
+def _journal_header(path, header):
+    '''Header of the last complete journal record of a save, or the header of its snapshot'''
+    for record_header, body in _journal_records(path, header.get('snapshot')):
+        header = dict(header, **record_header)
+    return header
+
+
+class Journal(object):
+    '''Saves a career as a snapshot followed by a journal of the changes of every save
+
+    save appends to the journal only the array elements that changed since the
+    previous save. Every snapshot_every saves, when the journal grew larger than
+    the snapshot, or when the snapshot was written by somebody else, the whole
+    career is written again as a new snapshot and the journal starts empty.
+
+    A save has two steps: capture encodes the career as arrays, and must run
+    while the game does not change, and write compresses the arrays and writes
+    the files, and can run on another thread (see autosave.Autosave).
+    '''
+    def capture(self, game_dict, snapshot = False):
+        '''Encodes the career for write
+
+        Args:
+            game_dict (dict): attributes of the game
+            snapshot (bool): write the whole career instead of its changes
+
+        Returns:
+            dict: header, tables and strings of the career, and whether it
+                must be written as a snapshot
+        '''
+        snapshot = snapshot or self.rows is None or self.captures >= self.snapshot_every or self.journal_size > self.snapshot_size
+        # A snapshot drops the rows of the objects that are not part of the career anymore
+        writer = _Writer(None, None) if snapshot else _Writer(self.rows, self.captured_strings)
+        tables, strings = writer.encode(game_dict)
+
+        self.rows = writer.rows
+        self.captured_strings = strings
+        self.captures = 0 if snapshot else self.captures + 1
+        return {'header': metadata(game_dict), 'tables': tables, 'strings': strings, 'snapshot': snapshot}
+
+    def write(self, capture):
+        '''Writes a capture as a new snapshot, or appends its changes to the journal'''
+        try:
+            if capture['snapshot'] or self.tables is None or not os.path.exists(self.path) or _snapshot_header(self.path).get('snapshot') != self.snapshot_id:
+                self._write_snapshot(capture)
+            else:
+                self._append(capture)
+        except Exception:
+            # The files may not match self.tables anymore, so the next save writes a snapshot
+            self.tables = None
+            raise
+
+    def _write_snapshot(self, capture):
+        snapshot_id = uuid.uuid4()
+        header = dict(capture['header'], snapshot = snapshot_id.hex)
+        data = _file_bytes(header, capture['tables'], capture['strings'])
+        _write(self.path, data)
+        _write(journal_path(self.path), _JOURNAL_PREAMBLE.pack(JOURNAL_MAGIC, VERSION, snapshot_id.bytes))
+
+        self.snapshot_id = snapshot_id.hex
+        self.tables = capture['tables']
+        self.strings = capture['strings']
+        self.snapshot_size = len(data)
+        self.journal_size = _JOURNAL_PREAMBLE.size
+
+    def _append(self, capture):
+        index, arrays = _patch(self.tables, self.strings, capture['tables'], capture['strings'])
+
+        header = json.dumps(capture['header'], separators = (',', ':')).encode('utf-8')
+        body = json.dumps(index, separators = (',', ':')).encode('utf-8')
+        body = zlib.compress(_INDEX_SIZE.pack(len(body)) + body + b''.join(_little_endian(arr).tobytes() for arr in arrays), 6)
+        data = header + body
+        with open(journal_path(self.path), 'ab') as f:
+            f.write(_RECORD.pack(len(header), len(body), zlib.crc32(data) & 0xffffffff) + data)
+            f.flush()
+            os.fsync(f.fileno())
+
+        self.tables = capture['tables']
+        self.strings = capture['strings']
+        self.journal_size += _RECORD.size + len(data)
+
+    def snapshot(self, game_dict):
+        self.write(self.capture(game_dict, snapshot = True))
+
+    def save(self, game_dict):
+        self.write(self.capture(game_dict))
+
+    def __init__(self, path, snapshot_every = 10):
+        self.path = path
+
+        self.snapshot_every = snapshot_every
+
+        # Encoder state, used by capture
+        self.rows = None
+        self.captured_strings = None
+        self.captures = 0
+
+        # Files state, used by write
+        self.snapshot_id = None
+        self.tables = None
+        self.strings = None
+        self.snapshot_size = 0
+        self.journal_size = 0
+
+
+def _replay(path, header, tables, strings):
+    '''Applies the journal records of a save to the tables of its snapshot'''
+    for record_header, body in _journal_records(path, header.get('snapshot')):
+        body = zlib.decompress(body)
+        size = _INDEX_SIZE.unpack_from(body)[0]
+        index = json.loads(body[_INDEX_SIZE.size:_INDEX_SIZE.size + size].decode('utf-8'))
+        blob = body[_INDEX_SIZE.size + size:]
+
+        # The arrays of the changes follow each other in the blob
+        arrays = []
+        offset = 0
+        for name, field, n, typecode, mode, counts in index['changes']:
+            typecodes = [typecode] if mode == 'full' else ['i', typecode, typecode]
+            for spec_typecode, count in zip(typecodes, counts):
+                arr = _blob_array(blob, [spec_typecode, offset, count])
+                offset += count * arr.itemsize
+                arrays.append(arr)
+        _apply_patch(tables, strings, index, arrays)
+
+
+def _snapshot_header(path):
+    with open(path, 'rb') as f:
+        preamble = f.read(_PREAMBLE.size)
+        if len(preamble) < _PREAMBLE.size or not is_save_file(preamble):
+            return {}
+        magic, version, header_size = _PREAMBLE.unpack(preamble)
+        return json.loads(f.read(header_size).decode('utf-8'))
+
+
+def read_header(path):
+    '''Reads the header of a save file without its body
+
+    The header of the last journal record, if any, describes the save better
+    than the header of its snapshot.
+
+    Returns:
+        dict: header fields, empty for saves written with pickle
+    '''
+    header = _snapshot_header(path)
+    if not header:
+        return header
+    return _journal_header(path, header)
+
+
+def list_saves(folder):
+    '''Describes every save file of a folder, the most recently saved first
+
+    Returns:
+        list: SaveInfo of each save
+    '''
+    saves = []
+    for file_name in os.listdir(folder):
+        path = os.path.join(folder, file_name)
+        if not file_name.endswith('.sfm') or not os.path.isfile(path) or os.path.getsize(path) == 0:
+            continue
+        try:
+            header = read_header(path)
+        except (IOError, ValueError):
+            header = {}
+        modified = os.path.getmtime(path)
+        if os.path.exists(journal_path(path)):
+            modified = max(modified, os.path.getmtime(journal_path(path)))
+        saves.append(SaveInfo(path, header, modified = modified))
+    saves.sort(key = lambda x: x.modified, reverse = True)
+    return saves
+
+
+def _write(path, data):
+    '''Writes a file atomically: a crash leaves either the old or the new file'''
+    temp_path = path + '.tmp'
+    with open(temp_path, 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+
+
+def save(path, game_dict):
+    '''Writes the whole career, and removes the journal of an older snapshot'''
+    _write(path, dumps(game_dict))
+    if os.path.exists(journal_path(path)):
+        os.remove(journal_path(path))
+
+
+def load(path):
+    '''Loads a save file, replaying its journal on top of the snapshot'''
+    with open(path, 'rb') as f:
+        data = f.read()
+    if not is_save_file(data):
+        return pickle.loads(data)
+    header, tables, strings = _read(data)
+    _replay(path, header, tables, strings)
+    return _Reader(tables, strings).decode()
+
+
+def delete(path):
+    '''Removes a save file and its journal'''
+    for file_path in (path, journal_path(path)):
+        if os.path.exists(file_path):
+            os.remove(file_path)
+
+
+def convert(path, output = None):
+    '''Rewrites a pickled save file in the columnar format
+
+    Returns:
+        bool: False if the file was already in the columnar format
+    '''
+    with open(path, 'rb') as f:
+        data = f.read()
+    if is_save_file(data) and output is None:
+        return False
+    save(output or path, loads(data))
+    return True
+
+
+def main(argv = None):
+    paths = sys.argv[1:] if argv is None else argv
+    if not paths:
+        print('usage: python -m lib.savefile SAVE.sfm [SAVE.sfm ...]')
+        return 2
+    for path in paths:
+        before = os.path.getsize(path)
+        if convert(path):
+            print('{}: {} -> {} bytes'.format(path, before, os.path.getsize(path)))
+        else:
+            print('{}: already converted'.format(path))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,61 @@
+# coding: latin1
+'''Headless simulation of SimpleFM careers.
+
+Plays weeks or whole seasons with Game.fast_forward and writes one compact
+JSON line per week (results of every division) and per season (final tables):
+
+    python -m lib.simulate --seasons 100 --seed 1 --output seasons.jsonl
+'''
+import argparse
+import json
+import sys
+from . import db
+from . import parallel
+from .Game import Game
+
+
+def new_game(team_name = None, manager_name = 'Simulation', seed = None):
+    '''Starts a game, with the human team team_name or with AI teams only'''
+    game = Game(name = 'Simulation', seed = seed)
+    if team_name:
+        templates = [team for team in db.TEAMS if team['name'] == team_name]
+        if not templates:
+            raise ValueError('Unknown team: {}'.format(team_name))
+        template = templates[0]
+        human_team = {'name': template['name'], 'color': template['color'], 'country': template['country'], 'prev_div': None, 'prev_pos': None}
+        game.start(human_team = human_team, manager = {'name': manager_name})
+    else:
+        game.start()
+    game.start_of_season()
+    return game
+
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(prog = 'python -m lib.simulate', description = 'Simulate SimpleFM seasons without an interface.')
+    parser.add_argument('--seasons', type = int, help = 'number of seasons to play (default: finish the current season)')
+    parser.add_argument('--weeks', type = int, help = 'number of weeks to play')
+    parser.add_argument('--seed', type = int, help = 'seed for a reproducible run')
+    parser.add_argument('--team', help = 'name of a team to play as the human team')
+    parser.add_argument('--processes', type = int, help = 'resolve the divisions without human teams in this many worker processes')
+    parser.add_argument('--seasons-only', action = 'store_true', help = 'only write the end of season tables')
+    parser.add_argument('--output', help = 'file to write the results to (default: stdout)')
+    args = parser.parse_args(argv)
+
+    game = new_game(args.team, seed = args.seed)
+
+    out = open(args.output, 'w') if args.output else sys.stdout
+
+    def _write(record):
+        out.write(json.dumps(record, separators = (',', ':')) + '\n')
+
+    try:
+        game.fast_forward(weeks = args.weeks, seasons = args.seasons, processes = args.processes, report = _write, report_weeks = not args.seasons_only)
+    finally:
+        parallel.shutdown()
+        if args.output:
+            out.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
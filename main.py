@@ -23,7 +23,10 @@ from gui.screens.ManagerStatsScreen import ManagerStatsScreen
 import os
 from kivy.lang import Builder
 from kivy.app import App
+from kivy.clock import mainthread
 from kivy.uix.screenmanager import ScreenManager
+from gui.widgets.GlobalWidgets import Information
+from lib import autosave, parallel
 import gui.helpers
 
 
@@ -44,6 +47,7 @@ class SimpleFMScreenManager(ScreenManager):
 class SimpleFMApp(App):
     GAME = None
     start_screen = None
+    saver = None
 
     def get_games_folder(self):
         root_folder = self.user_data_dir
@@ -52,6 +56,28 @@ class SimpleFMApp(App):
             os.makedirs(games_folder)
         return games_folder
 
+    def save_game(self, wait=False):
+        # The career is captured here, and written on the autosave thread
+        if not self.GAME:
+            return
+        path = os.path.join(self.get_games_folder(), self.GAME.name + '.sfm')
+        if not self.saver or self.saver.path != path:
+            if self.saver:
+                self.saver.close()
+            self.saver = autosave.Autosave(path, report=self.save_report)
+        self.saver.save(self.GAME.__dict__)
+        if wait:
+            self.saver.wait()
+
+    def save_report(self, event, error):
+        if event == autosave.FAILED:
+            self.show_save_error(error)
+
+    @mainthread
+    def show_save_error(self, error):
+        popup = Information()
+        popup.show('Unable to save', str(error))
+
     def current_team_color(self, a=None):
         color = gui.helpers.color('')
         if self.GAME:
@@ -152,17 +178,17 @@ class SimpleFMApp(App):
         return root
 
     def on_stop(self):
-        folder = self.get_games_folder()
         if self.GAME:
             self.GAME.last_screen = self.root.current
-            self.GAME.save(folder)
+            self.save_game(wait=True)
+        parallel.shutdown()
         return True
 
     def on_pause(self):
-        folder = self.get_games_folder()
         if self.GAME:
             self.GAME.last_screen = self.root.current
-            self.GAME.save(folder)
+            # Android can kill the app at any point after on_pause returns
+            self.save_game(wait=True)
         return True
 
     def on_resume(self):
@@ -0,0 +1,162 @@
+import random
+import unittest
+from unittest import mock
+
+from lib import batch, match_model, parallel, simulate
+from lib.Division import Division
+from lib.Game import Game
+from lib.Match import Match
+from lib.Team import Team
+
+
+def _ai_team(name, avg_skill, tactic):
+    division = Division(name="League", level=0)
+    team = Team(name=name, country="Por", color="Blue", avg_skill=avg_skill, tactic=tactic, division=division)
+    division.teams.append(team)
+    return team
+
+
+class TestStrengthTable(unittest.TestCase):
+    def test_table_follows_tactic_and_skill_changes(self) -> None:
+        team = _ai_team("Table", 12.5, [5, 2, 3])
+        for minutes in (0, 45, 90):
+            self.assertEqual(list(team.tactical_skill(True, minutes)), team._tactical_skill(True, minutes))
+
+        team.tactic = [4, 4, 2]
+        self.assertEqual(list(team.tactical_skill(True, 10)), team._tactical_skill(True, 10))
+        team.avg_skill = 8.0
+        self.assertEqual(list(team.tactical_skill(True, 10)), team._tactical_skill(True, 10))
+
+
+@unittest.skipUnless(batch.available(), "numpy is not installed")
+class TestBatchEngine(unittest.TestCase):
+    def setUp(self) -> None:
+        random.seed(7)
+        self.home = _ai_team("Home", 14.0, [4, 4, 2])
+        self.away = _ai_team("Away", 11.0, [3, 4, 3])
+
+    def test_results_are_applied_like_a_simulated_match(self) -> None:
+        matches = [Match(teams=[self.home, self.away]) for _ in range(50)]
+        batch.simulate_matches(matches)
+
+        for match in matches:
+            self.assertTrue(match.finished)
+            self.assertEqual(match.minutes, 90)
+            self.assertEqual(sum(match.possession), 90)
+            self.assertEqual(sum(minute["possession"] for minute in match.replay()), match.possession[1])
+            self.assertEqual(match.replay()[-1]["score"], match.score)
+            self.assertEqual(len(match.goalscorers), sum(match.score))
+
+        stats = self.home.league_stats
+        self.assertEqual(stats["Wins"] + stats["Draws"] + stats["Losses"], 50)
+        self.assertEqual(stats["Goals For"], sum(m.score[0] for m in matches))
+        self.assertEqual(stats["Goals Against"], self.away.league_stats["Goals For"])
+
+    def test_seeded_matches_play_like_the_serial_engine(self) -> None:
+        def _record(match):
+            return match.score, match.possession, match.possession_log, [(goal["minute"], goal["team"].name, goal["scorer"]) for goal in match.goalscorers]
+
+        serial = [Match(teams=[self.home, self.away], seed=seed) for seed in range(40)]
+        for match in serial:
+            match.simulate()
+        batched = [Match(teams=[self.home, self.away], seed=seed) for seed in range(40)]
+        batch.simulate_matches(batched)
+        self.assertEqual([_record(m) for m in batched], [_record(m) for m in serial])
+        plain = [Match(teams=[self.home, self.away], seed=seed) for seed in range(40)]
+        with mock.patch.object(batch, "numpy", None):
+            batch.simulate_matches(plain)
+        self.assertEqual([_record(m) for m in plain], [_record(m) for m in serial])
+        self.assertTrue(any(m.goalscorers for m in serial))
+
+    def test_score_distribution_matches_serial_engine(self) -> None:
+        runs = 600
+        serial = [Match(teams=[self.home, self.away]) for _ in range(runs)]
+        for match in serial:
+            match.simulate()
+        batched = [Match(teams=[self.home, self.away]) for _ in range(runs)]
+        batch.simulate_matches(batched)
+
+        for side in range(2):
+            serial_mean = sum(m.score[side] for m in serial) / float(runs)
+            batched_mean = sum(m.score[side] for m in batched) / float(runs)
+            self.assertAlmostEqual(serial_mean, batched_mean, delta=0.25)
+
+
+@unittest.skipUnless(batch.available(), "numpy is not installed")
+class TestSeasonPrediction(unittest.TestCase):
+    def setUp(self) -> None:
+        random.seed(5)
+        self.game = Game(name="Prediction")
+        self.game.start()
+        self.game.start_of_season()
+        self.division = self.game.divisions[1]
+
+    def test_chances_are_probabilities_and_nothing_changes(self) -> None:
+        for _ in range(10):
+            self.game.simulate_weekly_matches()
+            self.game.next_week()
+        self.division.resolve()
+        stats = [dict(team.league_stats) for team in self.division.teams]
+
+        chances = self.division.predict_final_table(500, seed=3)
+        hits = match_model.cache.hits
+        self.division.predict_final_table(50, seed=3)
+        self.assertGreater(match_model.cache.hits, hits)
+
+        self.assertEqual(stats, [dict(team.league_stats) for team in self.division.teams])
+        self.assertFalse(any(match.finished for match in self.division.matches[self.game.week]))
+        self.assertAlmostEqual(sum(c["Title"] for c in chances.values()), 1.0)
+        self.assertAlmostEqual(sum(c["Promotion"] for c in chances.values()), 3.0)
+        self.assertAlmostEqual(sum(c["Relegation"] for c in chances.values()), 3.0)
+        for c in chances.values():
+            self.assertAlmostEqual(sum(c["Positions"]), 1.0)
+
+    def test_finished_season_is_certain(self) -> None:
+        self.game.fast_forward(weeks=30)
+        chances = self.division.predict_final_table(50)
+        table = self.division.ordered_table_by_position()
+        self.assertEqual(chances[table[0]]["Title"], 1.0)
+        self.assertEqual(chances[table[-1]]["Relegation"], 1.0)
+        self.assertEqual(chances[table[5]]["Positions"][5], 1.0)
+
+
+@unittest.skipUnless(batch.available(), "numpy is not installed")
+class TestParallelDivisions(unittest.TestCase):
+    def setUp(self) -> None:
+        # Start the workers even on a machine with a single CPU
+        patcher = mock.patch.object(parallel, "usable", side_effect=lambda processes: processes)
+        self.usable = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self) -> None:
+        parallel.shutdown()
+
+    def _play(self, processes, **kwargs):
+        game = simulate.new_game(seed=11)
+        game.fast_forward(processes=processes, report_weeks=False, report=lambda record: None, **kwargs)
+        game.resolve_divisions(processes)
+        for division in game.divisions:
+            self.assertIsNone(division.deferred)
+        teams = [
+            (team.name, dict(team.league_stats), team.money, team.fan_happiness, team.weekly_finances, team.weekly_news.str_list())
+            for division in game.divisions
+            for team in division.teams
+        ]
+        scores = [(match.score, match.possession) for division in game.divisions for week in division.matches for match in week if match.finished]
+        return teams, scores
+
+    def test_parallel_weeks_match_serial_weeks(self) -> None:
+        self.assertEqual(self._play(None, weeks=parallel.MIN_WEEKS + 2), self._play(2, weeks=parallel.MIN_WEEKS + 2))
+        self.assertTrue(parallel._executors)
+
+    def test_parallel_season_matches_serial_season(self) -> None:
+        self.assertEqual(self._play(None, seasons=1), self._play(2, seasons=1))
+
+    def test_single_cpu_plays_in_the_main_process(self) -> None:
+        self.usable.side_effect = lambda processes: 1
+        self.assertEqual(self._play(None, weeks=parallel.MIN_WEEKS + 2), self._play(4, weeks=parallel.MIN_WEEKS + 2))
+        self.assertFalse(parallel._executors)
+
+
+if __name__ == "__main__":
+    unittest.main()
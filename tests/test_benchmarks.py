@@ -0,0 +1,28 @@
+import unittest
+
+from benchmarks import run
+
+
+class TestBenchmarks(unittest.TestCase):
+    def test_results_and_comparison(self) -> None:
+        results = run.run_benchmarks(["match_minute", "save", "load"], warmup=0, repeat=2)
+        self.assertEqual(set(results["benchmarks"]), {"match_minute", "save", "load"})
+        minute = results["benchmarks"]["match_minute"]
+        self.assertEqual(minute["operations"], 90)
+        self.assertEqual(len(minute["runs"]), 2)
+        self.assertLessEqual(minute["min"], minute["median"])
+
+        baseline = {"benchmarks": {"match_minute": dict(minute, median=minute["median"] / 2), "load": results["benchmarks"]["load"]}}
+        rows = {name: (ratio, regressed) for name, before, after, ratio, regressed in run.compare(results, baseline, threshold=0.5)}
+        self.assertEqual(set(rows), {"match_minute", "load"})
+        self.assertAlmostEqual(rows["match_minute"][0], 2.0)
+        self.assertTrue(rows["match_minute"][1])
+        self.assertFalse(rows["load"][1])
+
+    def test_unknown_benchmark(self) -> None:
+        with self.assertRaises(ValueError):
+            run.run_benchmarks(["nothing"])
+
+
+if __name__ == "__main__":
+    unittest.main()
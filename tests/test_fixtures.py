@@ -0,0 +1,37 @@
+import random
+import unittest
+
+from lib import savefile
+from lib.Game import Game
+
+
+class TestFixtures(unittest.TestCase):
+    def setUp(self) -> None:
+        random.seed(13)
+        self.game = Game(name="Fixtures")
+        self.game.start()
+        self.game.start_of_season()
+
+    def test_fixtures_match_the_schedule(self) -> None:
+        division = self.game.divisions[2]
+        for team in division.teams:
+            matches = team.fixture_list()
+            self.assertEqual(matches, [m for week in division.matches for m in week if team in m.teams])
+            self.assertEqual(team.fixture_list(10), matches[10:])
+            for week, match in enumerate(matches):
+                self.assertIs(team.next_match(week), match)
+                home = match.teams[0] is team
+                self.assertIs(team.next_opponent(week), match.teams[1] if home else match.teams[0])
+                self.assertEqual(team.next_match_to_str(week).endswith("(Home)"), home)
+        self.assertIsNone(division.teams[0].next_match(len(division.matches)))
+
+    def test_fixtures_are_indexed_again_after_loading(self) -> None:
+        loaded = Game()
+        loaded.__dict__.update(savefile.loads(savefile.dumps(self.game.__dict__)))
+        team = loaded.divisions[0].teams[3]
+        self.assertEqual(len(team.fixture_list()), len(loaded.divisions[0].matches))
+        self.assertIn(team, team.next_match(4).teams)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,25 @@
+import random
+import unittest
+
+from lib import helpers
+
+
+class TestWeightedSampler(unittest.TestCase):
+    def test_draws_like_weighted_choice(self) -> None:
+        choices = [("gk", 0), ("def", 0.03), ("mid", 0.09), ("atk", 0.88), ("none", 0), ("sub", 0.4)]
+        sampler = helpers.WeightedSampler(choices)
+        self.assertEqual(len(sampler), len(choices))
+
+        random.seed(3)
+        expected = [helpers.weighted_choice(choices) for _ in range(2000)]
+        random.seed(3)
+        self.assertEqual([sampler.choice() for _ in range(2000)], expected)
+        self.assertNotIn("gk", expected)
+        self.assertNotIn("none", expected)
+
+    def test_empty_sampler_draws_nothing(self) -> None:
+        self.assertIsNone(helpers.WeightedSampler([]).choice())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+import random
+import unittest
+from unittest import mock
+
+from lib import match_model
+from lib.Division import Division
+from lib.Match import Match
+from lib.Team import Team
+
+
+def _ai_team(name, avg_skill, tactic):
+    division = Division(name="League", level=0)
+    team = Team(name=name, country="Por", color="Blue", avg_skill=avg_skill, tactic=tactic, division=division)
+    division.teams.append(team)
+    return team
+
+
+class TestMatchModel(unittest.TestCase):
+    def setUp(self) -> None:
+        random.seed(11)
+        self.home = _ai_team("Home", 14.0, [4, 4, 2])
+        self.away = _ai_team("Away", 11.0, [3, 4, 3])
+
+    def test_distribution_matches_serial_engine(self) -> None:
+        model = match_model.model(Match(teams=[self.home, self.away]))
+        self.assertAlmostEqual(sum(map(sum, model.distribution)), 1.0)
+        self.assertAlmostEqual(sum(model.outcome_probabilities()), 1.0)
+        with mock.patch.object(match_model, "numpy", None):
+            fallback = match_model.model(Match(teams=[self.home, self.away]))
+        for row, fallback_row in zip(model.distribution, fallback.distribution):
+            for p, q in zip(row, fallback_row):
+                self.assertAlmostEqual(p, q)
+
+        runs = 1500
+        serial = [Match(teams=[self.home, self.away]) for _ in range(runs)]
+        for match in serial:
+            match.simulate()
+        home, away = model.expected_goals()
+        self.assertAlmostEqual(sum(m.score[0] for m in serial) / runs, home, delta=0.15)
+        self.assertAlmostEqual(sum(m.score[1] for m in serial) / runs, away, delta=0.15)
+        wins = sum(m.score[0] > m.score[1] for m in serial) / runs
+        self.assertAlmostEqual(wins, model.outcome_probabilities()[0], delta=0.05)
+
+    def test_win_probabilities_follow_the_match(self) -> None:
+        match = Match(teams=[self.home, self.away])
+        expected = match_model.model(match).outcome_probabilities()
+        for p, q in zip(match.win_probabilities(), expected):
+            self.assertAlmostEqual(p, q)
+
+        table = match._outcomes
+        while match.minutes < 70:
+            match.minute()
+            probabilities = match.win_probabilities()
+            self.assertIs(match._outcomes, table)
+        for p, q in zip(probabilities, match_model.model(match).outcome_probabilities()):
+            self.assertAlmostEqual(p, q)
+
+        self.home.tactic = [5, 3, 2]
+        match.win_probabilities()
+        self.assertIsNot(match._outcomes, table)
+        match.simulate()
+        self.assertEqual(match.win_probabilities().index(1.0), [match.score[0] > match.score[1], match.score[0] == match.score[1], True].index(True))
+
+    def test_cache_counts_and_evicts_pairings(self) -> None:
+        cache = match_model.ScoreCache(size=2)
+        teams = [self.home, self.away, _ai_team("Third", 9.0, [4, 4, 2])]
+        first = cache.model(Match(teams=teams[:2]))
+        self.assertIs(cache.model(Match(teams=teams[:2])), first)
+        self.assertEqual((cache.hits, cache.misses, cache.evictions), (1, 1, 0))
+
+        models = cache.models([Match(teams=[teams[1], teams[2]]), Match(teams=[teams[2], teams[0]]), Match(teams=[teams[1], teams[2]])])
+        self.assertIs(models[0], models[2])
+        self.assertEqual((cache.hits, cache.misses, cache.evictions, len(cache)), (2, 3, 1, 2))
+        for p, q in zip(models[1].distribution[1], match_model.model(Match(teams=[teams[2], teams[0]])).distribution[1]):
+            self.assertAlmostEqual(p, q)
+
+        playing = Match(teams=teams[:2])
+        playing.minute()
+        self.assertIsNone(cache.key(playing))
+        self.assertIsNot(cache.model(playing), first)
+        self.assertEqual(cache.misses, 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
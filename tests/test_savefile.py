@@ -0,0 +1,298 @@
+import os
+import pickle
+import random
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from lib import autosave, constants, savefile
+from lib.Game import Game
+from lib.Player import Player
+from tui.state import SimpleFMState
+
+
+class TestSaveFile(unittest.TestCase):
+    def setUp(self) -> None:
+        random.seed(21)
+        self.temp_dir = tempfile.mkdtemp()
+        self.state = SimpleFMState(save_dir=self.temp_dir)
+        self.state.start_new_game(
+            game_name="Career",
+            manager_name="Alex",
+            team_name=self.state.list_selectable_teams()[20]["name"],
+        )
+        self.game = self.state.game
+        for _ in range(5):
+            self.game.simulate_weekly_matches()
+            self.game.next_week()
+
+    def tearDown(self) -> None:
+        self.state.close()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def _body(self, data: bytes) -> bytes:
+        magic, version, header_size = savefile._PREAMBLE.unpack_from(data)
+        return data[savefile._PREAMBLE.size + header_size:]
+
+    def test_round_trip_keeps_the_career(self) -> None:
+        data = savefile.dumps(self.game.__dict__)
+        self.assertTrue(savefile.is_save_file(data))
+        self.assertLess(len(data), len(pickle.dumps(self.game.__dict__)))
+
+        loaded = Game()
+        loaded.__dict__.update(savefile.loads(data))
+        self.assertEqual(self._body(savefile.dumps(loaded.__dict__)), self._body(data))
+
+        team = loaded.human_teams[0]
+        original = self.game.human_teams[0]
+        self.assertIs(team.manager.team, team)
+        self.assertIn(team, team.division.teams)
+        self.assertEqual([(p.name, p.skill, p.age, p.salary) for p in team.players], [(p.name, p.skill, p.age, p.salary) for p in original.players])
+        self.assertEqual(team.league_stats, original.league_stats)
+        self.assertEqual(team.weekly_news.str_list(), original.weekly_news.str_list())
+
+        finished = loaded.divisions[0].resolved_matches(0)[0]
+        self.assertTrue(finished.finished)
+        for goal in finished.goalscorers:
+            self.assertIn(goal["team"], finished.teams)
+
+        loaded.simulate_weekly_matches()
+        loaded.next_week()
+        self.assertEqual(loaded.week, 6)
+
+    def test_legacy_pickle_is_loaded_and_converted(self) -> None:
+        path = os.path.join(self.temp_dir, "Career.sfm")
+        with open(path, "wb") as f:
+            pickle.dump(self.game.__dict__, f)
+
+        game = self.state.load_game("Career")
+        self.assertEqual(game.week, 5)
+
+        self.assertTrue(savefile.convert(path))
+        self.assertFalse(savefile.convert(path))
+        with open(path, "rb") as f:
+            self.assertTrue(savefile.is_save_file(f.read()))
+        self.assertEqual(self.state.load_game("Career").human_teams[0].name, self.game.human_teams[0].name)
+
+    def test_headers_describe_saves_without_loading_them(self) -> None:
+        self.state.save_game()
+        self.state.wait_for_saves()
+        with open(os.path.join(self.temp_dir, "Old.sfm"), "wb") as f:
+            pickle.dump({"name": "Old"}, f)
+
+        saves = savefile.list_saves(self.temp_dir)
+        self.assertEqual(sorted(save.name for save in saves), ["Career", "Old"])
+        career = [save for save in saves if save.name == "Career"][0]
+        team = self.game.human_teams[0]
+        self.assertFalse(career.legacy)
+        self.assertEqual((career.team, career.manager, career.week, career.season), (team.name, "Alex", 5, 1))
+        self.assertEqual(career.division, team.division.name)
+        self.assertEqual(career.position, team.league_position())
+        self.assertEqual(career.load()["week"], 5)
+        self.assertTrue([save for save in saves if save.name == "Old"][0].legacy)
+
+        descriptions = dict((save["name"], save["description"]) for save in self.state.saved_games())
+        self.assertIn(team.name, descriptions["Career"])
+
+    def test_journal_replays_weekly_autosaves(self) -> None:
+        path = os.path.join(self.temp_dir, "Career.sfm")
+        for _ in range(3):
+            self.state.continue_week()
+            self.state.wait_for_saves()
+        self.assertTrue(os.path.exists(savefile.journal_path(path)))
+
+        data = savefile.load(path)
+        self.assertEqual(data["week"], 8)
+        self.assertEqual(savefile._pack(*savefile._Writer().encode(data)), savefile._pack(*savefile._Writer().encode(self.game.__dict__)))
+        self.assertEqual(savefile.list_saves(self.temp_dir)[0].week, 8)
+
+    def test_numbers_keep_their_type(self) -> None:
+        self.game.seed = 2**60 + 1
+        self.game.human_teams[0].fan_happiness = True
+        loaded = savefile.loads(savefile.dumps(self.game.__dict__))
+        self.assertEqual(loaded["seed"], 2**60 + 1)
+        self.assertIs(loaded["human_teams"][0].fan_happiness, True)
+
+        values = [2**60 + 1, True, None, -3, 2**70]
+        writer = savefile._Writer()
+        for column in (values, values + [1.5]):
+            arrays = writer.numbers(column)
+            self.assertEqual(savefile._Reader({}, writer.strings).numbers(*arrays), column)
+            self.assertIs(savefile._Reader({}, writer.strings).numbers(*arrays)[1], True)
+
+    def test_journal_follows_columns_between_ints_and_floats(self) -> None:
+        path = os.path.join(self.temp_dir, "Numbers.sfm")
+        journal = savefile.Journal(path)
+        for seed in (5, 2.5, 2**60 + 1):
+            self.game.seed = seed
+            journal.save(self.game.__dict__)
+            self.assertEqual(savefile.load(path)["seed"], seed)
+
+    def test_truncated_journal_record_is_ignored(self) -> None:
+        path = os.path.join(self.temp_dir, "Career.sfm")
+        for _ in range(2):
+            self.state.continue_week()
+            self.state.wait_for_saves()
+        with open(savefile.journal_path(path), "r+b") as f:
+            f.truncate(os.path.getsize(savefile.journal_path(path)) - 10)
+
+        self.assertEqual(savefile.load(path)["week"], 6)
+        self.assertEqual(self.state.load_game("Career").week, 6)
+
+        savefile.delete(path)
+        self.assertFalse(os.path.exists(savefile.journal_path(path)))
+
+    def test_background_saves_are_merged_and_report_failures(self) -> None:
+        reports = []
+        saver = autosave.Autosave(os.path.join(self.temp_dir, "missing", "Career.sfm"), report=lambda event, error: reports.append((event, error)))
+        saver.save(self.game.__dict__)
+        self.assertTrue(saver.wait(10))
+        self.assertEqual(reports[-1][0], autosave.FAILED)
+        self.assertIsNotNone(saver.error)
+
+        os.mkdir(os.path.join(self.temp_dir, "missing"))
+        for _ in range(3):
+            self.game.simulate_weekly_matches()
+            self.game.next_week()
+            saver.save(self.game.__dict__)
+        self.assertTrue(saver.close(10))
+        self.assertEqual(reports[-1], (autosave.SAVED, None))
+        self.assertEqual(savefile.load(saver.path)["week"], 8)
+
+    def test_player_ids_survive_save_and_load(self) -> None:
+        team = self.game.human_teams[0]
+        registry = self.game.player_registry()
+        target = self.state.transfer_targets()[0]
+        self.assertTrue(registry.on_transfer_list(target.identifier))
+        self.state.buy_player(target.identifier)
+        self.assertIs(registry.team(target.identifier), team)
+        self.assertFalse(registry.on_transfer_list(target.identifier))
+
+        self.game.next_week()
+        listed = [player.id for player in team.transfer_list()]
+        self.assertTrue(all(registry.on_transfer_list(player_id) for player_id in listed))
+
+        self.state.save_game()
+        self.state.wait_for_saves()
+        loaded = self.state.load_game("Career")
+        loaded_team = loaded.human_teams[0]
+        self.assertEqual([(p.id, p.name) for p in loaded_team.players], [(p.id, p.name) for p in team.players])
+        self.assertEqual(loaded_team.id_to_player(target.identifier).name, target.name)
+        self.assertEqual([p.id for p in loaded_team.players_to_buy], listed)
+
+        sold = [p for p in loaded_team.players if p.id != target.identifier and p.position != 0][0]
+        sold.contract = 0
+        self.assertTrue(loaded_team.sell_player(sold))
+        self.assertIsNone(loaded.player(sold.id))
+        self.assertIsNone(loaded_team.id_to_player(sold.id))
+
+    def test_slotted_players_load_from_old_pickles(self) -> None:
+        player = self.game.human_teams[0].players[0]
+        self.assertFalse(hasattr(player, "__dict__"))
+
+        state = player.__getstate__()
+        del state["id"]
+        state["weekly_stats"] = {"Games": 1}
+        old = Player.__new__(Player)
+        old.__setstate__(state)
+        self.assertIsNone(old.id)
+        self.assertEqual((old.name, old.skill), (player.name, player.skill))
+
+        copy = pickle.loads(pickle.dumps(player))
+        self.assertEqual(copy.__getstate__()["salary"], player.salary)
+
+    def test_ai_goals_reference_phantom_scorers(self) -> None:
+        goals = [goal for week in range(5) for match in self.game.divisions[0].resolved_matches(week) for goal in match.goalscorers if not goal["team"].human]
+        self.assertTrue(goals)
+        for goal in goals:
+            self.assertIsNone(goal["player"])
+            self.assertIn(goal["scorer"], range(len(goal["team"].scorers)))
+
+        writer = savefile._Writer()
+        writer.encode(self.game.__dict__)
+        self.assertTrue(all(goal["team"].human for goal in writer.rows["goals"] if goal["player"] is not None))
+
+        loaded = Game()
+        loaded.__dict__.update(savefile.loads(savefile.dumps(self.game.__dict__)))
+        match, original = loaded.divisions[0].matches[0][0], self.game.divisions[0].matches[0][0]
+        self.assertEqual([match.goalscorer_name(goal) for goal in match.goalscorers], [original.goalscorer_name(goal) for goal in original.goalscorers])
+
+    def test_finished_matches_are_compacted_and_replayed(self) -> None:
+        team = self.game.human_teams[0]
+        matches = [team.next_match(week) for week in range(5)]
+        self.assertTrue(any(goal["team"] is team for match in matches for goal in match.goalscorers))
+
+        loaded = Game()
+        loaded.__dict__.update(savefile.loads(savefile.dumps(self.game.__dict__)))
+        loaded_team = loaded.human_teams[0]
+        for week, match in enumerate(matches):
+            for goal in match.goalscorers:
+                self.assertIsNone(goal["player"])
+                if goal["team"] is team:
+                    self.assertEqual(goal["name"], [p.name for p in team.players if p.id == goal["scorer"]][0])
+
+            replay = match.replay()
+            self.assertEqual(len(replay), 90)
+            self.assertEqual(sum(minute["possession"] for minute in replay), match.possession[1])
+            self.assertEqual(replay[-1]["score"], match.score)
+            loaded_match = loaded_team.next_match(week)
+            self.assertEqual(loaded_match.seed, match.seed)
+            self.assertEqual((loaded_match.injury_log, loaded_match.substitution_log), (match.injury_log, match.substitution_log))
+            loaded_replay = loaded_match.replay()
+            self.assertEqual([(m["possession"], m["score"]) for m in loaded_replay], [(m["possession"], m["score"]) for m in replay])
+
+        # Matches of saves older than the logs keep None
+        matches[0].injury_log = None
+        loaded.__dict__.update(savefile.loads(savefile.dumps(self.game.__dict__)))
+        self.assertIsNone(loaded.human_teams[0].next_match(0).injury_log)
+        self.assertEqual(loaded.human_teams[0].next_match(1).injury_log, matches[1].injury_log)
+
+    def test_loaded_career_does_not_reuse_ids_of_sold_players(self) -> None:
+        team = self.game.human_teams[0]
+        player = Player(skill=10, position=2, team=team)
+        team.players.append(player)
+        team.registry.add(player, team)
+        self.assertTrue(team.sell_player(player))
+        self.assertIsNone(self.game.player(player.id))
+        data = savefile.dumps(self.game.__dict__)
+
+        # A new process starts giving ids from 0
+        with mock.patch.object(Player, "last_id", 0):
+            loaded = Game()
+            loaded.__dict__.update(savefile.loads(data))
+            loaded.player_registry()
+            new_players = [Player(skill=10, position=2) for _ in range(3)]
+
+        used = {player.id} | set(loaded.player_registry().entries)
+        self.assertFalse(used & {new.id for new in new_players})
+
+    def test_match_saved_while_played_goes_on_with_its_streams(self) -> None:
+        match = self.state.begin_match()
+        with mock.patch.dict(constants.MATCH, {"INJURY_PROBABILITY_PER_MINUTE": 0.1}):
+            for _ in range(30):
+                self.state.play_minute()
+            data = savefile.dumps(self.game.__dict__)
+            loaded = Game()
+            loaded.__dict__.update(savefile.loads(data))
+            resumed = loaded.human_teams[0].next_match(loaded.week)
+            self.assertEqual(resumed.minutes, 30)
+
+            self.state.finish_match()
+            resumed.simulate(90)
+
+        self.assertTrue(match.injury_log)
+        self.assertEqual(
+            (resumed.score, resumed.possession_log, resumed.injury_log, [(goal["minute"], goal["scorer"]) for goal in resumed.goalscorers]),
+            (match.score, match.possession_log, match.injury_log, [(goal["minute"], goal["scorer"]) for goal in match.goalscorers]),
+        )
+
+    def test_newer_version_is_refused(self) -> None:
+        data = bytearray(savefile.dumps(self.game.__dict__))
+        data[len(savefile.MAGIC)] = savefile.VERSION + 1
+        with self.assertRaises(savefile.SaveFileError):
+            savefile.loads(bytes(data))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,97 @@
+import io
+import json
+import random
+import unittest
+from contextlib import redirect_stdout
+from unittest import mock
+
+from lib import batch, simulate
+
+
+def _results(game):
+    return [
+        (
+            [(t.name, t.league_stats, t.money, t.fan_happiness, t.weekly_finances, t.yearly_finances, [(n.category, n.data) for n in t.weekly_news.news]) for t in div.ordered_table_by_position()],
+            [m.score for week in div.matches for m in week],
+        )
+        for div in game.divisions if div.playable
+    ]
+
+
+class TestFastForward(unittest.TestCase):
+    def setUp(self) -> None:
+        random.seed(4)
+
+    def test_weeks_and_reports(self) -> None:
+        game = simulate.new_game()
+        reports = []
+        played = game.fast_forward(weeks=4, report=reports.append)
+        self.assertEqual(played, 4)
+        self.assertEqual(game.week, 4)
+        self.assertEqual([r["week"] for r in reports], [1, 2, 3, 4])
+        self.assertEqual(len(reports[0]["results"]), 4)
+
+    def test_season_with_human_team(self) -> None:
+        game = simulate.new_game("Benfica")
+        reports = []
+        game.fast_forward(seasons=1, report=reports.append)
+        self.assertEqual(game.season, 2)
+        self.assertEqual(game.week, 0)
+        self.assertIn("tables", reports[-1])
+        self.assertEqual(len(reports), 31)
+
+    def test_career_seed_replays_the_career(self) -> None:
+        def _play(noise):
+            random.seed(noise)
+            game = simulate.new_game("Benfica", seed=11)
+            reports = []
+            game.fast_forward(weeks=12, report=reports.append)
+            team = game.human_teams[0]
+            return reports, [(p.name, p.skill, p.injury) for p in team.players], [p.name for p in team.transfer_list()]
+
+        self.assertEqual(_play(1), _play(2))
+
+    def test_transfer_list_ignores_sales_before_it_is_looked_at(self) -> None:
+        def _listed(sell):
+            game = simulate.new_game("Benfica", seed=11)
+            game.fast_forward(weeks=3)
+            team = game.human_teams[0]
+            if sell:
+                # The best players move the skill of the team and its division
+                for player in sorted(team.players, key=lambda p: -p.skill)[:3]:
+                    self.assertTrue(team.sell_player(player))
+            return [(p.name, p.skill, p.position, p.age, p.salary) for p in team.transfer_list()]
+
+        self.assertTrue(_listed(False))
+        self.assertEqual(_listed(True), _listed(False))
+
+    def test_deferred_divisions_play_like_weekly_ones(self) -> None:
+        weekly = simulate.new_game("Benfica", seed=11)
+        weekly.fast_forward(weeks=12, report=lambda report: None)
+        deferred = simulate.new_game("Benfica", seed=11)
+        deferred.fast_forward(weeks=12)
+        self.assertEqual(deferred.viewed_divisions(), [deferred.human_teams[0].division])
+        self.assertEqual(len(deferred.divisions[0].deferred), 12)
+        self.assertFalse(deferred.divisions[0].matches[0][0].finished)
+
+        self.assertEqual(_results(deferred), _results(weekly))
+        self.assertIsNone(deferred.divisions[0].deferred)
+
+    def test_career_is_the_same_without_numpy(self) -> None:
+        batched = simulate.new_game("Benfica", seed=11)
+        batched.fast_forward(weeks=12)
+        with mock.patch.object(batch, "numpy", None):
+            serial = simulate.new_game("Benfica", seed=11)
+            serial.fast_forward(weeks=12)
+            self.assertEqual(_results(serial), _results(batched))
+
+    def test_cli_writes_json_lines(self) -> None:
+        out = io.StringIO()
+        with redirect_stdout(out):
+            simulate.main(["--weeks", "2", "--seed", "1"])
+        lines = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual([line["week"] for line in lines], [1, 2])
+
+
+if __name__ == "__main__":
+    unittest.main()
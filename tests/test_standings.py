@@ -0,0 +1,50 @@
+import random
+import unittest
+
+from lib.Game import Game
+
+
+def _sorted_table(division):
+    return sorted(division.teams, key=lambda x: x.table_key(), reverse=True)
+
+
+class TestStandings(unittest.TestCase):
+    def setUp(self) -> None:
+        random.seed(9)
+        self.game = Game(name="Standings")
+        self.game.start()
+        self.game.start_of_season()
+
+    def test_table_follows_results_like_a_sort(self) -> None:
+        for week in range(12):
+            self.game.simulate_weekly_matches()
+            self.game.next_week()
+            for division in self.game.divisions:
+                ordered = division.ordered_table_by_position()
+                table = _sorted_table(division)
+                self.assertEqual(ordered, table)
+                for position, team in enumerate(table):
+                    self.assertEqual(team.league_position(), position + 1)
+            if week % 4 == 0:
+                self.game.divisions[0].order_table_by_position()
+
+    def test_equal_teams_keep_the_order_of_the_division(self) -> None:
+        division = self.game.divisions[1]
+        first, second = division.teams[5], division.teams[9]
+        self.assertLess(first.league_position(), second.league_position())
+
+        for team in (second, first):
+            team.update_stats_post_match(2, 0)
+        self.assertEqual(division.ordered_table_by_position()[:2], [first, second])
+
+    def test_new_season_starts_a_new_table(self) -> None:
+        self.game.fast_forward(weeks=30)
+        self.game.end_of_season()
+        self.game.start_of_season()
+        for division in self.game.divisions:
+            self.assertEqual(division.ordered_table_by_position(), _sorted_table(division))
+            self.assertEqual(division.teams[0].league_position(), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,7 +1,10 @@
+import copy
 import shutil
 import tempfile
 import unittest
+from unittest import mock
 
+from lib import constants
 from tui.state import SimpleFMState
 
 
@@ -17,6 +20,7 @@ class TestTUIState(unittest.TestCase):
         )
 
     def tearDown(self) -> None:
+        self.state.close()
         shutil.rmtree(self.temp_dir, ignore_errors=True)
 
     def test_header_context(self) -> None:
@@ -52,6 +56,82 @@ class TestTUIState(unittest.TestCase):
         self.assertIn("finances", summary)
         self.assertIn("news", summary)
 
+    def test_season_chances(self) -> None:
+        chances = self.state.season_chances(runs=200)
+        if chances is None:
+            self.skipTest("numpy is not installed")
+        self.assertEqual(len(chances["rows"]), len(self.state.league_view()["table"]))
+        self.assertAlmostEqual(sum(row["title"] for row in chances["rows"]), 1.0)
+        self.assertEqual(sum(row["highlight"] for row in chances["rows"]), 1)
+
+    def test_substitution_updates_match_lineup(self) -> None:
+        chances = self.state.next_opponent()["win_probabilities"]
+        self.assertAlmostEqual(sum(chances), 1.0)
+        self.state.begin_match()
+        for _ in range(10):
+            self.state.play_minute()
+        ctx = self.state.match_context()
+        player_out = next(p for p in ctx["on_pitch"] if p.position != "GK")
+        player_in = next(p for p in ctx["bench"] if p.position != "GK")
+
+        self.assertTrue(self.state.make_substitution(player_out.identifier, player_in.identifier))
+        self.state.play_minute()
+        ctx = self.state.match_context()
+        self.assertAlmostEqual(sum(ctx["win_probabilities"]), 1.0)
+        on_pitch = {p.identifier for p in ctx["on_pitch"]}
+        self.assertIn(player_in.identifier, on_pitch)
+        self.assertNotIn(player_out.identifier, on_pitch)
+        self.assertIn(player_in.identifier, {p.identifier for p in self.state.team_overview()["starting"]})
+
+    def test_injury_that_ends_the_match_is_reported(self) -> None:
+        self.state.begin_match()
+        team = self.state.active_team
+        outfield = [p for p in team.lineup().starters if p.position != 0]
+        for player in outfield[: len(team.lineup().starters) - constants.MATCH["MINIMUM_PLAYERS"]]:
+            player.playing_status = 2
+        team.invalidate_lineup()
+
+        with mock.patch.dict(constants.MATCH, {"INJURY_PROBABILITY_PER_MINUTE": 1000, "MAX_GOAL_PROB_PER_POSS": 0}):
+            self.state.play_minute()
+        ctx = self.state.match_context()
+        self.assertTrue(ctx["finished"])
+        self.assertIsNotNone(ctx["injured_player"])
+
+    def test_compacted_match_replays_from_its_seed(self) -> None:
+        before = copy.deepcopy(self.state.game)
+        match = self.state.begin_match()
+        with mock.patch.dict(constants.MATCH, {"INJURY_PROBABILITY_PER_MINUTE": 0.2}):
+            for _ in range(10):
+                self.state.play_minute()
+            ctx = self.state.match_context()
+            player_out = next(p for p in ctx["on_pitch"] if p.position != "GK")
+            player_in = next(p for p in ctx["bench"] if p.position != "GK")
+            self.assertTrue(self.state.make_substitution(player_out.identifier, player_in.identifier))
+            self.state.finish_match()
+
+            team = before.human_teams[0]
+            replayed = team.next_match(before.week)
+            self.assertEqual(replayed.seed, match.seed)
+            while not replayed.finished:
+                for minute, out_id, in_id in match.logged_substitutions():
+                    if minute == replayed.minutes:
+                        leaving, coming = team.id_to_player(out_id), team.id_to_player(in_id)
+                        self.assertTrue(team.replace_player(coming, leaving, in_match=True, match_minutes=minute))
+                        replayed.substitution_made_by_team(team, leaving, coming)
+                replayed.minute()
+
+        self.assertIsNotNone(match.seed)
+        self.assertIsNone(match.injured_player_out)
+        self.assertEqual(match.logged_substitutions(), [(10, player_out.identifier, player_in.identifier)])
+        self.assertTrue(match.injury_log)
+        self.assertEqual(replayed.injury_log, match.injury_log)
+        self.assertEqual(replayed.substitution_log, match.substitution_log)
+        self.assertEqual((replayed.score, replayed.possession_log), (match.score, match.possession_log))
+
+        replay = match.replay()
+        self.assertEqual([player for minute in replay for player in minute["injured"]], [player for minute, player in match.logged_injuries()])
+        self.assertEqual(replay[9]["substitutions"], [(player_out.identifier, player_in.identifier)])
+
     def test_manager_stats(self) -> None:
         stats = self.state.manager_stats()
         self.assertEqual(stats["name"], "Alex")
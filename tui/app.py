@@ -2,10 +2,14 @@
 
 from __future__ import annotations
 
-from typing import Dict
+import asyncio
+from typing import Dict, Optional
 
 from textual.app import App
 from textual.binding import Binding
+from textual.message import Message
+
+from lib import autosave
 
 from .state import SimpleFMState
 from .screens import (
@@ -19,6 +23,15 @@ from .screens import (
 )
 
 
+class SaveReport(Message):
+    """Progress of a save, posted by the autosave worker thread."""
+
+    def __init__(self, event: str, error: Optional[Exception]) -> None:
+        super().__init__()
+        self.event = event
+        self.error = error
+
+
 class SimpleFMTUI(App):
     """Main Textual application orchestrating all screens."""
 
@@ -30,7 +43,9 @@ class SimpleFMTUI(App):
 
     def __init__(self) -> None:
         super().__init__()
-        self.state = SimpleFMState()
+        # post_message is thread-safe and does not wait for the event loop
+        self.state = SimpleFMState(save_report=lambda event, error: self.post_message(SaveReport(event, error)))
+        self.announce_save = False
 
     def on_mount(self) -> None:  # pragma: no cover - UI bootstrapping
         self.push_screen(StartScreen())
@@ -38,10 +53,24 @@ class SimpleFMTUI(App):
     def action_save(self) -> None:  # pragma: no cover - save shortcut
         try:
             self.state.save_game()
-            self.notify("Game saved", severity="information")
+            self.announce_save = True
         except Exception as exc:
             self.notify(f"Unable to save: {exc}", severity="error")
 
+    def on_save_report(self, message: SaveReport) -> None:  # pragma: no cover - save feedback
+        # Weekly autosaves only show up when they fail
+        if message.event == autosave.SAVED and self.announce_save:
+            self.announce_save = False
+            self.notify("Game saved", severity="information")
+        elif message.event == autosave.FAILED:
+            self.announce_save = False
+            self.notify(f"Unable to save: {message.error}", severity="error")
+
+    async def action_quit(self) -> None:  # pragma: no cover - quit shortcut
+        # Finish the pending save without blocking the event loop
+        await asyncio.get_running_loop().run_in_executor(None, self.state.close)
+        self.exit()
+
     # ------------------------------------------------------------------
     # Routing helpers used by the individual screens
     # ------------------------------------------------------------------
@@ -52,6 +52,21 @@ def table_position_to_str(number: int) -> str:
     return f"{number}{suffix}"
 
 
+def chance_to_str(probability: float) -> str:
+    """Show a probability as a rounded percentage, hiding certain outcomes."""
+
+    if probability <= 0:
+        return "-"
+    if probability >= 1:
+        return "100%"
+    percent = probability * 100
+    if percent < 1:
+        return "<1%"
+    if percent > 99:
+        return ">99%"
+    return f"{int(round(percent))}%"
+
+
 def training_to_str(training: float) -> str:
     """Translate a raw training delta into the symbolic arrows."""
 
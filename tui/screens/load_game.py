@@ -25,13 +25,14 @@ class LoadGameScreen(StateScreen):
     def refresh_games(self) -> None:
         list_view = self.query_one("#games-list", ListView)
         list_view.clear()
-        self._games = self.app.state.list_saved_games()
+        saves = self.app.state.saved_games()
+        self._games = [save["name"] for save in saves]
 
         if not self._games:
             list_view.append(ListItem(Static("No saved games found."), disabled=True))
         else:
-            for name in self._games:
-                list_view.append(ListItem(Static(name)))
+            for save in saves:
+                list_view.append(ListItem(Static(f"[b]{save['name']}[/b]  {save['description']}")))
 
     def on_button_pressed(self, event: Button.Pressed) -> None:
         if event.button.id == "load":
@@ -11,7 +11,7 @@ from textual.containers import Container, Horizontal, Vertical
 from textual.reactive import reactive
 from textual.widgets import Button, DataTable, Footer, Header, ListItem, ListView, Select, Static
 
-from ..formatters import money_to_str, tactic_to_str, table_position_to_str, training_to_str
+from ..formatters import chance_to_str, money_to_str, tactic_to_str, table_position_to_str, training_to_str
 from ..state import PlayerSummary
 from .base import StateScreen
 
@@ -177,6 +177,9 @@ class TeamView(BaseView):
                 f"Next: [b]{opponent['location']}[/b] vs {opponent['name']}  "
                 f"Skill {opponent['avg_skill']}  Tactic {opponent['tactic']}"
             )
+            if opponent["win_probabilities"]:
+                win, draw, loss = opponent["win_probabilities"]
+                info += f"\nWin {win:.0%}  Draw {draw:.0%}  Loss {loss:.0%}"
         else:
             info = "No scheduled opponent this week."
         self.query_one("#match-info", Static).update(info)
@@ -377,11 +380,17 @@ class InformationView(BaseView):
 class LeagueView(BaseView):
     def compose(self) -> ComposeResult:
         yield Static(id="league-table")
+        yield Static(id="league-chances")
         yield Static("Latest fixtures", classes="list-title")
         yield ListView(id="fixtures-list")
         with Horizontal():
             yield Button("Higher division", id="prev-div", variant="primary")
             yield Button("Lower division", id="next-div", variant="primary")
+            yield Button("Season chances", id="chances", variant="default")
+
+    def on_mount(self) -> None:
+        self.show_chances = False
+        self.refresh()
 
     def refresh(self) -> None:
         data = self.app.state.league_view()
@@ -417,6 +426,36 @@ class LeagueView(BaseView):
 
         self.query_one("#prev-div", Button).disabled = not data["has_higher"]
         self.query_one("#next-div", Button).disabled = not data["has_lower"]
+        self._refresh_chances()
+
+    def _refresh_chances(self) -> None:
+        panel = self.query_one("#league-chances", Static)
+        self.query_one("#chances", Button).variant = "success" if getattr(self, "show_chances", False) else "default"
+        if not getattr(self, "show_chances", False):
+            panel.update("")
+            return
+
+        data = self.app.state.season_chances()
+        if data is None:
+            panel.update("Season chances need NumPy to be installed.")
+            return
+
+        table = Table(title=f"{data['division']} – season chances", expand=True)
+        table.add_column("Team")
+        table.add_column("Title")
+        if data["promotion"]:
+            table.add_column("Promotion")
+        table.add_column("Relegation")
+        for row in data["rows"]:
+            team_name = row["team"]
+            if row["highlight"]:
+                team_name = f"[bold]{team_name}[/bold]"
+            cells = [team_name, chance_to_str(row["title"])]
+            if data["promotion"]:
+                cells.append(chance_to_str(row["promotion"]))
+            cells.append(chance_to_str(row["relegation"]))
+            table.add_row(*cells)
+        panel.update(table)
 
     def on_button_pressed(self, event: Button.Pressed) -> None:
         if event.button.id == "prev-div":
@@ -425,4 +464,7 @@ class LeagueView(BaseView):
         elif event.button.id == "next-div":
             self.app.state.change_division(1)
             self.refresh()
+        elif event.button.id == "chances":
+            self.show_chances = not self.show_chances
+            self._refresh_chances()
 
@@ -85,6 +85,8 @@ class MatchScreen(StateScreen):
             f"Possession: {ctx['possession'][0]}% - {ctx['possession'][1]}%"
             f"    Last 5': {ctx['last_five'][0]}% - {ctx['last_five'][1]}%"
         )
+        home, draw, away = ctx['win_probabilities']
+        possession += f"\nWin: {ctx['home']} {home:.0%}  Draw {draw:.0%}  {ctx['away']} {away:.0%}"
         self.query_one("#possession", Static).update(possession)
 
         timeline = self.query_one("#timeline", ListView)
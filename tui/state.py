@@ -4,14 +4,14 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from pathlib import Path
-import pickle
-from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
 
 from lib.Game import Game
 from lib.Match import Match
 from lib.Team import Team
 from lib.Player import Player
-from lib import constants, db, helpers as lib_helpers
+from lib.autosave import Autosave
+from lib import constants, db, helpers as lib_helpers, parallel, savefile
 
 from . import formatters
 
@@ -42,7 +42,7 @@ class PlayerSummary:
     @classmethod
     def from_player(cls, player: Player) -> "PlayerSummary":
         return cls(
-            identifier=id(player),
+            identifier=player.id,
             name=player.name,
             position=player.pos_to_str(),
             age=player.age,
@@ -81,14 +81,28 @@ def _match_team_index(match: Match, team: Team) -> int:
     return 0 if match.teams[0] == team else 1
 
 
+def _team_outcomes(match: Match, team: Team) -> Tuple[float, float, float]:
+    """Win, draw and loss probabilities of a match from the side of ``team``."""
+    home, draw, away = match.win_probabilities()
+    return (home, draw, away) if _match_team_index(match, team) == 0 else (away, draw, home)
+
+
 class SimpleFMState:
     """Container encapsulating the simulation state for the TUI."""
 
-    def __init__(self, save_dir: Optional[Path] = None) -> None:
+    def __init__(
+        self,
+        save_dir: Optional[Path] = None,
+        autosave: bool = True,
+        save_report: Optional[Callable[[str, Optional[Exception]], None]] = None,
+    ) -> None:
         self.saves_dir = Path(save_dir or DEFAULT_SAVE_DIR)
         self.saves_dir.mkdir(parents=True, exist_ok=True)
+        self.autosave_enabled = autosave
+        self.save_report = save_report
 
         self.game: Optional[Game] = None
+        self.saver: Optional[Autosave] = None
         self.active_team: Optional[Team] = None
         self.current_match: Optional[Match] = None
         self.auto_play: bool = False
@@ -102,6 +116,23 @@ class SimpleFMState:
     def list_saved_games(self) -> List[str]:
         return sorted(p.stem for p in self.saves_dir.glob("*.sfm"))
 
+    def saved_games(self) -> List[Dict[str, object]]:
+        """Describe every save, most recent first, reading only the file headers."""
+
+        games = []
+        for info in savefile.list_saves(str(self.saves_dir)):
+            if info.legacy:
+                description = "Old save format"
+            else:
+                description = f"{info.team} ({info.manager}) | {info.division}"
+                if info.position:
+                    description += f" {formatters.table_position_to_str(info.position)}"
+                description += f" | Week {min(info.week + 1, constants.COMPETITION['TOTAL GAMES'])} {info.year()}"
+                if info.money is not None:
+                    description += f" | Cash {formatters.money_to_str(info.money)}"
+            games.append({"name": Path(info.path).stem, "description": description, "modified": info.modified})
+        return games
+
     def list_selectable_teams(self) -> List[Dict[str, str]]:
         total = constants.COMPETITION["TEAMS PER DIVISION"] * constants.COMPETITION[
             "TOTAL_NUMBER_OF_DIVISIONS"
@@ -166,6 +197,7 @@ class SimpleFMState:
         game.start_of_season()
 
         self.game = game
+        self._open_saver(self.saves_dir / f"{game_name}.sfm")
         if not game.human_teams:
             raise RuntimeError("Unable to locate the human controlled team")
         self.active_team = game.human_teams[0]
@@ -179,13 +211,14 @@ class SimpleFMState:
         if not path.exists():
             raise FileNotFoundError(path)
 
-        with path.open("rb") as fh:
-            data = pickle.load(fh)
+        data = savefile.load(str(path))
 
         game = Game()
         game.__dict__.update(data)
+        game.player_registry()
 
         self.game = game
+        self._open_saver(path)
         if not game.human_teams:
             raise RuntimeError("Save file does not contain a human controlled team")
         self.active_team = game.human_teams[0]
@@ -195,9 +228,31 @@ class SimpleFMState:
         return game
 
     def save_game(self) -> None:
-        if not self.game:
+        """Write the whole career in the background; failures go to ``save_report``."""
+
+        if not self.game or not self.saver:
             raise RuntimeError("No active game to save")
-        self.game.save(str(self.saves_dir))
+        self.saver.save(self.game.__dict__, snapshot=True)
+
+    def autosave(self) -> None:
+        """Append the changes of the week to the journal of the save, in the background."""
+
+        if self.autosave_enabled and self.game and self.saver:
+            self.saver.save(self.game.__dict__)
+
+    def wait_for_saves(self, timeout: Optional[float] = None) -> bool:
+        return self.saver.wait(timeout) if self.saver else True
+
+    def close(self, timeout: Optional[float] = None) -> bool:
+        """Finish writing the pending save and stop any worker processes before the application exits."""
+
+        parallel.shutdown()
+        return self.saver.close(timeout) if self.saver else True
+
+    def _open_saver(self, path: Path) -> None:
+        if self.saver:
+            self.saver.close()
+        self.saver = Autosave(str(path), report=self.save_report)
 
     # ------------------------------------------------------------------
     # UI helpers
@@ -258,11 +313,13 @@ class SimpleFMState:
         opponent = self.active_team.next_opponent(self.game.week)
         if not opponent:
             return None
+        match = self.active_team.next_match(self.game.week)
         return {
             "name": opponent.name,
             "avg_skill": int(round(opponent.avg_skill, 0)),
             "tactic": formatters.tactic_to_str(opponent.tactic) if opponent.tactic else "?",
             "location": self.active_team.next_match_to_str(self.game.week),
+            "win_probabilities": _team_outcomes(match, self.active_team) if match else None,
         }
 
     # ------------------------------------------------------------------
@@ -290,6 +347,9 @@ class SimpleFMState:
         team_index = _match_team_index(match, self.active_team)
         opponent = match.teams[1 - team_index]
         substitutions_left = 3 - match.substitutions[team_index]
+        lineup = self.active_team.lineup()
+        # The injured player is kept by id, also once an injury has ended the match
+        injured = self.active_team.id_to_player(match.injured_player_id) if match.injured_player_id is not None else None
 
         return {
             "minutes": match.minutes,
@@ -299,21 +359,20 @@ class SimpleFMState:
             "is_home": team_index == 0,
             "possession": match.ball_possession(),
             "last_five": match.ball_possession_last_5_minutes(),
+            "win_probabilities": tuple(match.win_probabilities()),
             "goalscorers": [
                 {
                     "minute": scorer["minute"],
-                    "name": scorer["player"].name,
+                    "name": match.goalscorer_name(scorer),
                     "team": scorer["team"].name,
                 }
                 for scorer in match.goalscorers
             ],
-            "on_pitch": [PlayerSummary.from_player(p) for p in self.active_team.players if p.playing_status == 0],
-            "bench": [PlayerSummary.from_player(p) for p in self.active_team.players if p.playing_status == 1],
+            "on_pitch": [PlayerSummary.from_player(p) for p in lineup.starters],
+            "bench": [PlayerSummary.from_player(p) for p in lineup.bench],
             "subs_left": substitutions_left,
             "allow_substitution": match.allow_substitution(self.active_team),
-            "injured_player": PlayerSummary.from_player(match.injured_player_out)
-            if match.injured_player_out
-            else None,
+            "injured_player": PlayerSummary.from_player(injured) if injured else None,
             "finished": match.finished,
             "opponent": opponent.name,
         }
@@ -350,7 +409,7 @@ class SimpleFMState:
             player_in, player_out, in_match=True, match_minutes=self.current_match.minutes
         )
         if success:
-            self.current_match.substitution_made_by_team(self.active_team)
+            self.current_match.substitution_made_by_team(self.active_team, player_out, player_in)
         return success
 
     def finalize_match(self) -> Dict[str, object]:
@@ -360,6 +419,7 @@ class SimpleFMState:
         assert self.game
         self.game.simulate_weekly_matches()
         self.game.next_week()
+        self.autosave()
         self.last_summary = summary
         self.current_match = None
         return summary
@@ -383,7 +443,7 @@ class SimpleFMState:
         self._ensure_game()
         assert self.active_team
         players = sorted(
-            self.active_team.players_to_buy,
+            self.active_team.transfer_list(),
             key=lambda player: (-player.skill, player.current_value(), player.position),
         )
         return [PlayerSummary.from_player(player) for player in players]
@@ -487,6 +547,7 @@ class SimpleFMState:
         summary = self._prepare_weekly_summary(match)
         self.game.simulate_weekly_matches()
         self.game.next_week()
+        self.autosave()
         self.last_summary = summary
         return summary
 
@@ -528,6 +589,30 @@ class SimpleFMState:
             "has_higher": self.active_division_index > 0,
         }
 
+    def season_chances(self, runs: int = 1000) -> Optional[Dict[str, object]]:
+        """Title, promotion and relegation chances of the viewed division.
+
+        Returns ``None`` when the prediction engine (NumPy) is not available.
+        """
+
+        self._ensure_game()
+        assert self.game
+        division = self.game.divisions[self.active_division_index]
+        chances = division.predict_final_table(runs)
+        if chances is None:
+            return None
+        rows = [
+            {
+                "team": team.name,
+                "title": chances[team]["Title"],
+                "promotion": chances[team]["Promotion"],
+                "relegation": chances[team]["Relegation"],
+                "highlight": getattr(self.active_team, "name", None) == team.name,
+            }
+            for team in division.ordered_table_by_position()
+        ]
+        return {"division": division.name, "promotion": division.level > 0, "rows": rows}
+
     def change_division(self, direction: int) -> None:
         self._ensure_game()
         assert self.game
@@ -559,16 +644,16 @@ class SimpleFMState:
 
     def _player_by_id(self, player_id: int) -> Player:
         assert self.active_team
-        for player in self.active_team.players:
-            if id(player) == int(player_id):
-                return player
-        raise ValueError(f"Unknown player id {player_id}")
+        player = self.active_team.id_to_player(player_id)
+        if player is None:
+            raise ValueError(f"Unknown player id {player_id}")
+        return player
 
     def _player_from_transfer_list(self, player_id: int) -> Optional[Player]:
-        assert self.active_team
-        for player in self.active_team.players_to_buy:
-            if id(player) == int(player_id):
-                return player
+        assert self.game and self.active_team
+        registry = self.game.player_registry()
+        if registry.team(player_id) is self.active_team and registry.on_transfer_list(player_id):
+            return registry.get(player_id)
         return None
 
     def _prepare_weekly_summary(self, match: Optional[Match]) -> Dict[str, object]:
@@ -593,7 +678,7 @@ class SimpleFMState:
                 "goals": [
                     {
                         "minute": goal["minute"],
-                        "player": goal["player"].name,
+                        "player": match.goalscorer_name(goal),
                         "team": goal["team"].name,
                     }
                     for goal in match.goalscorers